@@ -0,0 +1,112 @@
+"""
+Server-side burnout score, mirroring the components shown on the analytics page
+"""
+import re
+from datetime import timedelta
+from django.db.models import Count, Q
+from django.utils import timezone
+from .models import BurnoutSnapshot
+
+# Snapshots younger than this are served as-is; changes to the tasks, moods and
+# events behind the score drop today's snapshot straight away (see signals.py)
+SNAPSHOT_MAX_AGE = timedelta(minutes=5)
+
+UPCOMING_EVENTS_DAYS = 30
+UPCOMING_EVENTS_LIMIT = 10  # The analytics page has always counted its first page of 10 events
+
+# Mood scores are stored by the mood page as a "SCORE:<n>|<note>" prefix on the note
+SCORE_PATTERN = re.compile(r'^SCORE:(\d+)')
+
+CATEGORIES = [
+    (10, 'Low'),
+    (20, 'Moderate'),
+    (40, 'High'),
+]
+
+
+def get_burnout_category(score):
+    for limit, label in CATEGORIES:
+        if score <= limit:
+            return label
+    return 'Critical'
+
+
+def compute_burnout(user, now=None):
+    """
+    Compute the burnout components for a user with aggregate queries
+
+    Score = (10 - avg mood) - tasks done + tasks near deadline
+            + 2 * tasks overdue + upcoming events
+
+    Returns:
+        dict of BurnoutSnapshot field values
+    """
+    from calendar_sync.models import CalendarEvent
+    from mood_tracker.models import MoodEntry
+    from tasks.models import Task
+
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+
+    pending = ~Q(status='completed')
+    task_counts = Task.objects.filter(user=user).aggregate(
+        tasks_done=Count('id', filter=Q(status='completed')),
+        tasks_near_deadline=Count('id', filter=pending & Q(due_date__gt=now, due_date__lte=now + timedelta(hours=24))),
+        tasks_overdue=Count('id', filter=pending & Q(due_date__lt=now)),
+    )
+
+    scores = []
+    for note in MoodEntry.objects.filter(user=user, created_at__date=today).values_list('note', flat=True):
+        match = SCORE_PATTERN.match(note or '')
+        if match:
+            scores.append(int(match.group(1)))
+    avg_mood = sum(scores) / len(scores) if scores else 0
+
+    upcoming_events = CalendarEvent.objects.filter(
+        user=user,
+        start_time__gte=now,
+        start_time__lte=now + timedelta(days=UPCOMING_EVENTS_DAYS)
+    ).count()
+    upcoming_events = min(upcoming_events, UPCOMING_EVENTS_LIMIT)
+
+    mood_contribution = 10 - avg_mood if avg_mood > 0 else 0
+    score = (
+        mood_contribution
+        - task_counts['tasks_done']
+        + task_counts['tasks_near_deadline']
+        + task_counts['tasks_overdue'] * 2
+        + upcoming_events
+    )
+
+    return {
+        'score': round(score, 1),
+        'category': get_burnout_category(score),
+        'avg_mood': round(avg_mood, 1),
+        'upcoming_events': upcoming_events,
+        **task_counts,
+    }
+
+
+def invalidate_burnout_snapshot(user_id):
+    """Drop the user's snapshot for today, so the next request recomputes it"""
+    BurnoutSnapshot.objects.filter(user_id=user_id, date=timezone.localdate()).delete()
+
+
+def get_burnout_snapshot(user, refresh=False):
+    """
+    Return today's BurnoutSnapshot for a user, recomputing it if missing,
+    older than SNAPSHOT_MAX_AGE, or if refresh is requested
+    """
+    now = timezone.now()
+    today = timezone.localdate(now)
+
+    snapshot = BurnoutSnapshot.objects.filter(user=user, date=today).first()
+    if snapshot and not refresh and now - snapshot.computed_at < SNAPSHOT_MAX_AGE:
+        return snapshot
+
+    snapshot, _ = BurnoutSnapshot.objects.update_or_create(
+        user=user,
+        date=today,
+        defaults={**compute_burnout(user, now), 'computed_at': now},
+    )
+    return snapshot
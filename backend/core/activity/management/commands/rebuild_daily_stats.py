@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from activity.rollups import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Backfill or rebuild the DailyUserStats rollup table from raw tasks, moods, focus sessions and events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Only rebuild rows for this user id')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user'] is not None:
+            User = get_user_model()
+            try:
+                user = User.objects.get(id=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+
+        count = rebuild_daily_stats(user=user)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} daily stats rows'))
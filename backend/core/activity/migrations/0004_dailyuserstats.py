@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-17 02:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0003_focussession'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUserStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('focus_seconds', models.IntegerField(default=0)),
+                ('session_count', models.IntegerField(default=0)),
+                ('tasks_completed', models.IntegerField(default=0)),
+                ('tasks_updated', models.IntegerField(default=0)),
+                ('mood_sum', models.IntegerField(default=0)),
+                ('mood_band_sum', models.IntegerField(default=0)),
+                ('mood_count', models.IntegerField(default=0)),
+                ('event_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily user stats',
+                'ordering': ['date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
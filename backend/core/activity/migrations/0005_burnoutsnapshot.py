@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-17 02:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0004_dailyuserstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BurnoutSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('score', models.FloatField(default=0)),
+                ('category', models.CharField(default='Low', max_length=20)),
+                ('avg_mood', models.FloatField(default=0)),
+                ('tasks_done', models.IntegerField(default=0)),
+                ('tasks_near_deadline', models.IntegerField(default=0)),
+                ('tasks_overdue', models.IntegerField(default=0)),
+                ('upcoming_events', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='burnout_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('user', 'date')},
+            },
+        ),
+    ]
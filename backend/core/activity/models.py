@@ -69,3 +69,53 @@ class FocusSession(models.Model):
     
     def __str__(self):
         return f"{self.user.email} - Focus Session ({self.start_time})"
+
+class DailyUserStats(models.Model):
+    """
+    Per-user, per-day rollup of focus, task, mood and calendar activity.
+    Kept up to date by activity.signals; rebuild with `manage.py rebuild_daily_stats`.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    focus_seconds = models.IntegerField(default=0)
+    session_count = models.IntegerField(default=0)
+    tasks_completed = models.IntegerField(default=0)
+    tasks_updated = models.IntegerField(default=0)  # Tasks whose latest update falls on this day
+    mood_sum = models.IntegerField(default=0)  # 1-5 scale (MOOD_VALUES)
+    mood_band_sum = models.IntegerField(default=0)  # 1-3 scale (MOOD_BANDS)
+    mood_count = models.IntegerField(default=0)
+    event_count = models.IntegerField(default=0)  # Calendar events starting on this day
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ['user', 'date']
+        verbose_name_plural = 'Daily user stats'
+    
+    def __str__(self):
+        return f"{self.user.email} - {self.date}"
+
+class BurnoutSnapshot(models.Model):
+    """
+    Daily burnout score for a user, recomputed by activity.burnout when stale
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='burnout_snapshots')
+    date = models.DateField()
+    score = models.FloatField(default=0)
+    category = models.CharField(max_length=20, default='Low')
+    
+    # Components of the score
+    avg_mood = models.FloatField(default=0)  # Today's average mood score (1-10), 0 if none logged
+    tasks_done = models.IntegerField(default=0)
+    tasks_near_deadline = models.IntegerField(default=0)
+    tasks_overdue = models.IntegerField(default=0)
+    upcoming_events = models.IntegerField(default=0)
+    
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['user', 'date']
+    
+    def __str__(self):
+        return f"{self.user.email} - Burnout {self.score} ({self.date})"
@@ -0,0 +1,135 @@
+"""
+Incremental maintenance of the DailyUserStats rollup table
+"""
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import DailyUserStats, FocusSession
+
+STAT_FIELDS = [
+    'focus_seconds', 'session_count', 'tasks_completed', 'tasks_updated',
+    'mood_sum', 'mood_band_sum', 'mood_count', 'event_count',
+]
+
+
+def task_contribution(task):
+    return task.updated_at, {
+        'tasks_updated': 1,
+        'tasks_completed': 1 if task.status == 'completed' else 0,
+    }
+
+
+def mood_contribution(entry):
+    from mood_tracker.models import MOOD_VALUES, MOOD_BANDS
+    return entry.created_at, {
+        'mood_sum': MOOD_VALUES.get(entry.mood, 3),
+        'mood_band_sum': MOOD_BANDS.get(entry.mood, 2),
+        'mood_count': 1,
+    }
+
+
+def focus_contribution(session):
+    return session.start_time, {
+        'focus_seconds': session.duration_seconds or 0,
+        'session_count': 1,
+    }
+
+
+def event_contribution(event):
+    return event.start_time, {'event_count': 1}
+
+
+def apply_contribution(user_id, moment, counts, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one row's contribution to the rollup for its day.
+    Removals never create rows, so cascading user deletes don't resurrect stats.
+    """
+    if moment is None:
+        return
+    changes = {field: F(field) + sign * value for field, value in counts.items() if value}
+    if not changes:
+        return
+    day = timezone.localdate(moment)
+    rows = DailyUserStats.objects.filter(user_id=user_id, date=day)
+    if sign > 0:
+        DailyUserStats.objects.get_or_create(user_id=user_id, date=day)
+    rows.update(**changes)
+
+
+def apply_day_deltas(user_id, field, deltas):
+    """
+    Apply net per-day changes to one rollup field in a fixed number of queries,
+    for bulk writes that bypass the signal handlers
+
+    Args:
+        user_id: User whose rollups change
+        field: One of STAT_FIELDS
+        deltas: {date: change}
+    """
+    deltas = {day: delta for day, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    rows = DailyUserStats.objects.filter(user_id=user_id, date__in=list(deltas))
+    # Like apply_contribution, only additions create rows
+    missing = set(day for day, delta in deltas.items() if delta > 0) - set(rows.values_list('date', flat=True))
+    DailyUserStats.objects.bulk_create(
+        [DailyUserStats(user_id=user_id, date=day) for day in missing], ignore_conflicts=True
+    )
+    rows.update(**{field: F(field) + Case(
+        *(When(date=day, then=Value(delta)) for day, delta in deltas.items()),
+        default=Value(0),
+        output_field=IntegerField(),
+    )})
+
+
+def rebuild_daily_stats(user=None):
+    """
+    Recompute DailyUserStats from the raw tables with one grouped query per source.
+
+    Args:
+        user: Optional user to rebuild only their rows
+
+    Returns:
+        Number of rollup rows written
+    """
+    from calendar_sync.models import CalendarEvent
+    from mood_tracker.models import MoodEntry, MOOD_VALUES, MOOD_BANDS, mood_value_expression
+    from tasks.models import Task
+
+    def grouped(model, date_field, **aggregates):
+        queryset = model.objects.all()
+        if user is not None:
+            queryset = queryset.filter(user=user)
+        return queryset.annotate(day=TruncDate(date_field)).values('user_id', 'day').annotate(
+            **aggregates
+        ).order_by()
+
+    stats = defaultdict(dict)
+    sources = [
+        grouped(FocusSession, 'start_time', focus_seconds=Sum('duration_seconds'), session_count=Count('id')),
+        grouped(Task, 'updated_at', tasks_updated=Count('id'), tasks_completed=Count('id', filter=Q(status='completed'))),
+        grouped(
+            MoodEntry, 'created_at',
+            mood_sum=Sum(mood_value_expression(MOOD_VALUES, 3)),
+            mood_band_sum=Sum(mood_value_expression(MOOD_BANDS, 2)),
+            mood_count=Count('id'),
+        ),
+        grouped(CalendarEvent, 'start_time', event_count=Count('id')),
+    ]
+    for rows in sources:
+        for row in rows:
+            key = (row.pop('user_id'), row.pop('day'))
+            stats[key].update({field: value or 0 for field, value in row.items()})
+
+    with transaction.atomic():
+        existing = DailyUserStats.objects.all()
+        if user is not None:
+            existing = existing.filter(user=user)
+        existing.delete()
+        DailyUserStats.objects.bulk_create(
+            [DailyUserStats(user_id=user_id, date=day, **values) for (user_id, day), values in stats.items()],
+            batch_size=1000,
+        )
+    return len(stats)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Activity, FocusSession
+from .models import Activity, FocusSession, BurnoutSnapshot
 
 class ActivitySerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,4 +11,13 @@ class FocusSessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = FocusSession
         fields = ['id', 'start_time', 'end_time', 'duration_seconds', 'focus_mode', 'created_at']
-        read_only_fields = ['created_at'] 
\ No newline at end of file
+        read_only_fields = ['created_at']
+
+class BurnoutSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BurnoutSnapshot
+        fields = [
+            'date', 'score', 'category', 'avg_mood', 'tasks_done',
+            'tasks_near_deadline', 'tasks_overdue', 'upcoming_events', 'computed_at'
+        ]
+        read_only_fields = fields
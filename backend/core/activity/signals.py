@@ -0,0 +1,91 @@
+"""
+Signal handlers that keep DailyUserStats in step with the rows it summarises,
+and drop today's burnout snapshot when a row behind the score changes
+"""
+import threading
+from contextlib import contextmanager
+from django.db.models.signals import pre_save, post_save, post_delete
+from calendar_sync.models import CalendarEvent
+from mood_tracker.models import MoodEntry
+from tasks.models import Task
+from .burnout import invalidate_burnout_snapshot
+from .models import FocusSession
+from .rollups import (
+    apply_contribution,
+    task_contribution,
+    mood_contribution,
+    focus_contribution,
+    event_contribution,
+)
+
+CONTRIBUTIONS = {
+    Task: task_contribution,
+    MoodEntry: mood_contribution,
+    FocusSession: focus_contribution,
+    CalendarEvent: event_contribution,
+}
+
+# Rows the burnout score is computed from (see burnout.compute_burnout)
+BURNOUT_INPUTS = (Task, MoodEntry, CalendarEvent)
+
+_state = threading.local()
+
+
+@contextmanager
+def rollups_suspended():
+    """
+    Skip per-row rollup updates in this thread, e.g. for bulk deletes.
+    The caller is responsible for rebuilding the affected rollups afterwards.
+    """
+    previous = getattr(_state, 'suspended', False)
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
+
+
+def is_suspended():
+    return getattr(_state, 'suspended', False)
+
+
+def remember_previous(sender, instance, raw=False, **kwargs):
+    """Capture the stored version of an updated row so its old contribution can be removed"""
+    instance._rollup_previous = None
+    if raw or instance.pk is None or is_suspended():
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._rollup_previous = (previous.user_id, *CONTRIBUTIONS[sender](previous))
+
+
+def apply_saved(sender, instance, raw=False, **kwargs):
+    if raw or is_suspended():
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        apply_contribution(*previous, sign=-1)
+    apply_contribution(instance.user_id, *CONTRIBUTIONS[sender](instance))
+
+
+def apply_deleted(sender, instance, **kwargs):
+    if is_suspended():
+        return
+    apply_contribution(instance.user_id, *CONTRIBUTIONS[sender](instance), sign=-1)
+
+
+def invalidate_burnout(sender, instance, raw=False, **kwargs):
+    # Bulk writers run with rollups suspended and invalidate once themselves
+    if raw or is_suspended():
+        return
+    invalidate_burnout_snapshot(instance.user_id)
+
+
+for model in CONTRIBUTIONS:
+    pre_save.connect(remember_previous, sender=model, dispatch_uid=f'rollup_pre_save_{model.__name__}')
+    post_save.connect(apply_saved, sender=model, dispatch_uid=f'rollup_post_save_{model.__name__}')
+    post_delete.connect(apply_deleted, sender=model, dispatch_uid=f'rollup_post_delete_{model.__name__}')
+
+for model in BURNOUT_INPUTS:
+    post_save.connect(invalidate_burnout, sender=model, dispatch_uid=f'burnout_post_save_{model.__name__}')
+    post_delete.connect(invalidate_burnout, sender=model, dispatch_uid=f'burnout_post_delete_{model.__name__}')
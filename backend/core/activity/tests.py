@@ -0,0 +1,203 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from chatbot.models import ChatMessage, ChatSummary
+from mood_tracker.models import MoodEntry
+from tasks.models import Task, TaskTombstone
+from .burnout import get_burnout_snapshot
+from .models import BurnoutSnapshot, DailyUserStats, FocusSession
+from .rollups import STAT_FIELDS, rebuild_daily_stats
+from .signals import rollups_suspended
+from .wipe import chunked_delete, wipe_user_data
+
+
+def daily_stats(user):
+    """{date: {field: value}} of the user's rollups, leaving out zero fields and empty days"""
+    stats = {}
+    for row in DailyUserStats.objects.filter(user=user):
+        values = {field: getattr(row, field) for field in STAT_FIELDS if getattr(row, field)}
+        if values:
+            stats[row.date] = values
+    return stats
+
+
+class DailyUserStatsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='rollups', email='rollups@example.com', password=None)
+        self.now = timezone.now()
+        self.today = timezone.localdate(self.now)
+        self.yesterday = self.today - timedelta(days=1)
+
+    def assertMatchesRebuild(self):
+        incremental = daily_stats(self.user)
+        rebuild_daily_stats(user=self.user)
+        self.assertEqual(incremental, daily_stats(self.user))
+
+    def test_focus_sessions(self):
+        session = FocusSession.objects.create(user=self.user, start_time=self.now, duration_seconds=600)
+        FocusSession.objects.create(user=self.user, start_time=self.now, duration_seconds=300)
+        self.assertEqual(daily_stats(self.user), {self.today: {'focus_seconds': 900, 'session_count': 2}})
+
+        session.duration_seconds = 1200
+        session.save()
+        self.assertEqual(daily_stats(self.user)[self.today]['focus_seconds'], 1500)
+        self.assertMatchesRebuild()
+
+    def test_moving_a_row_to_another_day(self):
+        session = FocusSession.objects.create(user=self.user, start_time=self.now, duration_seconds=600)
+        session.start_time = self.now - timedelta(days=1)
+        session.save()
+        self.assertEqual(daily_stats(self.user), {self.yesterday: {'focus_seconds': 600, 'session_count': 1}})
+        self.assertMatchesRebuild()
+
+    def test_tasks(self):
+        task = Task.objects.create(user=self.user, title='write tests')
+        Task.objects.create(user=self.user, title='other')
+        self.assertEqual(daily_stats(self.user), {self.today: {'tasks_updated': 2}})
+
+        task.status = 'completed'
+        task.save()
+        self.assertEqual(daily_stats(self.user), {self.today: {'tasks_updated': 2, 'tasks_completed': 1}})
+
+        task.delete()
+        self.assertEqual(daily_stats(self.user), {self.today: {'tasks_updated': 1}})
+        self.assertMatchesRebuild()
+
+    def test_mood_entries(self):
+        MoodEntry.objects.create(user=self.user, mood='happy')
+        entry = MoodEntry.objects.create(user=self.user, mood='very_sad')
+        entry.mood = 'neutral'
+        entry.save()
+        self.assertEqual(daily_stats(self.user)[self.today]['mood_count'], 2)
+        self.assertMatchesRebuild()
+
+        MoodEntry.objects.filter(user=self.user).delete()
+        self.assertEqual(daily_stats(self.user), {})
+        self.assertMatchesRebuild()
+
+    def test_suspended_writes_are_skipped_until_rebuilt(self):
+        FocusSession.objects.create(user=self.user, start_time=self.now, duration_seconds=600)
+        with rollups_suspended():
+            FocusSession.objects.create(user=self.user, start_time=self.now, duration_seconds=300)
+            Task.objects.create(user=self.user, title='bulk')
+        self.assertEqual(daily_stats(self.user), {self.today: {'focus_seconds': 600, 'session_count': 1}})
+
+        rebuild_daily_stats(user=self.user)
+        self.assertEqual(
+            daily_stats(self.user),
+            {self.today: {'focus_seconds': 900, 'session_count': 2, 'tasks_updated': 1}},
+        )
+
+    def test_rebuild_only_touches_the_given_user(self):
+        other = get_user_model().objects.create_user(username='other', email='other@example.com', password=None)
+        FocusSession.objects.create(user=other, start_time=self.now, duration_seconds=60)
+        DailyUserStats.objects.filter(user=other).update(focus_seconds=1)  # Deliberately wrong
+        rebuild_daily_stats(user=self.user)
+        self.assertEqual(daily_stats(other), {self.today: {'focus_seconds': 1, 'session_count': 1}})
+
+
+class BurnoutSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='burnout', email='burnout@example.com', password=None)
+        self.task = Task.objects.create(user=self.user, title='late', due_date=timezone.now() - timedelta(hours=1))
+
+    def test_snapshot_is_reused(self):
+        first = get_burnout_snapshot(self.user)
+        self.assertEqual(first.tasks_overdue, 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_burnout_snapshot(self.user).pk, first.pk)
+
+    def test_task_changes_refresh_the_score(self):
+        self.assertEqual(get_burnout_snapshot(self.user).score, 2)
+
+        self.task.status = 'completed'
+        self.task.save()
+        snapshot = get_burnout_snapshot(self.user)
+        self.assertEqual((snapshot.tasks_overdue, snapshot.tasks_done, snapshot.score), (0, 1, -1))
+
+        self.task.delete()
+        self.assertEqual(get_burnout_snapshot(self.user).score, 0)
+
+    def test_mood_entry_refreshes_the_score(self):
+        get_burnout_snapshot(self.user)
+        MoodEntry.objects.create(user=self.user, mood='sad', note='SCORE:3|rough day')
+        snapshot = get_burnout_snapshot(self.user)
+        self.assertEqual((snapshot.avg_mood, snapshot.score), (3, 9))
+
+    def test_other_users_snapshots_are_kept(self):
+        other = get_user_model().objects.create_user(username='other', email='other@example.com', password=None)
+        get_burnout_snapshot(other)
+        Task.objects.create(user=self.user, title='new')
+        self.assertTrue(BurnoutSnapshot.objects.filter(user=other).exists())
+
+    def test_suspended_writes_leave_the_snapshot(self):
+        get_burnout_snapshot(self.user)
+        with rollups_suspended():
+            Task.objects.create(user=self.user, title='bulk')
+        self.assertTrue(BurnoutSnapshot.objects.filter(user=self.user).exists())
+
+
+class WipeTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.user = get_user_model().objects.create_user(username='wipe', email='wipe@example.com', password=None)
+        self.other = get_user_model().objects.create_user(username='other', email='other@example.com', password=None)
+        for user in (self.user, self.other):
+            for i in range(5):
+                Task.objects.create(user=user, title=f'task {i}')
+            MoodEntry.objects.create(user=user, mood='happy')
+            FocusSession.objects.create(user=user, start_time=self.now, duration_seconds=600)
+            ChatMessage.objects.create(user=user, role='user', content='hi')
+            ChatSummary.objects.create(user=user, content='said hi', last_message_id=1)
+            get_burnout_snapshot(user)
+
+    def test_chunked_delete(self):
+        chunks = []
+        counts = chunked_delete(Task.objects.filter(user=self.user), chunk_size=2, before_delete=chunks.append)
+        self.assertEqual([len(ids) for ids in chunks], [2, 2, 1])
+        self.assertEqual(counts['tasks.Task'], 5)
+        self.assertFalse(Task.objects.filter(user=self.user).exists())
+        self.assertEqual(Task.objects.filter(user=self.other).count(), 5)
+
+    def test_wipe_everything(self):
+        task_ids = set(Task.objects.filter(user=self.user).values_list('id', flat=True))
+        other_stats = daily_stats(self.other)
+
+        result = wipe_user_data(self.user)
+        self.assertEqual(result['deleted'], {
+            'tasks.Task': 5,
+            'mood_tracker.MoodEntry': 1,
+            'activity.FocusSession': 1,
+            'chatbot.ChatMessage': 1,
+            'chatbot.ChatSummary': 1,
+            'activity.BurnoutSnapshot': 1,
+        })
+        self.assertEqual(result['total'], 10)
+
+        self.assertEqual(daily_stats(self.user), {})
+        self.assertFalse(ChatSummary.objects.filter(user=self.user).exists())
+        self.assertEqual(set(TaskTombstone.objects.filter(user=self.user).values_list('task_id', flat=True)), task_ids)
+
+        # The other user's data and rollups are untouched
+        self.assertEqual(Task.objects.filter(user=self.other).count(), 5)
+        self.assertEqual(daily_stats(self.other), other_stats)
+        self.assertTrue(BurnoutSnapshot.objects.filter(user=self.other).exists())
+
+    def test_wipe_without_rollup_resources_keeps_the_snapshot(self):
+        wipe_user_data(self.user, ['chat'])
+        self.assertFalse(ChatMessage.objects.filter(user=self.user).exists())
+        self.assertTrue(BurnoutSnapshot.objects.filter(user=self.user).exists())
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 5)
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_clear_tasks_endpoint(self):
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        response = self.client.delete('/api/tasks/', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'deleted': {'tasks.Task': 5, 'activity.BurnoutSnapshot': 1}, 'total': 6})
+        stats = daily_stats(self.user)[timezone.localdate(self.now)]
+        self.assertNotIn('tasks_updated', stats)
+        self.assertEqual(stats['session_count'], 1)
+        self.assertEqual(MoodEntry.objects.filter(user=self.user).count(), 1)
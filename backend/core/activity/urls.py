@@ -1,6 +1,6 @@
 from django.urls import path
 from . import views
-from .views import BehaviorStatsView, AnalyticsView, FocusSessionListCreateView, FocusSessionDetailView
+from .views import BehaviorStatsView, AnalyticsView, BurnoutView, FocusSessionListCreateView, FocusSessionDetailView
 
 urlpatterns = [
     path('', views.ActivityListCreateView.as_view(), name='activity-list-create'),
@@ -8,6 +8,7 @@ urlpatterns = [
     path('stats/', views.ActivityStatsView.as_view(), name='activity-stats'),
     path('behavior-stats/', BehaviorStatsView.as_view(), name='behavior-stats'),
     path('analytics/', AnalyticsView.as_view(), name='analytics'),
+    path('burnout/', BurnoutView.as_view(), name='burnout'),
     path('focus-sessions/', FocusSessionListCreateView.as_view(), name='focus-session-list-create'),
     path('focus-sessions/<int:pk>/', FocusSessionDetailView.as_view(), name='focus-session-detail'),
 ] 
\ No newline at end of file
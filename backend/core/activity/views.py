@@ -2,8 +2,10 @@ from rest_framework import generics, permissions
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta
-from .models import Activity, FocusSession
-from .serializers import ActivitySerializer, FocusSessionSerializer
+from .models import Activity, FocusSession, DailyUserStats
+from .serializers import ActivitySerializer, FocusSessionSerializer, BurnoutSnapshotSerializer
+from .burnout import get_burnout_snapshot
+from .wipe import wipe_user_data
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -57,70 +59,62 @@ class AnalyticsView(APIView):
 
     def get(self, request):
         user = request.user
-        now = timezone.now()
         days = int(request.query_params.get('days', 7))
         
-        start_date = now - timedelta(days=days)
+        today = timezone.localdate()
+        first_day = today - timedelta(days=days - 1)
         
-        # Get tasks data
-        from tasks.models import Task
-        tasks = Task.objects.filter(user=user, updated_at__gte=start_date)
-        completed_tasks = tasks.filter(status='completed')
-        
-        # Get mood data
-        from mood_tracker.models import MoodEntry
-        mood_entries = MoodEntry.objects.filter(user=user, created_at__gte=start_date)
-        
-        # Get focus sessions
-        focus_sessions = FocusSession.objects.filter(user=user, start_time__gte=start_date)
-        total_focus_seconds = sum(session.duration_seconds for session in focus_sessions if session.duration_seconds)
+        # Read the precomputed per-day rollups instead of the raw tables
+        stats_by_day = {
+            stats.date: stats
+            for stats in DailyUserStats.objects.filter(user=user, date__gte=first_day, date__lte=today)
+        }
         
         # Daily breakdown
         daily_data = []
-        for i in range(days):
-            day = now - timedelta(days=i)
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day.replace(hour=23, minute=59, second=59, microsecond=999999)
+        for i in range(days - 1, -1, -1):  # Oldest to newest
+            day = today - timedelta(days=i)
+            stats = stats_by_day.get(day)
             
-            day_tasks = tasks.filter(updated_at__gte=day_start, updated_at__lte=day_end)
-            day_completed = day_tasks.filter(status='completed').count()
-            
-            day_mood = mood_entries.filter(created_at__gte=day_start, created_at__lte=day_end).first()
             mood_value = None
-            if day_mood:
-                mood_map = {'very_happy': 3, 'happy': 3, 'neutral': 2, 'sad': 1, 'very_sad': 1}
-                mood_value = mood_map.get(day_mood.mood, 2)
-            
-            day_focus = focus_sessions.filter(start_time__gte=day_start, start_time__lte=day_end)
-            day_focus_minutes = sum(s.duration_seconds for s in day_focus if s.duration_seconds) // 60
+            if stats and stats.mood_count:
+                mood_value = round(stats.mood_band_sum / stats.mood_count, 1)
             
             daily_data.append({
-                'date': day_start.date().isoformat(),
-                'focusTime': day_focus_minutes,
-                'tasksCompleted': day_completed,
+                'date': day.isoformat(),
+                'focusTime': stats.focus_seconds // 60 if stats else 0,
+                'tasksCompleted': stats.tasks_completed if stats else 0,
                 'mood': mood_value,
                 'screenTime': 0,  # Placeholder - would need screen activity tracking
                 'breaks': 0,  # Placeholder - would need break tracking
             })
         
-        daily_data.reverse()  # Oldest to newest
+        totals = {
+            field: sum(getattr(stats, field) for stats in stats_by_day.values())
+            for field in ('focus_seconds', 'tasks_completed', 'tasks_updated', 'mood_band_sum', 'mood_count')
+        }
         
         return Response({
             'daily_data': daily_data,
             'summary': {
-                'total_focus_minutes': total_focus_seconds // 60,
-                'total_tasks_completed': completed_tasks.count(),
-                'total_tasks': tasks.count(),
-                'avg_mood': self._calculate_avg_mood(mood_entries),
+                'total_focus_minutes': totals['focus_seconds'] // 60,
+                'total_tasks_completed': totals['tasks_completed'],
+                'total_tasks': totals['tasks_updated'],
+                'avg_mood': round(totals['mood_band_sum'] / totals['mood_count'], 1) if totals['mood_count'] else 0,
             }
         })
-    
-    def _calculate_avg_mood(self, mood_entries):
-        if not mood_entries.exists():
-            return 0
-        mood_map = {'very_happy': 3, 'happy': 3, 'neutral': 2, 'sad': 1, 'very_sad': 1}
-        total = sum(mood_map.get(entry.mood, 2) for entry in mood_entries)
-        return round(total / mood_entries.count(), 1)
+
+class BurnoutView(APIView):
+    """
+    Today's burnout score and its components
+    GET /api/screen-activity/burnout/?refresh=true
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        refresh = request.query_params.get('refresh', '').lower() in ('1', 'true')
+        snapshot = get_burnout_snapshot(request.user, refresh=refresh)
+        return Response(BurnoutSnapshotSerializer(snapshot).data)
 
 class FocusSessionListCreateView(generics.ListCreateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
@@ -132,6 +126,13 @@ class FocusSessionListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def delete(self, request):
+        """
+        Delete all of the user's focus sessions
+        DELETE /api/screen-activity/focus-sessions/
+        """
+        return Response(wipe_user_data(request.user, ['focus_sessions']))
+
 class FocusSessionDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = FocusSessionSerializer
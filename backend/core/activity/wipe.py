@@ -0,0 +1,97 @@
+"""
+Bulk deletion of a user's data
+
+Each resource is deleted in chunks, one transaction per chunk, so a heavy
+user's wipe never holds one huge transaction or loads every row at once.
+Per-row rollup updates are suspended while deleting and the user's
+DailyUserStats are rebuilt once at the end instead.
+"""
+from collections import Counter
+from django.db import transaction
+from chatbot.models import ChatMessage, ChatSummary
+from mood_tracker.models import MoodEntry
+from tasks.models import Task, TaskTombstone
+from .models import BurnoutSnapshot, FocusSession
+from .rollups import rebuild_daily_stats
+from .signals import rollups_suspended
+
+CHUNK_SIZE = 1000
+
+
+def chunked_delete(queryset, chunk_size=CHUNK_SIZE, before_delete=None):
+    """
+    Delete every row in queryset, chunk_size rows per transaction
+
+    Args:
+        queryset: Rows to delete
+        chunk_size: Rows per chunk
+        before_delete: Optional callable given each chunk's primary keys,
+            run in the same transaction before the chunk is deleted
+
+    Returns:
+        Counter of deleted rows per model label (including cascades)
+    """
+    counts = Counter()
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return counts
+        with transaction.atomic():
+            if before_delete is not None:
+                before_delete(ids)
+            _, per_model = queryset.model.objects.filter(pk__in=ids).delete()
+        counts.update(per_model)
+
+
+def wipe_tasks(user):
+    def write_tombstones(ids):
+        # Let delta sync clients drop the tasks too
+        TaskTombstone.objects.bulk_create([TaskTombstone(user=user, task_id=task_id) for task_id in ids])
+
+    return chunked_delete(Task.objects.filter(user=user), before_delete=write_tombstones)
+
+
+def wipe_mood_entries(user):
+    return chunked_delete(MoodEntry.objects.filter(user=user))
+
+
+def wipe_focus_sessions(user):
+    return chunked_delete(FocusSession.objects.filter(user=user))
+
+
+def wipe_chat_messages(user):
+    counts = chunked_delete(ChatMessage.objects.filter(user=user))
+    counts.update(ChatSummary.objects.filter(user=user).delete()[1])
+    return counts
+
+
+RESOURCES = {
+    'tasks': wipe_tasks,
+    'mood': wipe_mood_entries,
+    'focus_sessions': wipe_focus_sessions,
+    'chat': wipe_chat_messages,
+}
+
+# Resources that feed DailyUserStats and the burnout score
+ROLLUP_RESOURCES = {'tasks', 'mood', 'focus_sessions'}
+
+
+def wipe_user_data(user, resources=None):
+    """
+    Delete the user's data for the given resources (all of RESOURCES by default)
+
+    Returns:
+        {"deleted": {model label: count}, "total": count}
+    """
+    resources = list(RESOURCES) if resources is None else resources
+    counts = Counter()
+    with rollups_suspended():
+        for resource in resources:
+            counts.update(RESOURCES[resource](user))
+
+    if ROLLUP_RESOURCES.intersection(resources):
+        rebuild_daily_stats(user=user)
+        counts.update(BurnoutSnapshot.objects.filter(user=user).delete()[1])
+
+    deleted = {label: count for label, count in counts.items() if count}
+    return {'deleted': deleted, 'total': sum(deleted.values())}
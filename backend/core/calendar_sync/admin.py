@@ -1,12 +1,12 @@
 from django.contrib import admin
-from .models import CalendarConnection, CalendarEvent
+from .models import CalendarConnection, CalendarEvent, SyncJob
 
 @admin.register(CalendarConnection)
 class CalendarConnectionAdmin(admin.ModelAdmin):
     list_display = ['user', 'provider', 'calendar_name', 'is_active', 'sync_enabled', 'last_synced_at', 'created_at']
     list_filter = ['provider', 'is_active', 'sync_enabled', 'created_at']
     search_fields = ['user__username', 'user__email', 'calendar_name']
-    readonly_fields = ['created_at', 'updated_at', 'last_synced_at']
+    readonly_fields = ['created_at', 'updated_at', 'last_synced_at', 'sync_token', 'sync_window_end']
     
     fieldsets = (
         ('User & Provider', {
@@ -20,7 +20,7 @@ class CalendarConnectionAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Sync Settings', {
-            'fields': ('is_active', 'sync_enabled', 'last_synced_at')
+            'fields': ('is_active', 'sync_enabled', 'last_synced_at', 'sync_token', 'sync_window_end')
         }),
         ('Metadata', {
             'fields': ('created_at', 'updated_at'),
@@ -52,3 +52,13 @@ class CalendarEventAdmin(admin.ModelAdmin):
         }),
     )
 
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'connection', 'trigger', 'status', 'created', 'updated', 'deleted', 'created_at', 'finished_at']
+    list_filter = ['status', 'trigger', 'created_at']
+    search_fields = ['user__username', 'connection__calendar_name']
+    readonly_fields = [
+        'connections_total', 'connections_done', 'synced', 'created', 'updated', 'deleted', 'errors',
+        'created_at', 'started_at', 'finished_at'
+    ]
@@ -0,0 +1,241 @@
+"""
+Background calendar sync jobs
+
+Syncs don't run inside HTTP requests: the sync endpoints and the OAuth
+callback queue a SyncJob and return its id straight away. The
+run_calendar_worker command runs them on a JobRunner, which claims pending
+jobs as its threads become free. On every poll it also queues a scheduled job
+for each active connection whose last sync is more than CALENDAR_SYNC_INTERVAL
+minutes old. The job row carries the progress and result counts the status
+endpoint reports.
+
+Jobs are claimed with a conditional UPDATE, so several workers can share the
+queue without running a job twice. A user's jobs run one at a time, since two
+syncs of the same calendar would race to create the same events.
+"""
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections as db_connections
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+from .models import CalendarConnection, SyncJob
+from .services import sync_connections
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED_STATUSES = (SyncJob.STATUS_PENDING, SyncJob.STATUS_RUNNING)
+
+# Running jobs older than this were left behind by a worker that stopped
+STALE_JOB_AGE = timedelta(hours=1)
+
+# Errors kept on a job; a calendar with many broken events could report thousands
+MAX_JOB_ERRORS = 50
+
+
+def enqueue_sync(user, connection=None, trigger='manual'):
+    """
+    Queue a sync of one connection, or of all the user's connections
+
+    If the same sync is already waiting to run, that job is returned instead
+    of queuing another.
+
+    Returns:
+        SyncJob
+    """
+    job = SyncJob.objects.filter(user=user, connection=connection, status=SyncJob.STATUS_PENDING).first()
+    if job is None:
+        job = SyncJob.objects.create(user=user, connection=connection, trigger=trigger)
+    return job
+
+
+def schedule_due_syncs():
+    """
+    Queue syncs for active connections not synced in the last CALENDAR_SYNC_INTERVAL minutes
+
+    Connections with an unfinished job (or whose user has an unfinished sync
+    of all their calendars), or a job queued within the interval (e.g. one
+    that failed), are skipped so a failing calendar isn't retried on every
+    poll.
+
+    Returns:
+        Number of jobs queued
+    """
+    due_before = timezone.now() - timedelta(minutes=settings.CALENDAR_SYNC_INTERVAL)
+    connections = CalendarConnection.objects.filter(
+        provider='google',
+        is_active=True,
+        sync_enabled=True,
+    ).filter(
+        Q(last_synced_at__isnull=True) | Q(last_synced_at__lt=due_before)
+    ).exclude(
+        sync_jobs__status__in=UNFINISHED_STATUSES
+    ).exclude(
+        sync_jobs__created_at__gte=due_before
+    ).exclude(
+        Exists(SyncJob.objects.filter(
+            user=OuterRef('user'), connection__isnull=True, status__in=UNFINISHED_STATUSES
+        ))
+    )
+    jobs = SyncJob.objects.bulk_create([
+        SyncJob(user_id=connection.user_id, connection=connection, trigger='scheduled')
+        for connection in connections
+    ])
+    return len(jobs)
+
+
+def fail_stale_jobs():
+    """Mark jobs whose worker stopped mid-run as failed; returns how many there were"""
+    return SyncJob.objects.filter(
+        status=SyncJob.STATUS_RUNNING,
+        started_at__lt=timezone.now() - STALE_JOB_AGE,
+    ).update(
+        status=SyncJob.STATUS_FAILED,
+        finished_at=timezone.now(),
+        errors=['The sync worker stopped before the job finished'],
+    )
+
+
+def claim_jobs(limit):
+    """
+    Claim up to limit pending jobs, oldest first, at most one per user
+
+    Returns:
+        List of SyncJob, now running
+    """
+    claimed = []
+    user_running = Exists(SyncJob.objects.filter(user=OuterRef('user'), status=SyncJob.STATUS_RUNNING))
+    pending = SyncJob.objects.filter(status=SyncJob.STATUS_PENDING).exclude(user_running).order_by('created_at')
+    for job in pending.select_related('connection')[:limit * 2]:
+        if len(claimed) == limit:
+            break
+        started_at = timezone.now()
+        # Only one worker's update matches while the job is still pending and
+        # none of the user's other jobs is running
+        if SyncJob.objects.filter(pk=job.pk, status=SyncJob.STATUS_PENDING).exclude(user_running).update(
+            status=SyncJob.STATUS_RUNNING, started_at=started_at
+        ):
+            job.status = SyncJob.STATUS_RUNNING
+            job.started_at = started_at
+            claimed.append(job)
+    return claimed
+
+
+def job_errors(result):
+    """Error messages in a sync result, prefixed with the calendar name"""
+    name = result.get('connection_name')
+    if 'error' in result:
+        return [f"{name}: {result['error']}"]
+    return [f"{name}: {error}" for error in result.get('errors', [])]
+
+
+def run_sync_job(job):
+    """
+    Run a claimed job, recording progress as each connection finishes
+
+    Returns:
+        The job, finished
+    """
+    if job.connection_id:
+        connections = [job.connection]
+    else:
+        connections = list(CalendarConnection.objects.filter(user_id=job.user_id, is_active=True, sync_enabled=True))
+    SyncJob.objects.filter(pk=job.pk).update(connections_total=len(connections))
+
+    def record_result(result):
+        SyncJob.objects.filter(pk=job.pk).update(
+            connections_done=F('connections_done') + 1,
+            synced=F('synced') + result.get('synced', 0),
+            created=F('created') + result.get('created', 0),
+            updated=F('updated') + result.get('updated', 0),
+            deleted=F('deleted') + result.get('deleted', 0),
+        )
+
+    try:
+        results = sync_connections(connections, on_result=record_result)
+        errors = [error for result in results for error in job_errors(result)]
+        # A job fails only if no connection could be synced
+        failed = bool(results) and all('error' in result for result in results)
+    except Exception as e:
+        logger.error(f"Error running calendar sync job {job.id}: {e}", exc_info=True)
+        errors = [str(e)]
+        failed = True
+
+    SyncJob.objects.filter(pk=job.pk).update(
+        status=SyncJob.STATUS_FAILED if failed else SyncJob.STATUS_SUCCEEDED,
+        connections_done=len(connections),
+        errors=errors[:MAX_JOB_ERRORS],
+        finished_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    logger.info(
+        f"Calendar sync job {job.id} {job.status}: {job.created} created, {job.updated} updated, "
+        f"{job.deleted} deleted, {len(errors)} errors"
+    )
+    return job
+
+
+def run_sync_job_in_thread(job):
+    try:
+        return run_sync_job(job)
+    finally:
+        db_connections.close_all()
+
+
+class JobRunner:
+    """
+    Runs claimed jobs on a long-lived pool of CALENDAR_SYNC_WORKERS threads
+
+    Each poll claims only as many jobs as there are idle threads, so a slow
+    job holds up one thread rather than the next batch.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or settings.CALENDAR_SYNC_WORKERS
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='calendar-job')
+        self.running = set()
+
+    def poll(self):
+        """
+        Clean up, schedule due syncs and start jobs on the idle threads
+
+        Returns:
+            Number of jobs started
+        """
+        self.collect()
+        stale = fail_stale_jobs()
+        if stale:
+            logger.warning(f"Marked {stale} stale calendar sync jobs as failed")
+        scheduled = schedule_due_syncs()
+        if scheduled:
+            logger.info(f"Scheduled {scheduled} calendar syncs")
+
+        idle = self.workers - len(self.running)
+        if idle <= 0:
+            return 0
+        jobs = claim_jobs(idle)
+        for job in jobs:
+            self.running.add(self.executor.submit(run_sync_job_in_thread, job))
+        return len(jobs)
+
+    def collect(self):
+        """Forget finished jobs, logging any that crashed outside run_sync_job's own handling"""
+        finished = {future for future in self.running if future.done()}
+        for future in finished:
+            if future.exception() is not None:
+                logger.error(f"Calendar sync job crashed: {future.exception()}", exc_info=future.exception())
+        self.running -= finished
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds, returning early when a running job finishes"""
+        if self.running:
+            wait(self.running, timeout=timeout, return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(timeout)
+
+    def shutdown(self):
+        """Wait for running jobs to finish and stop the threads"""
+        self.executor.shutdown(wait=True)
+        self.collect()
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from calendar_sync.jobs import JobRunner
+
+
+class Command(BaseCommand):
+    help = 'Run queued calendar sync jobs and schedule periodic syncs of every active calendar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are free to start, wait for them and exit')
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.CALENDAR_WORKER_POLL_INTERVAL,
+            help='Seconds between polls of the queue when no job finishes sooner',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Calendar sync worker started (polling every {options['poll_interval']}s)")
+        runner = JobRunner()
+        try:
+            while True:
+                close_old_connections()
+                count = runner.poll()
+                if count:
+                    self.stdout.write(f'Started {count} sync jobs')
+                if options['once']:
+                    break
+                # Poll again once a job frees a thread, or after the interval
+                runner.wait(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Waiting for running sync jobs to finish')
+        finally:
+            runner.shutdown()
+        self.stdout.write(self.style.SUCCESS('Calendar sync worker stopped'))
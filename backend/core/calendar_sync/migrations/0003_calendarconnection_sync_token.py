@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 03:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendar_sync', '0002_calendarconnection_account_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendarconnection',
+            name='sync_token',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='calendarconnection',
+            name='sync_window_end',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
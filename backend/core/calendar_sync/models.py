@@ -30,6 +30,10 @@ class CalendarConnection(models.Model):
     is_active = models.BooleanField(default=True)
     sync_enabled = models.BooleanField(default=True)
     last_synced_at = models.DateTimeField(null=True, blank=True)
+    # Google's nextSyncToken from the last sync; later syncs fetch only changes since then
+    sync_token = models.TextField(null=True, blank=True)
+    # End of the time window the last full sync covered
+    sync_window_end = models.DateTimeField(null=True, blank=True)
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -88,6 +92,8 @@ class CalendarEvent(models.Model):
     
     # Sync metadata
     last_modified = models.DateTimeField()  # Last modified time from external calendar
+    # sha256 of the synced fields (see services.event_content_hash); unchanged events are skipped
+    content_hash = models.CharField(max_length=64, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -111,3 +117,64 @@ class CalendarEvent(models.Model):
         today = timezone.now().date()
         return self.start_time.date() == today
 
+
+
+class SyncJob(models.Model):
+    """
+    Queued calendar sync, run by the run_calendar_worker command
+    
+    A job syncs one connection, or all of the user's active connections when
+    connection is empty.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    TRIGGER_CHOICES = [
+        ('manual', 'Manual'),
+        ('connect', 'Calendar connected'),
+        ('scheduled', 'Scheduled'),
+    ]
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='calendar_sync_jobs')
+    connection = models.ForeignKey(
+        CalendarConnection, on_delete=models.CASCADE, null=True, blank=True, related_name='sync_jobs'
+    )
+    trigger = models.CharField(max_length=20, choices=TRIGGER_CHOICES, default='manual')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    
+    # Progress
+    connections_total = models.PositiveIntegerField(default=0)
+    connections_done = models.PositiveIntegerField(default=0)
+    
+    # Results, summed over the job's connections
+    synced = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    deleted = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        target = self.connection.calendar_name if self.connection_id else 'all calendars'
+        return f"{self.user.username} - {target} - {self.status}"
+    
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import CalendarConnection, CalendarEvent
+from .models import CalendarConnection, CalendarEvent, SyncJob
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -87,3 +87,19 @@ class CalendarSyncStatusSerializer(serializers.Serializer):
     event_count = serializers.IntegerField()
     needs_refresh = serializers.BooleanField()
 
+
+
+class SyncJobSerializer(serializers.ModelSerializer):
+    """Serializer for queued calendar sync jobs"""
+    connection_name = serializers.CharField(source='connection.calendar_name', read_only=True, default=None)
+    is_finished = serializers.BooleanField(read_only=True)
+    
+    class Meta:
+        model = SyncJob
+        fields = [
+            'id', 'connection', 'connection_name', 'trigger', 'status', 'is_finished',
+            'connections_total', 'connections_done',
+            'synced', 'created', 'updated', 'deleted', 'errors',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
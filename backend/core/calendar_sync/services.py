@@ -1,21 +1,53 @@
 """
 Service functions for calendar synchronization
 """
+import hashlib
+import json
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import connections as db_connections, transaction
 from django.utils import timezone
 from django.conf import settings as django_settings
 from cryptography.fernet import Fernet
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+from functools import lru_cache
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.http import build_http
 from googleapiclient.errors import HttpError
+from activity.burnout import invalidate_burnout_snapshot
+from activity.rollups import apply_day_deltas
+from activity.signals import rollups_suspended
 from .models import CalendarConnection, CalendarEvent
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Events are synced from now until this many days ahead
+SYNC_DAYS = 30
+# A full sync covers this much beyond SYNC_DAYS, so incremental syncs can run
+# until the window's end comes within SYNC_DAYS of now, about once a day
+FULL_SYNC_MARGIN = timedelta(days=1)
+
+# Fields of parse_google_event's result that make up an event's content hash
+HASHED_FIELDS = ('title', 'description', 'location', 'start_time', 'end_time', 'all_day', 'recurrence_rule')
+
+BULK_BATCH_SIZE = 500
+
+# Event attributes requested from Google: only what parse_google_event and the sync read
+EVENT_FIELDS = 'id,status,summary,description,location,start,end,recurrence,updated,created'
+
+# Connections whose HTTP transports are kept open between syncs
+MAX_CACHED_TRANSPORTS = 256
+
 # Encryption key for tokens (from Django settings)
 ENCRYPTION_KEY = django_settings.ENCRYPTION_KEY
 if not ENCRYPTION_KEY:
@@ -121,61 +153,176 @@ def get_google_credentials(connection):
     return creds
 
 
+@lru_cache(maxsize=1)
+def calendar_discovery_document():
+    """
+    The Calendar API's discovery document, parsed once per process
+    
+    Uses the copy shipped with google-api-python-client, so no request is
+    made. None if it isn't available (build() then fetches it instead).
+    """
+    document = discovery_cache.get_static_doc('calendar', 'v3')
+    return json.loads(document) if document else None
+
+
+# Authorized HTTP transports by connection id. A transport is taken out while
+# in use (httplib2 isn't thread-safe) and put back afterwards, so the next
+# sync of the connection reuses its open TLS connection to Google.
+transports = {}
+transports_lock = threading.Lock()
+
+
+def calendar_http():
+    """HTTP transport whose requests fail after CALENDAR_API_TIMEOUT seconds without a response"""
+    http = build_http()
+    http.timeout = django_settings.CALENDAR_API_TIMEOUT
+    return http
+
+
+@contextmanager
+def calendar_service(credentials, connection=None):
+    """
+    Google Calendar API client, built from the cached discovery document
+    
+    Args:
+        credentials: Google API credentials
+        connection: Optional CalendarConnection whose cached transport to reuse
+    """
+    transport = None
+    if connection is not None:
+        with transports_lock:
+            transport = transports.pop(connection.pk, None)
+    if transport is None:
+        transport = AuthorizedHttp(credentials, http=calendar_http())
+    else:
+        # The stored token may have been refreshed since
+        transport.credentials = credentials
+    
+    document = calendar_discovery_document()
+    if document is None:
+        service = build('calendar', 'v3', http=transport)
+    else:
+        service = build_from_document(document, http=transport)
+    try:
+        yield service
+    finally:
+        if connection is None:
+            transport.close()
+        else:
+            with transports_lock:
+                transports[connection.pk] = transport
+                if len(transports) > MAX_CACHED_TRANSPORTS:
+                    # Close the least recently used
+                    transports.pop(next(iter(transports))).close()
+
+
 def fetch_google_calendars(credentials):
     """Fetch list of user's Google calendars"""
     try:
-        service = build('calendar', 'v3', credentials=credentials)
-        calendar_list = service.calendarList().list().execute()
+        with calendar_service(credentials) as service:
+            calendar_list = service.calendarList().list().execute()
         return calendar_list.get('items', [])
     except HttpError as error:
         logger.error(f"Error fetching calendars: {error}")
         raise
 
 
-def fetch_google_events(credentials, calendar_id, time_min=None, time_max=None, max_results=250):
+class SyncTokenExpired(Exception):
+    """Google no longer accepts the stored sync token (410 Gone); a full sync is needed"""
+
+
+class SyncTimedOut(Exception):
+    """A connection's sync ran past CALENDAR_SYNC_TIMEOUT"""
+
+
+def iter_google_event_pages(credentials, calendar_id, time_min=None, time_max=None, page_size=None,
+                            sync_token=None, fields=EVENT_FIELDS, connection=None):
     """
-    Fetch events from Google Calendar
+    Stream events from Google Calendar one page at a time
+    
+    A full listing covers the events between time_min and time_max. An
+    incremental listing passes the sync token from an earlier listing instead
+    and gets only the events changed since then, cancelled ones included
+    (status 'cancelled'). Google doesn't allow a time range together with a
+    sync token, so an incremental listing can include events outside the
+    synced window.
     
     Args:
         credentials: Google API credentials
         calendar_id: Calendar ID to fetch from
         time_min: Start time (datetime or ISO string). Defaults to now (excludes past events)
         time_max: End time (datetime or ISO string). Defaults to 30 days ahead
-        max_results: Maximum number of results
+        page_size: Events per page (Google allows up to 2500). Defaults to CALENDAR_SYNC_PAGE_SIZE
+        sync_token: nextSyncToken from an earlier listing, for an incremental listing
+        fields: Event attributes to request, or None for all of them
+        connection: Optional CalendarConnection whose HTTP transport to reuse
+    
+    Yields:
+        Lists of event dictionaries, one per page
     
     Returns:
-        List of event dictionaries (only future events, up to 30 days ahead)
+        The nextSyncToken for the next incremental listing (as the generator's return value)
+    
+    Raises:
+        SyncTokenExpired: The sync token is no longer valid
     """
     try:
-        service = build('calendar', 'v3', credentials=credentials)
-        
-        # Default to now (exclude past events) and next 30 days
-        if not time_min:
-            time_min = timezone.now()
-        if not time_max:
-            time_max = timezone.now() + timedelta(days=30)
-        
-        # Convert datetime to RFC3339 format (required by Google Calendar API)
-        if isinstance(time_min, datetime):
-            time_min = time_min.strftime('%Y-%m-%dT%H:%M:%SZ')
-        if isinstance(time_max, datetime):
-            time_max = time_max.strftime('%Y-%m-%dT%H:%M:%SZ')
-        
-        events_result = service.events().list(
-            calendarId=calendar_id,
-            timeMin=time_min,
-            timeMax=time_max,
-            maxResults=max_results,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
+        params = {
+            'calendarId': calendar_id,
+            'maxResults': page_size or django_settings.CALENDAR_SYNC_PAGE_SIZE,
+            'singleEvents': True,
+        }
+        if fields:
+            params['fields'] = f'nextPageToken,nextSyncToken,items({fields})'
+        if sync_token:
+            params['syncToken'] = sync_token
+        else:
+            # Default to now (exclude past events) and next 30 days
+            if not time_min:
+                time_min = timezone.now()
+            if not time_max:
+                time_max = timezone.now() + timedelta(days=SYNC_DAYS)
+            
+            # Convert datetime to RFC3339 format (required by Google Calendar API)
+            if isinstance(time_min, datetime):
+                time_min = time_min.strftime('%Y-%m-%dT%H:%M:%SZ')
+            if isinstance(time_max, datetime):
+                time_max = time_max.strftime('%Y-%m-%dT%H:%M:%SZ')
+            params['timeMin'] = time_min
+            params['timeMax'] = time_max
         
-        return events_result.get('items', [])
+        with calendar_service(credentials, connection) as service:
+            page_token = None
+            while True:
+                events_result = service.events().list(pageToken=page_token, **params).execute()
+                yield events_result.get('items', [])
+                page_token = events_result.get('nextPageToken')
+                if not page_token:
+                    # Only the last page carries the sync token
+                    return events_result.get('nextSyncToken')
     except HttpError as error:
+        if sync_token and error.resp.status == 410:
+            raise SyncTokenExpired() from error
         logger.error(f"Error fetching events: {error}")
         raise
 
 
+def fetch_google_events(credentials, calendar_id, **kwargs):
+    """
+    Fetch every event of a listing at once (see iter_google_event_pages for the arguments)
+    
+    Returns:
+        (events, next_sync_token)
+    """
+    events = []
+    pages = iter_google_event_pages(credentials, calendar_id, **kwargs)
+    while True:
+        try:
+            events.extend(next(pages))
+        except StopIteration as done:
+            return events, done.value
+
+
 def parse_google_event(event_data):
     """Parse Google Calendar event data into our format"""
     event_id = event_data.get('id')
@@ -221,12 +368,208 @@ def parse_google_event(event_data):
     }
 
 
-def sync_google_calendar(connection):
+def event_content_hash(parsed_event):
+    """Hash of an event's synced content, to skip writing events that haven't changed"""
+    content = [
+        value.astimezone(dt_timezone.utc).isoformat() if isinstance(value, datetime) else value
+        for value in (parsed_event[field] for field in HASHED_FIELDS)
+    ]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+# SQLite has a single writer, and a transaction that reads before it writes fails
+# at once with "database is locked" if another has started writing meanwhile, so
+# syncs running on this process's threads take turns at their write transactions
+sqlite_write_lock = threading.RLock()
+
+
+@contextmanager
+def write_transaction():
+    """transaction.atomic(), serialised between sync threads when the database is SQLite"""
+    if transaction.get_connection().vendor != 'sqlite':
+        with transaction.atomic():
+            yield
+        return
+    with sqlite_write_lock, transaction.atomic():
+        yield
+
+
+class EventSync:
+    """
+    One pass over Google's event listing for a connection
+    
+    Each page is diffed against the stored events and written as it arrives,
+    in one transaction per page: a bulk_create, a bulk_update limited to the
+    changed fields and one delete. Events whose content hash is unchanged are
+    skipped. Bulk writes bypass the DailyUserStats signal handlers, so the
+    per-day event counts are adjusted alongside.
+    """
+    
+    def __init__(self, connection, full_sync, now, deadline=None):
+        self.connection = connection
+        self.full_sync = full_sync
+        self.now = now
+        self.deadline = deadline
+        self.existing_events = {
+            event.external_event_id: event
+            for event in CalendarEvent.objects.filter(calendar_connection=connection)
+        }
+        self.seen_ids = set()
+        self.counts = Counter(synced=0, created=0, updated=0, deleted=0)
+        self.errors = []
+    
+    def run(self, pages):
+        """
+        Consume the listing's pages, then finish the sync; returns the results dict
+        
+        Raises:
+            SyncTimedOut: The deadline passed before the listing was complete.
+                Pages already applied are kept; the sync token isn't saved, so
+                the next sync picks up from the previous one.
+        """
+        while True:
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                raise SyncTimedOut(f"Sync of connection {self.connection.id} timed out")
+            try:
+                events_data = next(pages)
+            except StopIteration as done:
+                sync_token = done.value
+                break
+            self.apply(*self.diff(events_data))
+        
+        to_delete = {}
+        for external_event_id, event in self.existing_events.items():
+            # Delete events that no longer exist in external calendar, and past events (cleanup)
+            if (self.full_sync and external_event_id not in self.seen_ids) or event.end_time < self.now:
+                to_delete[event.pk] = event
+        with write_transaction():
+            self.apply([], [], set(), to_delete)
+            # Update last synced timestamp and the token for the next incremental sync
+            self.connection.sync_token = sync_token
+            self.connection.last_synced_at = timezone.now()
+            self.connection.save()
+        
+        return {**self.counts, 'errors': self.errors, 'full_sync': self.full_sync}
+    
+    def diff(self, events_data):
+        """
+        Work out the changes one page of events makes
+        
+        Returns:
+            (to_create, to_update, update_fields, to_delete)
+        """
+        to_create = []
+        to_update = []
+        update_fields = set()
+        to_delete = {}  # pk -> event
+        for event_data in events_data:
+            try:
+                external_event_id = event_data.get('id')
+                self.counts['synced'] += 1
+                if event_data.get('status') == 'cancelled':
+                    # Only incremental syncs report cancellations; for a recurring
+                    # event, its instances ("<id>_<start>") go with it
+                    for event_id, event in self.existing_events.items():
+                        if event_id == external_event_id or event_id.startswith(f'{external_event_id}_'):
+                            to_delete[event.pk] = event
+                    continue
+                
+                parsed_event = parse_google_event(event_data)
+                self.seen_ids.add(external_event_id)
+                event = self.existing_events.get(external_event_id)
+                
+                in_window = (
+                    parsed_event['end_time'] >= self.now
+                    and parsed_event['start_time'] <= self.connection.sync_window_end
+                )
+                if not in_window:
+                    # Changed events outside the window (incremental syncs only)
+                    if event is not None:
+                        to_delete[event.pk] = event
+                    continue
+                
+                content_hash = event_content_hash(parsed_event)
+                if event is None:
+                    to_create.append(CalendarEvent(
+                        user=self.connection.user,
+                        calendar_connection=self.connection,
+                        content_hash=content_hash,
+                        **parsed_event
+                    ))
+                elif event.content_hash != content_hash:
+                    changed = [field for field, value in parsed_event.items() if getattr(event, field) != value]
+                    to_update.append((event, event.start_time))
+                    for field in changed:
+                        setattr(event, field, parsed_event[field])
+                    event.content_hash = content_hash
+                    update_fields.update(changed)
+            except Exception as e:
+                logger.error(f"Error processing event: {e}")
+                self.errors.append(str(e))
+        
+        return to_create, [item for item in to_update if item[0].pk not in to_delete], update_fields, to_delete
+    
+    def apply(self, to_create, to_update, update_fields, to_delete):
+        """
+        Write one batch of changes in a single transaction
+        
+        Args:
+            to_create: New CalendarEvent instances
+            to_update: (event, start_time before the change) pairs
+            update_fields: Fields changed across to_update
+            to_delete: {pk: event} to delete
+        """
+        if not (to_create or to_update or to_delete):
+            return
+        event_count_deltas = Counter()
+        for event in to_create:
+            event_count_deltas[timezone.localdate(event.start_time)] += 1
+        for event, previous_start_time in to_update:
+            event_count_deltas[timezone.localdate(previous_start_time)] -= 1
+            event_count_deltas[timezone.localdate(event.start_time)] += 1
+        for event in to_delete.values():
+            # Changes are never applied to events being deleted, so this is the stored start
+            event_count_deltas[timezone.localdate(event.start_time)] -= 1
+        
+        with write_transaction():
+            CalendarEvent.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+            if to_update:
+                synced_at = timezone.now()
+                events = [event for event, _ in to_update]
+                for event in events:
+                    event.updated_at = synced_at  # auto_now isn't applied by bulk_update
+                CalendarEvent.objects.bulk_update(
+                    events, sorted(update_fields | {'content_hash', 'updated_at'}), batch_size=BULK_BATCH_SIZE
+                )
+            if to_delete:
+                with rollups_suspended():
+                    CalendarEvent.objects.filter(id__in=list(to_delete)).delete()
+            apply_day_deltas(self.connection.user_id, 'event_count', event_count_deltas)
+            # Upcoming events count towards the burnout score
+            invalidate_burnout_snapshot(self.connection.user_id)
+        
+        for event in to_delete.values():
+            self.existing_events.pop(event.external_event_id, None)
+        self.counts['created'] += len(to_create)
+        self.counts['updated'] += len(to_update)
+        self.counts['deleted'] += len(to_delete)
+
+
+def sync_google_calendar(connection, deadline=None):
     """
     Sync events from Google Calendar to local database
     
+    The first sync (and any sync once the stored window no longer covers the
+    next SYNC_DAYS days) is a full sync: it lists the window, stores Google's
+    sync token and removes local events Google no longer lists. Later syncs
+    send the token and only receive what changed since. If Google rejects the
+    token (410 Gone), the sync falls back to a full one. Either way the listing
+    is streamed and applied page by page (see EventSync).
+    
     Args:
         connection: CalendarConnection instance
+        deadline: Optional time.monotonic() value; the sync stops with
+            SyncTimedOut at the first page boundary past it
     
     Returns:
         dict with sync results
@@ -236,100 +579,139 @@ def sync_google_calendar(connection):
     
     if not connection.is_active or not connection.sync_enabled:
         logger.info(f"Skipping sync for inactive/disabled connection: {connection.id}")
-        return {'synced': 0, 'created': 0, 'updated': 0, 'deleted': 0, 'errors': []}
+        return {'synced': 0, 'created': 0, 'updated': 0, 'deleted': 0, 'errors': [], 'full_sync': False}
     
     try:
         credentials = get_google_credentials(connection)
-        events_data = fetch_google_events(credentials, connection.calendar_id)
-        
-        synced_count = 0
-        created_count = 0
-        updated_count = 0
-        errors = []
-        
-        # Get existing events for this calendar
-        existing_events = {
-            event.external_event_id: event
-            for event in CalendarEvent.objects.filter(calendar_connection=connection)
-        }
+        now = timezone.now()
         
-        # Process fetched events
-        external_event_ids = set()
-        for event_data in events_data:
+        # Events drift into the window as time passes without changing, so incremental
+        # syncs are only complete while the last full sync still covers the window
+        full_sync = not (
+            connection.sync_token
+            and connection.sync_window_end
+            and connection.sync_window_end >= now + timedelta(days=SYNC_DAYS)
+        )
+        if not full_sync:
             try:
-                parsed_event = parse_google_event(event_data)
-                external_event_id = parsed_event['external_event_id']
-                external_event_ids.add(external_event_id)
-                
-                if external_event_id in existing_events:
-                    # Update existing event
-                    event = existing_events[external_event_id]
-                    # Only update if external calendar has newer version
-                    if parsed_event['last_modified'] > event.last_modified:
-                        for key, value in parsed_event.items():
-                            if key != 'external_event_id':
-                                setattr(event, key, value)
-                        event.save()
-                        updated_count += 1
-                else:
-                    # Create new event
-                    CalendarEvent.objects.create(
-                        user=connection.user,
-                        calendar_connection=connection,
-                        **parsed_event
+                return EventSync(connection, False, now, deadline).run(
+                    iter_google_event_pages(
+                        credentials, connection.calendar_id, sync_token=connection.sync_token, connection=connection
                     )
-                    created_count += 1
-                
-                synced_count += 1
-            except Exception as e:
-                logger.error(f"Error processing event: {e}")
-                errors.append(str(e))
-        
-        # Delete events that no longer exist in external calendar
-        deleted_count = 0
-        for external_event_id, event in existing_events.items():
-            if external_event_id not in external_event_ids:
-                event.delete()
-                deleted_count += 1
+                )
+            except SyncTokenExpired:
+                logger.info(f"Sync token expired for connection {connection.id}, running a full sync")
         
-        # Also delete any past events that are older than now (cleanup)
-        now = timezone.now()
-        past_events = CalendarEvent.objects.filter(
-            calendar_connection=connection,
-            end_time__lt=now
+        window_end = now + timedelta(days=SYNC_DAYS) + FULL_SYNC_MARGIN
+        connection.sync_window_end = window_end
+        return EventSync(connection, True, now, deadline).run(
+            iter_google_event_pages(
+                credentials, connection.calendar_id, time_min=now, time_max=window_end, connection=connection
+            )
         )
-        past_events_count = past_events.count()
-        past_events.delete()
-        if past_events_count > 0:
-            deleted_count += past_events_count
-            logger.info(f"Cleaned up {past_events_count} past events for connection {connection.id}")
-        
-        # Update last synced timestamp
-        connection.last_synced_at = timezone.now()
-        connection.save()
-        
-        return {
-            'synced': synced_count,
-            'created': created_count,
-            'updated': updated_count,
-            'deleted': deleted_count,
-            'errors': errors
-        }
     
     except Exception as e:
         logger.error(f"Error syncing Google Calendar: {e}")
         raise
 
 
+# Limits on concurrent syncs per provider, shared by every sync in the process
+provider_slots = {}
+provider_slots_lock = threading.Lock()
+
+
+def get_provider_slots(provider):
+    """Semaphore bounding concurrent syncs against one provider's API"""
+    with provider_slots_lock:
+        if provider not in provider_slots:
+            provider_slots[provider] = threading.BoundedSemaphore(django_settings.CALENDAR_SYNC_PROVIDER_CONCURRENCY)
+        return provider_slots[provider]
+
+
+def sync_connection(connection):
+    """
+    Sync one connection, within CALENDAR_SYNC_TIMEOUT seconds of getting a provider slot
+    
+    Returns:
+        Sync result with the connection's id and name, or None for providers
+        that can't be synced yet
+    """
+    try:
+        if connection.provider == 'google':
+            with get_provider_slots(connection.provider):
+                deadline = time.monotonic() + django_settings.CALENDAR_SYNC_TIMEOUT
+                result = sync_google_calendar(connection, deadline=deadline)
+            result['connection_id'] = connection.id
+            result['connection_name'] = connection.calendar_name
+            return result
+        # Add other providers here (outlook, apple)
+    except Exception as e:
+        logger.error(f"Error syncing connection {connection.id}: {e}")
+        return {
+            'connection_id': connection.id,
+            'connection_name': connection.calendar_name,
+            'error': str(e)
+        }
+    return None
+
+
+def sync_connection_in_thread(connection, on_result=None):
+    try:
+        result = sync_connection(connection)
+        if on_result is not None and result is not None:
+            on_result(result)
+        return result
+    finally:
+        # Worker threads get their own database connections, which Django's
+        # request cycle won't close for them
+        db_connections.close_all()
+
+
+def sync_connections(connections, on_result=None):
+    """
+    Sync connections concurrently
+    
+    Connections are synced on up to CALENDAR_SYNC_WORKERS threads, with at
+    most CALENDAR_SYNC_PROVIDER_CONCURRENCY syncs against one provider at a
+    time. Each sync gets CALENDAR_SYNC_TIMEOUT seconds, checked between pages,
+    and each API request CALENDAR_API_TIMEOUT seconds, so a hung request can't
+    hold up the batch; a sync that runs over is reported as an error.
+    
+    Args:
+        connections: CalendarConnection instances
+        on_result: Optional callable, called with each connection's result as
+            it finishes (on the worker thread)
+    
+    Returns:
+        List of sync results, in connection order
+    """
+    connections = list(connections)
+    if len(connections) <= 1:
+        results = []
+        for connection in connections:
+            result = sync_connection(connection)
+            if on_result is not None and result is not None:
+                on_result(result)
+            results.append(result)
+    else:
+        workers = min(django_settings.CALENDAR_SYNC_WORKERS, len(connections))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='calendar-sync') as executor:
+            results = list(executor.map(
+                sync_connection_in_thread, connections, [on_result] * len(connections)
+            ))
+    
+    return [result for result in results if result is not None]
+
+
 def sync_all_active_calendars(user=None):
     """
-    Sync all active calendar connections
+    Sync all active calendar connections concurrently (see sync_connections)
     
     Args:
         user: Optional user to sync only their calendars
     
     Returns:
-        List of sync results
+        List of sync results, in connection order
     """
     connections = CalendarConnection.objects.filter(
         is_active=True,
@@ -339,22 +721,4 @@ def sync_all_active_calendars(user=None):
     if user:
         connections = connections.filter(user=user)
     
-    results = []
-    for connection in connections:
-        try:
-            if connection.provider == 'google':
-                result = sync_google_calendar(connection)
-                result['connection_id'] = connection.id
-                result['connection_name'] = connection.calendar_name
-                results.append(result)
-            # Add other providers here (outlook, apple)
-        except Exception as e:
-            logger.error(f"Error syncing connection {connection.id}: {e}")
-            results.append({
-                'connection_id': connection.id,
-                'connection_name': connection.calendar_name,
-                'error': str(e)
-            })
-    
-    return results
-
+    return sync_connections(connections)
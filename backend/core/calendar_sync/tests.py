@@ -0,0 +1,435 @@
+import socket
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+import httplib2
+from django.contrib.auth import get_user_model
+from django.db import connection as db_connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+from activity.models import DailyUserStats
+from activity.rollups import rebuild_daily_stats
+from . import jobs, services
+from .models import CalendarConnection, CalendarEvent, SyncJob
+
+
+class CalendarServiceTests(SimpleTestCase):
+    @override_settings(CALENDAR_API_TIMEOUT=1)
+    def test_hung_request_times_out(self):
+        # Accepts connections but never answers
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+        self.addCleanup(server.close)
+        url = f'http://127.0.0.1:{server.getsockname()[1]}/'
+
+        start = time.monotonic()
+        with services.calendar_service(Credentials(token='test')) as service:
+            with self.assertRaises(TimeoutError):
+                service._http.request(url)
+        self.assertLess(time.monotonic() - start, 5)
+
+
+class FakeCalendarAPI:
+    """
+    Stands in for the Calendar API client
+
+    Serves each calendar's events for a full listing, or its changes for an
+    incremental one, maxResults at a time, and records every request and how
+    many were in flight at once.
+    """
+
+    def __init__(self):
+        self.events_by_calendar = {}
+        self.changes_by_calendar = {}
+        self.expired_tokens = set()
+        self.failing_calendars = set()
+        self.requests = []
+        self.delay = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.lock = threading.Lock()
+
+    def events(self):
+        return self
+
+    def list(self, **params):
+        return mock.Mock(execute=lambda: self.execute(params))
+
+    def execute(self, params):
+        with self.lock:
+            self.requests.append(params)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            return self.page(params)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def page(self, params):
+        calendar_id = params['calendarId']
+        if calendar_id in self.failing_calendars:
+            raise RuntimeError(f'{calendar_id} is unavailable')
+        if 'syncToken' in params:
+            if params['syncToken'] in self.expired_tokens:
+                raise HttpError(httplib2.Response({'status': 410}), b'Gone')
+            items = self.changes_by_calendar.get(calendar_id, [])
+        else:
+            items = self.events_by_calendar.get(calendar_id, [])
+
+        start = int(params.get('pageToken') or 0)
+        end = start + params['maxResults']
+        page = {'items': items[start:end]}
+        if end < len(items):
+            page['nextPageToken'] = str(end)
+        else:
+            page['nextSyncToken'] = f'{calendar_id}-{len(self.requests)}'
+        return page
+
+
+class FakeCalendarMixin:
+    """Patches the Calendar API client with a FakeCalendarAPI and creates a user with one connection"""
+
+    def setUp(self):
+        super().setUp()
+        self.api = FakeCalendarAPI()
+        for name, value in (('build_from_document', self.api), ('get_google_credentials', None)):
+            patcher = mock.patch.object(services, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.now = timezone.now()
+        self.user = get_user_model().objects.create_user(username='calendar', email='calendar@example.com', password=None)
+        self.connection = self.connect('primary')
+
+    def connect(self, calendar_id, user=None):
+        return CalendarConnection.objects.create(
+            user=user or self.user, provider='google', access_token='token',
+            calendar_id=calendar_id, calendar_name=calendar_id,
+        )
+
+    def google_event(self, event_id, days=1, title=None, status='confirmed'):
+        start = self.now + timedelta(days=days)
+        return {
+            'id': event_id,
+            'status': status,
+            'summary': title or event_id,
+            'start': {'dateTime': start.isoformat()},
+            'end': {'dateTime': (start + timedelta(hours=1)).isoformat()},
+            'updated': self.now.isoformat(),
+        }
+
+    def stored(self, connection=None):
+        """{external id: title} of the connection's stored events"""
+        return dict(
+            CalendarEvent.objects.filter(calendar_connection=connection or self.connection)
+            .values_list('external_event_id', 'title')
+        )
+
+    def sync(self, connection=None):
+        connection = connection or self.connection
+        connection.refresh_from_db()
+        return services.sync_google_calendar(connection)
+
+
+class IncrementalSyncTests(FakeCalendarMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.api.events_by_calendar['primary'] = [self.google_event('a'), self.google_event('b')]
+
+    def test_first_sync_is_full_and_stores_the_token(self):
+        result = self.sync()
+        self.assertTrue(result['full_sync'])
+        self.assertEqual(result['created'], 2)
+        self.assertNotIn('syncToken', self.api.requests[0])
+        self.connection.refresh_from_db()
+        self.assertEqual(self.connection.sync_token, 'primary-1')
+
+    def test_later_syncs_fetch_only_changes(self):
+        self.sync()
+        self.api.changes_by_calendar['primary'] = [
+            self.google_event('a', title='renamed'),
+            {'id': 'b', 'status': 'cancelled'},
+            self.google_event('c'),
+        ]
+        result = self.sync()
+        self.assertFalse(result['full_sync'])
+        self.assertEqual(self.api.requests[-1]['syncToken'], 'primary-1')
+        self.assertNotIn('timeMin', self.api.requests[-1])
+        self.assertEqual((result['created'], result['updated'], result['deleted']), (1, 1, 1))
+        self.assertEqual(self.stored(), {'a': 'renamed', 'c': 'c'})
+
+    def test_expired_token_falls_back_to_a_full_sync(self):
+        self.sync()
+        self.api.expired_tokens.add('primary-1')
+        self.api.events_by_calendar['primary'] = [self.google_event('a')]
+        result = self.sync()
+        self.assertTrue(result['full_sync'])
+        self.assertEqual(result['deleted'], 1)
+        self.assertEqual(self.stored(), {'a': 'a'})
+
+    def test_window_running_out_forces_a_full_sync(self):
+        self.sync()
+        CalendarConnection.objects.filter(pk=self.connection.pk).update(sync_window_end=self.now + timedelta(days=1))
+        self.assertTrue(self.sync()['full_sync'])
+
+
+class BulkSyncTests(FakeCalendarMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.api.events_by_calendar['primary'] = [self.google_event(f'e{i}', days=1 + i % 5) for i in range(30)]
+
+    def event_writes(self, queries):
+        """INSERT/UPDATE/DELETE statements against the events table"""
+        return [
+            query['sql'].split()[0] for query in queries
+            if CalendarEvent._meta.db_table in query['sql'] and not query['sql'].startswith('SELECT')
+        ]
+
+    def event_counts(self):
+        return dict(DailyUserStats.objects.filter(user=self.user, event_count__gt=0).values_list('date', 'event_count'))
+
+    def test_new_events_are_inserted_in_bulk(self):
+        with CaptureQueriesContext(db_connection) as queries:
+            result = self.sync()
+        self.assertEqual(result['created'], 30)
+        self.assertEqual(self.event_writes(queries), ['INSERT'])
+
+    def test_unchanged_events_are_not_written(self):
+        self.sync()
+        CalendarConnection.objects.filter(pk=self.connection.pk).update(sync_token=None)
+        with CaptureQueriesContext(db_connection) as queries:
+            result = self.sync()
+        self.assertEqual((result['synced'], result['created'], result['updated'], result['deleted']), (30, 0, 0, 0))
+        self.assertEqual(self.event_writes(queries), [])
+
+    def test_changes_are_written_in_bulk(self):
+        self.sync()
+        events = self.api.events_by_calendar['primary']
+        events[0] = self.google_event('e0', title='renamed')
+        events[1] = self.google_event('e1', days=10)
+        del events[2:4]
+        CalendarConnection.objects.filter(pk=self.connection.pk).update(sync_token=None)
+
+        with CaptureQueriesContext(db_connection) as queries:
+            result = self.sync()
+        self.assertEqual((result['created'], result['updated'], result['deleted']), (0, 2, 2))
+        self.assertEqual(sorted(self.event_writes(queries)), ['DELETE', 'UPDATE'])
+        self.assertEqual(self.stored()['e0'], 'renamed')
+        self.assertEqual(len(self.stored()), 28)
+
+    def test_event_counts_match_a_rebuild(self):
+        self.sync()
+        self.api.changes_by_calendar['primary'] = [
+            self.google_event('e1', days=10),
+            {'id': 'e2', 'status': 'cancelled'},
+            self.google_event('new', days=3),
+        ]
+        self.sync()
+        incremental = self.event_counts()
+        self.assertEqual(sum(incremental.values()), 30)
+        rebuild_daily_stats(user=self.user)
+        self.assertEqual(self.event_counts(), incremental)
+
+
+@override_settings(CALENDAR_SYNC_PAGE_SIZE=10)
+class PaginatedSyncTests(FakeCalendarMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.api.events_by_calendar['primary'] = [self.google_event(f'e{i}') for i in range(25)]
+
+    def test_every_page_is_synced(self):
+        result = self.sync()
+        self.assertEqual([request.get('pageToken') for request in self.api.requests], [None, '10', '20'])
+        self.assertEqual((result['synced'], result['created']), (25, 25))
+        self.assertEqual(len(self.stored()), 25)
+        self.connection.refresh_from_db()
+        self.assertEqual(self.connection.sync_token, 'primary-3')
+
+    def test_changes_are_paged_too(self):
+        self.sync()
+        self.api.changes_by_calendar['primary'] = [self.google_event(f'new{i}') for i in range(12)]
+        self.assertEqual(self.sync()['created'], 12)
+        self.assertEqual(self.api.requests[-1], {**self.api.requests[-2], 'pageToken': '10'})
+        self.assertEqual(len(self.stored()), 37)
+
+    def test_timeout_keeps_applied_pages_but_not_the_token(self):
+        # The deadline passes after the first page
+        clock = mock.Mock(monotonic=mock.Mock(side_effect=[0, 200]))
+        with mock.patch.object(services, 'time', clock), self.assertRaises(services.SyncTimedOut):
+            services.sync_google_calendar(self.connection, deadline=100)
+        self.assertEqual(len(self.stored()), 10)
+        self.connection.refresh_from_db()
+        self.assertIsNone(self.connection.sync_token)
+
+
+@override_settings(CALENDAR_SYNC_WORKERS=4, CALENDAR_SYNC_PROVIDER_CONCURRENCY=2)
+class ParallelSyncTests(FakeCalendarMixin, TransactionTestCase):
+    # The syncs run on worker threads with their own database connections,
+    # which can't see a test transaction's rows
+
+    def setUp(self):
+        super().setUp()
+        # Pick up the overridden concurrency
+        services.provider_slots.clear()
+        self.addCleanup(services.provider_slots.clear)
+        self.connections = [self.connection] + [self.connect(f'cal{i}') for i in range(4)]
+        for connection in self.connections:
+            self.api.events_by_calendar[connection.calendar_id] = [
+                self.google_event(f'{connection.calendar_id}-{i}') for i in range(3)
+            ]
+        self.api.failing_calendars.add('cal2')
+
+    def test_results_in_connection_order(self):
+        finished = []
+        results = services.sync_connections(self.connections, on_result=finished.append)
+        self.assertEqual([result['connection_id'] for result in results], [c.id for c in self.connections])
+        self.assertCountEqual(finished, results)
+
+        failed = results[3]
+        self.assertEqual(failed, {'connection_id': failed['connection_id'], 'connection_name': 'cal2', 'error': 'cal2 is unavailable'})
+        for result in results[:3] + results[4:]:
+            self.assertEqual(result['created'], 3)
+        self.assertEqual(CalendarEvent.objects.filter(user=self.user).count(), 12)
+
+    def test_provider_concurrency_is_limited(self):
+        self.api.delay = 0.1
+        results = services.sync_all_active_calendars(user=self.user)
+        self.assertEqual(self.api.peak_in_flight, 2)
+        self.assertEqual([result.get('error') for result in results].count(None), 4)
+
+
+class JobQueueTests(FakeCalendarMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = get_user_model().objects.create_user(username='other', email='other@example.com', password=None)
+        self.other_connection = self.connect('other', user=self.other)
+
+    def statuses(self):
+        return dict(SyncJob.objects.values_list('id', 'status'))
+
+    def claim_racing(self, limit):
+        """claim_jobs, with a rival worker claiming jobs after this one has read the pending jobs"""
+        rival_claimed = None
+
+        def now():
+            nonlocal rival_claimed
+            if rival_claimed is None:
+                rival_claimed = []
+                rival_claimed.extend(jobs.claim_jobs(limit))
+            return timezone.now()
+
+        with mock.patch.object(jobs, 'timezone', mock.Mock(now=now)):
+            claimed = jobs.claim_jobs(limit)
+        return claimed, rival_claimed
+
+    def test_enqueue_coalesces_pending_jobs(self):
+        job = jobs.enqueue_sync(self.user, self.connection)
+        self.assertEqual(jobs.enqueue_sync(self.user, self.connection).pk, job.pk)
+        self.assertNotEqual(jobs.enqueue_sync(self.user).pk, job.pk)
+
+        jobs.claim_jobs(1)
+        self.assertNotEqual(jobs.enqueue_sync(self.user, self.connection).pk, job.pk)
+
+    def test_jobs_are_claimed_once(self):
+        first = jobs.enqueue_sync(self.user, self.connection)
+        second = jobs.enqueue_sync(self.other, self.other_connection)
+        self.assertEqual([job.pk for job in jobs.claim_jobs(1)], [first.pk])
+        self.assertEqual([job.pk for job in jobs.claim_jobs(5)], [second.pk])
+        self.assertEqual(jobs.claim_jobs(5), [])
+        self.assertEqual(set(self.statuses().values()), {SyncJob.STATUS_RUNNING})
+
+    def test_one_running_job_per_user(self):
+        first = jobs.enqueue_sync(self.user, self.connection)
+        second = jobs.enqueue_sync(self.user)
+        self.assertEqual([job.pk for job in jobs.claim_jobs(5)], [first.pk])
+        self.assertEqual(jobs.claim_jobs(5), [])
+
+        SyncJob.objects.filter(pk=first.pk).update(status=SyncJob.STATUS_SUCCEEDED)
+        self.assertEqual([job.pk for job in jobs.claim_jobs(5)], [second.pk])
+
+    def test_racing_workers_claim_each_job_once(self):
+        jobs.enqueue_sync(self.user, self.connection)
+        jobs.enqueue_sync(self.other, self.other_connection)
+        claimed, rival_claimed = self.claim_racing(5)
+        self.assertEqual(claimed, [])
+        self.assertEqual(len(rival_claimed), 2)
+
+    def test_racing_workers_keep_one_running_job_per_user(self):
+        # Both workers read both jobs as claimable; the rival claims the first
+        first = jobs.enqueue_sync(self.user, self.connection)
+        second = jobs.enqueue_sync(self.user)
+        claimed, rival_claimed = self.claim_racing(5)
+        self.assertEqual(claimed, [])
+        self.assertEqual([job.pk for job in rival_claimed], [first.pk])
+        self.assertEqual(self.statuses()[second.pk], SyncJob.STATUS_PENDING)
+
+    def test_schedule_due_syncs_does_not_duplicate(self):
+        self.assertEqual(jobs.schedule_due_syncs(), 2)
+        self.assertEqual(jobs.schedule_due_syncs(), 0)
+        jobs.claim_jobs(5)
+        self.assertEqual(jobs.schedule_due_syncs(), 0)
+
+        # Finished (or failed) within the interval
+        SyncJob.objects.update(status=SyncJob.STATUS_FAILED)
+        self.assertEqual(jobs.schedule_due_syncs(), 0)
+
+    def test_schedule_due_syncs_skips_fresh_and_already_queued_connections(self):
+        CalendarConnection.objects.filter(pk=self.connection.pk).update(last_synced_at=self.now)
+        jobs.enqueue_sync(self.other)
+        self.assertEqual(jobs.schedule_due_syncs(), 0)
+
+        # Due again once the interval has passed
+        CalendarConnection.objects.filter(pk=self.connection.pk).update(last_synced_at=self.now - timedelta(hours=1))
+        self.assertEqual(jobs.schedule_due_syncs(), 1)
+        self.assertTrue(SyncJob.objects.filter(connection=self.connection, trigger='scheduled').exists())
+
+    def test_stale_claims_are_picked_up_again(self):
+        stale = jobs.enqueue_sync(self.user, self.connection)
+        waiting = jobs.enqueue_sync(self.user)
+        jobs.claim_jobs(5)
+        SyncJob.objects.filter(pk=stale.pk).update(
+            started_at=self.now - jobs.STALE_JOB_AGE - timedelta(minutes=1),
+            created_at=self.now - jobs.STALE_JOB_AGE - timedelta(minutes=1),
+        )
+        # The user's other job waits behind the stale one
+        self.assertEqual(jobs.claim_jobs(5), [])
+
+        self.assertEqual(jobs.fail_stale_jobs(), 1)
+        self.assertEqual(self.statuses()[stale.pk], SyncJob.STATUS_FAILED)
+        self.assertEqual([job.pk for job in jobs.claim_jobs(5)], [waiting.pk])
+
+        # And the calendar is due for a scheduled sync again
+        SyncJob.objects.filter(pk=waiting.pk).update(status=SyncJob.STATUS_SUCCEEDED)
+        self.assertEqual(jobs.schedule_due_syncs(), 2)
+
+    def test_runner_claims_jobs_for_idle_threads_only(self):
+        release = threading.Event()
+        started = []
+
+        def run(job):
+            started.append(job.pk)
+            release.wait(5)
+
+        CalendarConnection.objects.update(sync_enabled=False)  # No scheduled jobs
+        third = get_user_model().objects.create_user(username='third', email='third@example.com', password=None)
+        for user in (self.user, self.other, third):
+            jobs.enqueue_sync(user)
+
+        runner = jobs.JobRunner(workers=2)
+        self.addCleanup(runner.shutdown)
+        self.addCleanup(release.set)
+        with mock.patch.object(jobs, 'run_sync_job_in_thread', run):
+            self.assertEqual(runner.poll(), 2)
+            self.assertEqual(runner.poll(), 0)
+
+            release.set()
+            runner.wait(5)
+            self.assertEqual(runner.poll(), 1)
+        runner.shutdown()
+        self.assertEqual(len(set(started)), 3)
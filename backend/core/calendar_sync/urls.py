@@ -13,6 +13,7 @@ urlpatterns = [
     # Sync operations
     path('sync/', views.CalendarSyncView.as_view(), name='calendar-sync'),
     path('sync/status/', views.CalendarSyncStatusView.as_view(), name='calendar-sync-status'),
+    path('sync/jobs/<int:pk>/', views.SyncJobDetailView.as_view(), name='calendar-sync-job-detail'),
     
     # Events
     path('events/', views.CalendarEventListView.as_view(), name='calendar-event-list'),
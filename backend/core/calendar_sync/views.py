@@ -8,20 +8,20 @@ from django.shortcuts import redirect
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
-from .models import CalendarConnection, CalendarEvent
+from .jobs import enqueue_sync
+from .models import CalendarConnection, CalendarEvent, SyncJob
 from .serializers import (
     CalendarConnectionSerializer,
     CalendarEventSerializer,
-    CalendarSyncStatusSerializer
+    CalendarSyncStatusSerializer,
+    SyncJobSerializer
 )
 from .services import (
     get_google_oauth_flow,
     encrypt_token,
     decrypt_token,
     fetch_google_calendars,
-    get_google_credentials,
-    sync_google_calendar,
-    sync_all_active_calendars
+    get_google_credentials
 )
 import logging
 
@@ -95,21 +95,19 @@ class GoogleCalendarCallbackView(APIView):
             credentials = flow.credentials
             
             # Fetch user's calendars
-            from googleapiclient.discovery import build
-            service = build('calendar', 'v3', credentials=credentials)
-            calendar_list = service.calendarList().list().execute()
+            calendars = fetch_google_calendars(credentials)
             
             connections_created = []
             
             # Create connection for primary calendar (or first calendar)
             primary_calendar = None
-            for calendar in calendar_list.get('items', []):
+            for calendar in calendars:
                 if calendar.get('primary'):
                     primary_calendar = calendar
                     break
             
-            if not primary_calendar and calendar_list.get('items'):
-                primary_calendar = calendar_list['items'][0]
+            if not primary_calendar and calendars:
+                primary_calendar = calendars[0]
             
             if primary_calendar:
                 # Extract email from calendar_id (for Google, primary calendar ID is usually the email)
@@ -145,11 +143,8 @@ class GoogleCalendarCallbackView(APIView):
                 
                 connections_created.append(connection.calendar_name)
                 
-                # Trigger initial sync
-                try:
-                    sync_google_calendar(connection)
-                except Exception as e:
-                    logger.error(f"Error during initial sync: {e}")
+                # Queue the initial sync for the worker rather than making the redirect wait on it
+                enqueue_sync(user, connection, trigger='connect')
             
             # Clear session
             request.session.pop('oauth_state', None)
@@ -206,7 +201,7 @@ class CalendarConnectionDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 class CalendarSyncView(APIView):
     """
-    Trigger manual calendar sync
+    Queue a manual calendar sync; poll the returned job for its progress
     POST /api/calendar/sync/
     Body: {"connection_id": <id>} or {} for all connections
     """
@@ -214,6 +209,7 @@ class CalendarSyncView(APIView):
 
     def post(self, request):
         connection_id = request.data.get('connection_id')
+        connection = None
         
         if connection_id:
             # Sync specific connection
@@ -222,38 +218,36 @@ class CalendarSyncView(APIView):
                     id=connection_id,
                     user=request.user
                 )
-                
-                if connection.provider == 'google':
-                    result = sync_google_calendar(connection)
-                    return Response({
-                        'success': True,
-                        'connection_id': connection.id,
-                        'connection_name': connection.calendar_name,
-                        **result
-                    })
-                else:
-                    return Response(
-                        {'error': f'Provider {connection.provider} not yet supported'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
             except CalendarConnection.DoesNotExist:
                 return Response(
                     {'error': 'Calendar connection not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
-            except Exception as e:
-                logger.error(f"Error syncing calendar: {e}")
+            
+            if connection.provider != 'google':
                 return Response(
-                    {'error': f'Sync failed: {str(e)}'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                    {'error': f'Provider {connection.provider} not yet supported'},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
-        else:
-            # Sync all user's calendars
-            results = sync_all_active_calendars(user=request.user)
-            return Response({
-                'success': True,
-                'results': results
-            })
+        
+        job = enqueue_sync(request.user, connection)
+        return Response({
+            'success': True,
+            'job_id': job.id,
+            'job': SyncJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class SyncJobDetailView(generics.RetrieveAPIView):
+    """
+    Progress and results of a sync job
+    GET /api/calendar/sync/jobs/<id>/
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    serializer_class = SyncJobSerializer
+
+    def get_queryset(self):
+        return SyncJob.objects.filter(user=self.request.user).select_related('connection')
 
 
 class CalendarEventListView(generics.ListAPIView):
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ChatMessage
+from .models import ChatMessage, ChatSummary, LLMCallLog, LLMUsageDaily
 
 @admin.register(ChatMessage)
 class ChatMessageAdmin(admin.ModelAdmin):
@@ -7,4 +7,26 @@ class ChatMessageAdmin(admin.ModelAdmin):
     list_filter = ['role', 'created_at', 'user']
     search_fields = ['content', 'user__username']
     readonly_fields = ['created_at']
-    ordering = ['-created_at']
\ No newline at end of file
+    ordering = ['-created_at']
+
+@admin.register(ChatSummary)
+class ChatSummaryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'last_message_id', 'updated_at']
+    search_fields = ['content', 'user__username']
+    readonly_fields = ['updated_at']
+
+@admin.register(LLMCallLog)
+class LLMCallLogAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'kind', 'model_name', 'user', 'latency_ms', 'time_to_first_token_ms',
+                    'prompt_tokens', 'completion_tokens', 'cache_hit', 'error']
+    list_filter = ['kind', 'model_name', 'cache_hit', 'error', 'created_at']
+    search_fields = ['user__username']
+    readonly_fields = ['created_at']
+    ordering = ['-created_at']
+
+@admin.register(LLMUsageDaily)
+class LLMUsageDailyAdmin(admin.ModelAdmin):
+    list_display = ['date', 'model_name', 'kind', 'calls', 'cache_hits', 'errors',
+                    'prompt_tokens', 'completion_tokens', 'cached_tokens']
+    list_filter = ['model_name', 'kind', 'date']
+    ordering = ['-date']
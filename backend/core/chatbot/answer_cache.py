@@ -0,0 +1,138 @@
+"""
+In-process cache of chatbot answers to standalone app-guidance questions
+
+Only questions asked without conversation history are cached, so an answer
+depends on nothing but the question and the system prompt and can be reused
+for any user. The chat services also only cache questions made up of the app
+guide's own words (see services.cacheable), so a question carrying personal
+details ("I'm Sam, how do I...") is never stored or handed to someone else. Questions are matched on a normalized form first, then by TF-IDF
+cosine similarity over the cached questions, so small rewordings
+("How do I connect my calendar?" / "how to connect google calendar") still hit.
+"""
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+MAX_ENTRIES = 500
+TTL_SECONDS = 24 * 60 * 60
+SIMILARITY_THRESHOLD = 0.85
+
+STOP_WORDS = frozenset('''
+    a an and are as at be can could did do does for from have how i i'm in is it me my of on or
+    please should so that the there this to was what when where which why will with would you your
+'''.split())
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def normalize(question):
+    """Lowercase, strip punctuation and stop words; returns the remaining words"""
+    return [word for word in WORD_PATTERN.findall(question.lower()) if word not in STOP_WORDS]
+
+
+def features(words):
+    """Term counts over words and word bigrams"""
+    terms = Counter(words)
+    terms.update(f'{a} {b}' for a, b in zip(words, words[1:]))
+    return terms
+
+
+class AnswerCache:
+    """
+    LRU cache with a TTL, keyed on normalized questions
+
+    Entries are tied to a prompt version; changing the version (a new system
+    prompt or model) drops every cached answer. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, threshold=SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.version = None
+        self._entries = OrderedDict()  # key -> (terms, answer, stored_at)
+        self._document_frequency = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, question, version):
+        """Return a cached answer for the question, or None"""
+        words = normalize(question)
+        if not words:
+            return None
+        key = ' '.join(words)
+
+        with self._lock:
+            self._check_version(version)
+            self._expire()
+            if key not in self._entries:
+                key = self._most_similar(features(words))
+                if key is None:
+                    return None
+            self._entries.move_to_end(key)
+            return self._entries[key][1]
+
+    def set(self, question, answer, version):
+        words = normalize(question)
+        if not words or not answer:
+            return
+        key = ' '.join(words)
+
+        with self._lock:
+            self._check_version(version)
+            if key in self._entries:
+                self._remove(key)
+            terms = features(words)
+            self._entries[key] = (terms, answer, time.monotonic())
+            self._document_frequency.update(terms.keys())
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._document_frequency.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._entries.clear()
+            self._document_frequency.clear()
+            self.version = version
+
+    def _expire(self):
+        # Entries are in least-recently-used order, not insertion order, so scan them all
+        cutoff = time.monotonic() - self.ttl
+        for key in [key for key, (_, _, stored_at) in self._entries.items() if stored_at < cutoff]:
+            self._remove(key)
+
+    def _remove(self, key):
+        terms, _, _ = self._entries.pop(key)
+        self._document_frequency.subtract(terms.keys())
+        self._document_frequency += Counter()  # Drop zero counts
+
+    def _vector(self, terms):
+        total = len(self._entries) + 1
+        vector = {
+            term: count * (math.log(total / (1 + self._document_frequency[term])) + 1)
+            for term, count in terms.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return vector, norm
+
+    def _most_similar(self, terms):
+        """Key of the cached question most similar to terms, if above the threshold"""
+        query, query_norm = self._vector(terms)
+        best_key, best_score = None, self.threshold
+        for key, (entry_terms, _, _) in self._entries.items():
+            entry, entry_norm = self._vector(entry_terms)
+            if not entry_norm:
+                continue
+            dot = sum(weight * entry.get(term, 0) for term, weight in query.items())
+            score = dot / (query_norm * entry_norm)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
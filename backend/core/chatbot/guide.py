@@ -0,0 +1,112 @@
+"""
+Retrieval over the app guide in the chatbot's system instruction
+
+The guide describes every page of the app ("### 1. DASHBOARD (/dashboard)",
+...). Sending all of it with every question costs tokens and latency even when
+the user only asks about one page. Instead, the page sections are split out of
+the instruction and indexed with BM25 once, at import. The model keeps the
+rest of the instruction (persona, style, general guidance) as its system
+instruction, and each message is sent with only the few sections that match it.
+"""
+import math
+import re
+from collections import Counter
+from .answer_cache import normalize
+
+FEATURES_HEADING = '## MAIN FEATURES AND PAGES'
+SECTION_HEADING = re.compile(r'^### (?:\d+\.\s*)?', re.MULTILINE)
+
+# Title words count this many times, so a page's name outweighs passing mentions
+TITLE_WEIGHT = 3
+
+# Sections scoring below this fraction of the best match are left out
+MIN_RELATIVE_SCORE = 0.5
+
+SUFFIXES = ('ing', 'ers', 'er', 'ed', 'es', 's')
+
+
+def stem(word, suffixes=SUFFIXES):
+    """Crude suffix stripping so "tracking", "tracker" and "tracks" all match "track" """
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def terms(text):
+    return [stem(word) for word in normalize(text)]
+
+
+class GuideSection:
+    def __init__(self, title, body):
+        self.title = title.strip()
+        self.body = body.strip()
+
+    @property
+    def text(self):
+        return f'### {self.title}\n{self.body}'
+
+
+def split_guide(instruction):
+    """
+    Split the system instruction into its core and its page sections
+
+    Returns:
+        (core, sections) - core is the instruction without the
+        "MAIN FEATURES AND PAGES" part, sections a list of GuideSection
+    """
+    start = instruction.index(FEATURES_HEADING)
+    end = instruction.index('\n## ', start)
+    sections = []
+    for part in SECTION_HEADING.split(instruction[start:end])[1:]:
+        title, _, body = part.partition('\n')
+        sections.append(GuideSection(title, body))
+    core = instruction[:start] + instruction[end + 1:]
+    return core, sections
+
+
+class GuideIndex:
+    """Okapi BM25 index over guide sections"""
+
+    def __init__(self, sections, k1=1.5, b=0.75):
+        self.sections = sections
+        self.k1 = k1
+        self.b = b
+        self.documents = [
+            Counter(terms(section.title) * TITLE_WEIGHT + terms(section.body)) for section in sections
+        ]
+        self.lengths = [sum(document.values()) for document in self.documents]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+        document_frequency = Counter(term for document in self.documents for term in document)
+        count = len(self.documents)
+        self.idf = {
+            term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def score(self, query_terms, index):
+        document = self.documents[index]
+        length_norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / self.average_length)
+        score = 0.0
+        for term in query_terms:
+            frequency = document.get(term, 0)
+            if frequency:
+                score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + length_norm)
+        return score
+
+    def search(self, query, k):
+        """
+        Return up to k sections relevant to query, best first
+
+        Sections that share no terms with the query, or score far below the
+        best match, are left out, so small talk gets no sections at all.
+        """
+        query_terms = set(terms(query))
+        if not query_terms or not self.sections:
+            return []
+        scored = sorted(
+            ((self.score(query_terms, index), index) for index in range(len(self.sections))),
+            reverse=True,
+        )
+        cutoff = scored[0][0] * MIN_RELATIVE_SCORE
+        return [self.sections[index] for score, index in scored[:k] if score > 0 and score >= cutoff]
@@ -0,0 +1,167 @@
+"""
+Concurrency limits for chat requests that call the LLM
+
+Two counters are kept in Django's cache: in-flight requests per user and
+in-flight requests overall. A user already at their limit gets an immediate
+429, so one user firing parallel requests can't tie up the worker pool or race
+on their own history. When the global cap is reached, requests wait in a
+bounded queue for a free slot and get a 429 if the queue is full or the wait
+times out.
+
+A limit of N is kept as N slot entries ("<key>:0" ... "<key>:N-1"), taken
+with cache.add, which is atomic. Each slot expires on its own after
+CHATBOT_SLOT_TIMEOUT seconds, so a slot that is never released (a worker
+killed mid-request, a stream that is never read) frees itself without holding
+up anyone else's.
+
+Slots are only shared between processes when the cache backend is (e.g. Redis
+via REDIS_URL); with the default local-memory cache the limits apply per
+process.
+"""
+import asyncio
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+
+USER_KEY = 'chatbot:inflight:user:{}'
+GLOBAL_KEY = 'chatbot:inflight:global'
+QUEUE_KEY = 'chatbot:queued:global'
+
+QUEUE_POLL_INTERVAL = 0.1  # seconds
+
+
+class ChatLimitExceeded(Throttled):
+    default_detail = 'Too many chat requests in progress.'
+
+    def __init__(self):
+        super().__init__(wait=settings.CHATBOT_RETRY_AFTER)
+
+
+def slot_keys(key, limit):
+    return [f'{key}:{index}' for index in range(limit)]
+
+
+def try_acquire(key, limit):
+    """
+    Take one of limit slots at key
+
+    Returns:
+        The lease (slot key, token) to release, or None if every slot is taken
+    """
+    keys = slot_keys(key, limit)
+    taken = cache.get_many(keys)
+    token = uuid.uuid4().hex
+    for slot_key in keys:
+        if slot_key not in taken and cache.add(slot_key, token, settings.CHATBOT_SLOT_TIMEOUT):
+            return slot_key, token
+    return None
+
+
+def release(lease):
+    slot_key, token = lease
+    # Once expired, the slot may have been taken by another request
+    if cache.get(slot_key) == token:
+        cache.delete(slot_key)
+
+
+async def atry_acquire(key, limit):
+    keys = slot_keys(key, limit)
+    taken = await cache.aget_many(keys)
+    token = uuid.uuid4().hex
+    for slot_key in keys:
+        if slot_key not in taken and await cache.aadd(slot_key, token, settings.CHATBOT_SLOT_TIMEOUT):
+            return slot_key, token
+    return None
+
+
+async def arelease(lease):
+    slot_key, token = lease
+    if await cache.aget(slot_key) == token:
+        await cache.adelete(slot_key)
+
+
+class ChatSlot:
+    """A held per-user and global slot; release it when the LLM call is done"""
+
+    def __init__(self, user_lease, global_lease):
+        self.user_lease = user_lease
+        self.global_lease = global_lease
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            release(self.global_lease)
+            release(self.user_lease)
+
+    async def arelease(self):
+        if not self.released:
+            self.released = True
+            await arelease(self.global_lease)
+            await arelease(self.user_lease)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def acquire_chat_slot(user):
+    """
+    Reserve capacity for one chat request
+
+    Raises:
+        ChatLimitExceeded: The user is at their limit, or the global queue is
+            full or timed out
+    """
+    user_lease = try_acquire(USER_KEY.format(user.pk), settings.CHATBOT_MAX_CONCURRENT_PER_USER)
+    if user_lease is None:
+        raise ChatLimitExceeded()
+
+    global_lease = try_acquire(GLOBAL_KEY, settings.CHATBOT_MAX_CONCURRENT_LLM_CALLS)
+    if global_lease is not None:
+        return ChatSlot(user_lease, global_lease)
+
+    queue_lease = try_acquire(QUEUE_KEY, settings.CHATBOT_QUEUE_SIZE)
+    if queue_lease is not None:
+        try:
+            deadline = time.monotonic() + settings.CHATBOT_QUEUE_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(QUEUE_POLL_INTERVAL)
+                global_lease = try_acquire(GLOBAL_KEY, settings.CHATBOT_MAX_CONCURRENT_LLM_CALLS)
+                if global_lease is not None:
+                    return ChatSlot(user_lease, global_lease)
+        finally:
+            release(queue_lease)
+
+    release(user_lease)
+    raise ChatLimitExceeded()
+
+
+async def aacquire_chat_slot(user):
+    """Async variant of acquire_chat_slot; waits without blocking the event loop"""
+    user_lease = await atry_acquire(USER_KEY.format(user.pk), settings.CHATBOT_MAX_CONCURRENT_PER_USER)
+    if user_lease is None:
+        raise ChatLimitExceeded()
+
+    global_lease = await atry_acquire(GLOBAL_KEY, settings.CHATBOT_MAX_CONCURRENT_LLM_CALLS)
+    if global_lease is not None:
+        return ChatSlot(user_lease, global_lease)
+
+    queue_lease = await atry_acquire(QUEUE_KEY, settings.CHATBOT_QUEUE_SIZE)
+    if queue_lease is not None:
+        try:
+            deadline = time.monotonic() + settings.CHATBOT_QUEUE_TIMEOUT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(QUEUE_POLL_INTERVAL)
+                global_lease = await atry_acquire(GLOBAL_KEY, settings.CHATBOT_MAX_CONCURRENT_LLM_CALLS)
+                if global_lease is not None:
+                    return ChatSlot(user_lease, global_lease)
+        finally:
+            await arelease(queue_lease)
+
+    await arelease(user_lease)
+    raise ChatLimitExceeded()
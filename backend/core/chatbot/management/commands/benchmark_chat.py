@@ -0,0 +1,136 @@
+"""
+Load-test the chat endpoints against the local fake LLM provider, so no network
+access or API spend is needed.
+
+Each simulated user sends its messages one after another, waiting for every
+reply, while all users run concurrently. The sync endpoint (ChatView) is driven
+through the WSGI handler from one thread per user, the async endpoint
+(AsyncChatView) through the ASGI handler from a single event loop, as one ASGI
+worker process would serve it. Reports p50/p95/p99 latency and requests per
+second for each. Requests turned away by the chat concurrency limits (429) are
+counted separately. With --error-rate, that fraction of fake LLM calls fails,
+to see how retries and the circuit breaker hold up under an upstream brownout.
+"""
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from chatbot import services
+from chatbot.providers import FakeProvider
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the chat endpoints with concurrent simulated users against a fake LLM'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Concurrent simulated users')
+        parser.add_argument('--messages', type=int, default=5, help='Messages each user sends')
+        parser.add_argument('--latency', type=float, default=0.5, help='Fake LLM latency before the first token (seconds)')
+        parser.add_argument('--tokens-per-second', type=float, default=50, help='Fake LLM generation speed')
+        parser.add_argument('--reply-tokens', type=int, default=60, help='Fake LLM reply length in tokens')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of fake LLM calls that fail')
+        parser.add_argument(
+            '--endpoint', choices=['sync', 'async', 'both'], default='both',
+            help='/api/chatbot/chat/ (sync), /api/chatbot/chat/async/ (async) or both'
+        )
+        parser.add_argument(
+            '--answer-cache', action='store_true',
+            help='Leave the answer cache on (off by default so every request reaches the provider)'
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = [
+            User.objects.create_user(
+                username=f'chat-benchmark-{i}', email=f'chat-benchmark-{i}@example.com', password=None
+            )
+            for i in range(options['users'])
+        ]
+        provider = FakeProvider(
+            latency=options['latency'],
+            tokens_per_second=options['tokens_per_second'],
+            reply_tokens=options['reply_tokens'],
+            error_rate=options['error_rate'],
+        )
+        self.stdout.write(
+            f"{options['users']} users x {options['messages']} messages, fake LLM: "
+            f"{options['latency']:.2f}s latency, {options['tokens_per_second']:g} tokens/s, "
+            f"{options['reply_tokens']} tokens per reply, {options['error_rate']:.0%} errors"
+        )
+
+        try:
+            with mock.patch.object(services, 'get_provider', return_value=provider), \
+                    override_settings(ALLOWED_HOSTS=['testserver'], CHATBOT_ANSWER_CACHE=options['answer_cache']):
+                if options['endpoint'] in ('sync', 'both'):
+                    self.report('Sync  /api/chatbot/chat/', *self.run_sync(users, options['messages']))
+                if options['endpoint'] in ('async', 'both'):
+                    self.report(
+                        'Async /api/chatbot/chat/async/',
+                        *asyncio.run(self.run_async(users, options['messages']))
+                    )
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def auth_headers(self, user):
+        return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def run_sync(self, users, messages):
+        def simulate(user):
+            client, headers, latencies = Client(), self.auth_headers(user), []
+            for i in range(messages):
+                start = time.perf_counter()
+                response = client.post(
+                    '/api/chatbot/chat/', {'message': f'Question {i} from {user.username}'},
+                    content_type='application/json', headers=headers
+                )
+                latencies.append((time.perf_counter() - start, response.status_code))
+                assert response.status_code in (200, 429), response.content
+            return latencies
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(users)) as pool:
+            results = list(pool.map(simulate, users))
+        return [latency for latencies in results for latency in latencies], time.perf_counter() - start
+
+    async def run_async(self, users, messages):
+        async def simulate(user):
+            client, headers, latencies = AsyncClient(), self.auth_headers(user), []
+            for i in range(messages):
+                start = time.perf_counter()
+                response = await client.post(
+                    '/api/chatbot/chat/async/', {'message': f'Question {i} from {user.username}'},
+                    content_type='application/json', headers=headers
+                )
+                latencies.append((time.perf_counter() - start, response.status_code))
+                assert response.status_code in (200, 429), response.content
+            return latencies
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(simulate(user) for user in users))
+        return [latency for latencies in results for latency in latencies], time.perf_counter() - start
+
+    def report(self, label, results, elapsed):
+        latencies = sorted(latency for latency, status_code in results if status_code == 200)
+        rejected = len(results) - len(latencies)
+        if not latencies:
+            self.stdout.write(f"{label}: all {rejected} requests were rejected (429)")
+            return
+        self.stdout.write(
+            f"{label}: {len(latencies)} requests in {elapsed:.2f}s ({rejected} rejected with 429), "
+            f"{len(latencies) / elapsed:.1f} req/s, "
+            f"latency mean {statistics.mean(latencies) * 1000:.0f}ms "
+            f"p50 {percentile(latencies, 50) * 1000:.0f}ms "
+            f"p95 {percentile(latencies, 95) * 1000:.0f}ms "
+            f"p99 {percentile(latencies, 99) * 1000:.0f}ms"
+        )
@@ -13,7 +13,73 @@ class ChatMessage(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['created_at']
+        # No default ordering: queries sort explicitly, so unsorted ones (counts, deletes) stay cheap
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id']),
+        ]
 
     def __str__(self):
-        return f"{self.user.username}: {self.role} - {self.content[:50]}"
\ No newline at end of file
+        return f"{self.user.username}: {self.role} - {self.content[:50]}"
+
+class ChatSummary(models.Model):
+    """Rolling summary of a user's older chat messages, used as long-range context"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chat_summary')
+    content = models.TextField()
+    # Messages with an id up to this one are covered by the summary
+    last_message_id = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username}: summary up to message {self.last_message_id}"
+
+
+class LLMCallLog(models.Model):
+    """One chat model call (or answer cache hit) with its token usage and timings"""
+    KIND_CHOICES = [
+        ('chat', 'Chat'),
+        ('stream', 'Streamed chat'),
+        ('summary', 'Conversation summary'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    model_name = models.CharField(max_length=100)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    cached_tokens = models.PositiveIntegerField(default=0)
+    time_to_first_token_ms = models.PositiveIntegerField(null=True, blank=True)  # Streamed calls only
+    latency_ms = models.PositiveIntegerField()
+    cache_hit = models.BooleanField(default=False)  # Answered from the answer cache
+    error = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['model_name', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.model_name} {self.latency_ms}ms"
+
+
+class LLMUsageDaily(models.Model):
+    """Per-day counters of chat model calls, kept even when individual calls aren't logged"""
+    date = models.DateField()
+    model_name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=LLMCallLog.KIND_CHOICES)
+    calls = models.PositiveIntegerField(default=0)
+    cache_hits = models.PositiveIntegerField(default=0)
+    errors = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    cached_tokens = models.PositiveBigIntegerField(default=0)
+    latency_ms_total = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'model_name', 'kind')
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.date} {self.model_name} {self.kind}: {self.calls} calls"
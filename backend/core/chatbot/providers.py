@@ -0,0 +1,319 @@
+"""
+LLM providers for the chat assistant
+
+The chat services talk to a provider rather than to google.generativeai
+directly. CHATBOT_LLM_PROVIDER selects it: 'gemini' for real traffic, or
+'fake' for a local, deterministic stand-in with configurable latency and token
+rate, used to load-test and profile the chat path without network access or
+API spend.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from django.conf import settings as django_settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_token_encoding():
+    """Return a tiktoken encoding if tiktoken is installed, otherwise None"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding('cl100k_base')
+    except Exception:
+        return None
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in a text string
+
+    Uses tiktoken when available (as backend/test_chatbot.py does). It isn't
+    Gemini's tokenizer, but close enough for budgeting, and unlike
+    model.count_tokens it needs no API round trip. Without tiktoken, falls back
+    to roughly four characters per token.
+    """
+    encoding = get_token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+class LLMReply:
+    """Text of a completed reply plus the token usage the provider reported"""
+
+    def __init__(self, text, prompt_tokens=0, output_tokens=0, cached_tokens=0):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+        self.cached_tokens = cached_tokens
+
+
+class LLMProvider:
+    """
+    Interface implemented by chat model providers
+
+    History uses the Gemini chat format: a list of
+    {'role': 'user' | 'model', 'parts': [text]} dicts, oldest first.
+    `timeout` is the deadline in seconds for the whole call (for stream, until
+    the last chunk); None leaves it to the provider.
+    """
+    name = None
+    model_name = None
+    # Errors worth retrying: the request may succeed if sent again
+    transient_errors = (TimeoutError, ConnectionError)
+
+    def generate(self, history, message, timeout=None):
+        """Reply to message given the history; returns an LLMReply"""
+        raise NotImplementedError
+
+    async def agenerate(self, history, message, timeout=None):
+        """Async variant of generate"""
+        raise NotImplementedError
+
+    def stream(self, history, message, timeout=None):
+        """Generator yielding reply text chunks; returns the complete LLMReply"""
+        raise NotImplementedError
+
+    def complete(self, prompt, max_output_tokens=None, timeout=None):
+        """One-off generation without the system instruction or history"""
+        raise NotImplementedError
+
+    def count_tokens(self, text):
+        """Token count of text as this provider would bill it (estimated locally)"""
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    name = 'gemini'
+    transient_errors = LLMProvider.transient_errors + (
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+    )
+
+    def __init__(self, model_name, system_instruction):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self._model = None
+        self._model_expires_at = None
+        self._plain_model = None
+        self._lock = threading.Lock()
+
+    def create_model(self):
+        """
+        Create the Gemini model with the system instruction configured once
+
+        When GEMINI_CONTEXT_CACHE is enabled the system instruction is stored with
+        Gemini context caching so its tokens are billed at the cached rate. Falls back
+        to a plain model if the cache can't be created (e.g. the model or prompt
+        doesn't qualify for caching).
+
+        Returns:
+            (model, expires_at) - expires_at is None when no context cache is used
+        """
+        genai.configure(api_key=django_settings.GEMINI_API_KEY)
+
+        if getattr(django_settings, 'GEMINI_CONTEXT_CACHE', False):
+            ttl = timedelta(seconds=django_settings.GEMINI_CONTEXT_CACHE_TTL)
+            try:
+                cached_content = genai.caching.CachedContent.create(
+                    model=f'models/{self.model_name}',
+                    display_name='chatbot-system-instruction',
+                    system_instruction=self.system_instruction,
+                    ttl=ttl,
+                )
+                model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+                # Recreate slightly before Gemini drops the cache
+                return model, timezone.now() + ttl - timedelta(minutes=1)
+            except Exception as e:
+                logger.warning(f"Could not create Gemini context cache, using plain system instruction: {e}")
+
+        return genai.GenerativeModel(model_name=self.model_name, system_instruction=self.system_instruction), None
+
+    def get_model(self):
+        """Return the shared Gemini model, creating it on first use"""
+        with self._lock:
+            if self._model is None or (
+                self._model_expires_at is not None and timezone.now() >= self._model_expires_at
+            ):
+                self._model, self._model_expires_at = self.create_model()
+            return self._model
+
+    def get_plain_model(self):
+        """Return the shared model without a system instruction"""
+        self.get_model()  # Configures the API key
+        with self._lock:
+            if self._plain_model is None:
+                self._plain_model = genai.GenerativeModel(model_name=self.model_name)
+            return self._plain_model
+
+    @staticmethod
+    def to_reply(response, text):
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return LLMReply(text)
+        return LLMReply(
+            text,
+            prompt_tokens=usage.prompt_token_count,
+            output_tokens=usage.candidates_token_count,
+            cached_tokens=getattr(usage, 'cached_content_token_count', 0),
+        )
+
+    @staticmethod
+    def request_options(timeout):
+        # Retries are handled by chatbot.resilience, so turn off the client library's own
+        return {'timeout': timeout, 'retry': None}
+
+    def generate(self, history, message, timeout=None):
+        response = self.get_model().start_chat(history=history).send_message(
+            message, request_options=self.request_options(timeout)
+        )
+        return self.to_reply(response, response.text)
+
+    async def agenerate(self, history, message, timeout=None):
+        response = await self.get_model().start_chat(history=history).send_message_async(
+            message, request_options=self.request_options(timeout)
+        )
+        return self.to_reply(response, response.text)
+
+    def stream(self, history, message, timeout=None):
+        response = self.get_model().start_chat(history=history).send_message(
+            message, stream=True, request_options=self.request_options(timeout)
+        )
+        parts = []
+        for chunk in response:
+            text = chunk.text
+            if text:
+                parts.append(text)
+                yield text
+        # Usage metadata is complete once the stream has been consumed
+        return self.to_reply(response, ''.join(parts))
+
+    def complete(self, prompt, max_output_tokens=None, timeout=None):
+        generation_config = {'max_output_tokens': max_output_tokens} if max_output_tokens else None
+        response = self.get_plain_model().generate_content(
+            prompt, generation_config=generation_config, request_options=self.request_options(timeout)
+        )
+        return self.to_reply(response, response.text)
+
+    def count_tokens(self, text):
+        return estimate_tokens(text)
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic local provider for benchmarks
+
+    Waits `latency` seconds before the first token, then produces
+    `tokens_per_second` tokens (one word each) until `reply_tokens` are out.
+    The reply is built from the message, so the same input always gives the
+    same output. With `error_rate`, that fraction of calls fails with a
+    ConnectionError after the latency, to simulate an upstream brownout.
+    Calls that would run past their timeout raise TimeoutError at the deadline.
+    """
+    name = 'fake'
+    model_name = 'fake'
+    chunk_tokens = 5
+
+    def __init__(self, latency=0.5, tokens_per_second=50, reply_tokens=60, error_rate=0.0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+
+    def reply_words(self, message):
+        words = message.split() or ['...']
+        reply = ['Simulated', 'reply:']
+        while len(reply) < self.reply_tokens:
+            reply.extend(words)
+        return reply[:self.reply_tokens]
+
+    def generation_time(self, tokens):
+        return tokens / self.tokens_per_second if self.tokens_per_second else 0
+
+    def prompt_tokens(self, history, message):
+        return sum(self.count_tokens(part) for turn in history for part in turn['parts']) + self.count_tokens(message)
+
+    def make_reply(self, history, message, words):
+        return LLMReply(' '.join(words), self.prompt_tokens(history, message), len(words))
+
+    def wait(self, seconds, deadline):
+        """Sleep for seconds, raising TimeoutError instead if that passes the deadline"""
+        if deadline is not None and time.monotonic() + seconds > deadline:
+            time.sleep(max(0, deadline - time.monotonic()))
+            raise TimeoutError('Simulated LLM timeout')
+        time.sleep(seconds)
+
+    def deadline(self, timeout):
+        return time.monotonic() + timeout if timeout is not None else None
+
+    def maybe_fail(self):
+        if self.error_rate and random.random() < self.error_rate:
+            raise ConnectionError('Simulated LLM failure')
+
+    def generate(self, history, message, timeout=None):
+        words = self.reply_words(message)
+        deadline = self.deadline(timeout)
+        self.wait(self.latency, deadline)
+        self.maybe_fail()
+        self.wait(self.generation_time(len(words)), deadline)
+        return self.make_reply(history, message, words)
+
+    async def simulate(self, tokens):
+        await asyncio.sleep(self.latency)
+        self.maybe_fail()
+        await asyncio.sleep(self.generation_time(tokens))
+
+    async def agenerate(self, history, message, timeout=None):
+        words = self.reply_words(message)
+        try:
+            await asyncio.wait_for(self.simulate(len(words)), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError('Simulated LLM timeout')
+        return self.make_reply(history, message, words)
+
+    def stream(self, history, message, timeout=None):
+        words = self.reply_words(message)
+        deadline = self.deadline(timeout)
+        self.wait(self.latency, deadline)
+        self.maybe_fail()
+        for start in range(0, len(words), self.chunk_tokens):
+            chunk = words[start:start + self.chunk_tokens]
+            self.wait(self.generation_time(len(chunk)), deadline)
+            yield (' ' if start else '') + ' '.join(chunk)
+        return self.make_reply(history, message, words)
+
+    def complete(self, prompt, max_output_tokens=None, timeout=None):
+        words = self.reply_words(prompt)[:max_output_tokens or self.reply_tokens]
+        deadline = self.deadline(timeout)
+        self.wait(self.latency, deadline)
+        self.maybe_fail()
+        self.wait(self.generation_time(len(words)), deadline)
+        return self.make_reply([], prompt, words)
+
+    def count_tokens(self, text):
+        return len(text.split())
+
+
+def create_provider(name, model_name, system_instruction):
+    """Build the provider named by CHATBOT_LLM_PROVIDER"""
+    if name == GeminiProvider.name:
+        return GeminiProvider(model_name, system_instruction)
+    if name == FakeProvider.name:
+        return FakeProvider(
+            latency=django_settings.CHATBOT_FAKE_LATENCY,
+            tokens_per_second=django_settings.CHATBOT_FAKE_TOKENS_PER_SECOND,
+        )
+    raise ImproperlyConfigured(f"Unknown CHATBOT_LLM_PROVIDER '{name}'")
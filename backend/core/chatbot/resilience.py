@@ -0,0 +1,229 @@
+"""
+Deadlines, retries and a circuit breaker around chat model calls
+
+Each attempt gets a deadline of CHATBOT_LLM_TIMEOUT seconds, which the provider
+passes on to the API. Transient failures (timeouts, connection errors, 429s
+and 5xx) are retried up to CHATBOT_LLM_RETRIES times with exponential backoff
+and full jitter, as long as the call stays within CHATBOT_LLM_RETRY_BUDGET
+seconds overall. Streamed replies are only retried before the first chunk.
+
+After CHATBOT_BREAKER_THRESHOLD consecutive calls fail with a transient
+error, once their retries are used up, the breaker opens; retries within a
+call don't count separately. While open, calls fail at once with CircuitOpen
+for CHATBOT_BREAKER_COOLDOWN seconds, so workers aren't tied up waiting on an
+upstream that is down. Once the cooldown is over, a single probe call is let
+through: success closes the breaker, failure opens it again.
+
+Breaker state is kept in Django's cache. It is shared between workers when
+the cache backend is (see limits.py).
+"""
+import asyncio
+import logging
+import random
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+FAILURES_KEY = 'chatbot:breaker:failures'
+OPEN_KEY = 'chatbot:breaker:open'
+PROBE_KEY = 'chatbot:breaker:probe'
+
+# Failures further apart than this aren't counted as consecutive
+FAILURE_WINDOW = 600  # seconds
+
+
+class CircuitOpen(Exception):
+    """The breaker is open, so the model isn't called"""
+
+    def __init__(self):
+        super().__init__('LLM circuit breaker is open')
+
+
+def breaker_allows():
+    """
+    Whether a model call may go ahead
+
+    Closed: yes. Open: no. Cooldown over but not yet closed: only for the one
+    caller that claims the probe.
+    """
+    if cache.get(OPEN_KEY):
+        return False
+    if cache.get(FAILURES_KEY, 0) < settings.CHATBOT_BREAKER_THRESHOLD:
+        return True
+    return cache.add(PROBE_KEY, 1, settings.CHATBOT_LLM_RETRY_BUDGET)
+
+
+def record_failure():
+    cache.add(FAILURES_KEY, 0, FAILURE_WINDOW)
+    try:
+        failures = cache.incr(FAILURES_KEY)
+    except ValueError:
+        # Expired between add and incr
+        cache.add(FAILURES_KEY, 1, FAILURE_WINDOW)
+        failures = 1
+    cache.touch(FAILURES_KEY, FAILURE_WINDOW)
+    if failures >= settings.CHATBOT_BREAKER_THRESHOLD:
+        if cache.add(OPEN_KEY, 1, settings.CHATBOT_BREAKER_COOLDOWN):
+            logger.warning(f"LLM circuit breaker opened after {failures} consecutive failures")
+        cache.delete(PROBE_KEY)
+
+
+def record_success():
+    # Read first so healthy traffic doesn't write to the cache on every call
+    failures = cache.get(FAILURES_KEY)
+    if failures:
+        if failures >= settings.CHATBOT_BREAKER_THRESHOLD:
+            logger.info("LLM circuit breaker closed")
+        cache.delete_many([FAILURES_KEY, PROBE_KEY])
+
+
+async def abreaker_allows():
+    if await cache.aget(OPEN_KEY):
+        return False
+    if await cache.aget(FAILURES_KEY, 0) < settings.CHATBOT_BREAKER_THRESHOLD:
+        return True
+    return await cache.aadd(PROBE_KEY, 1, settings.CHATBOT_LLM_RETRY_BUDGET)
+
+
+async def arecord_failure():
+    await cache.aadd(FAILURES_KEY, 0, FAILURE_WINDOW)
+    try:
+        failures = await cache.aincr(FAILURES_KEY)
+    except ValueError:
+        await cache.aadd(FAILURES_KEY, 1, FAILURE_WINDOW)
+        failures = 1
+    await cache.atouch(FAILURES_KEY, FAILURE_WINDOW)
+    if failures >= settings.CHATBOT_BREAKER_THRESHOLD:
+        if await cache.aadd(OPEN_KEY, 1, settings.CHATBOT_BREAKER_COOLDOWN):
+            logger.warning(f"LLM circuit breaker opened after {failures} consecutive failures")
+        await cache.adelete(PROBE_KEY)
+
+
+async def arecord_success():
+    failures = await cache.aget(FAILURES_KEY)
+    if failures:
+        if failures >= settings.CHATBOT_BREAKER_THRESHOLD:
+            logger.info("LLM circuit breaker closed")
+        await cache.adelete_many([FAILURES_KEY, PROBE_KEY])
+
+
+def retry_delay(attempt, deadline, breaker_open):
+    """
+    Backoff before retry number attempt (0-based)
+
+    Returns:
+        Seconds to wait, or None if the call shouldn't be retried
+    """
+    if breaker_open or attempt >= settings.CHATBOT_LLM_RETRIES:
+        return None
+    delay = random.uniform(0, settings.CHATBOT_LLM_RETRY_BACKOFF * 2 ** attempt)
+    if time.monotonic() + delay >= deadline:
+        return None
+    return delay
+
+
+def attempt_timeout(deadline):
+    """Deadline for the next attempt: CHATBOT_LLM_TIMEOUT, cut short by the retry budget"""
+    return max(0.0, min(settings.CHATBOT_LLM_TIMEOUT, deadline - time.monotonic()))
+
+
+def call_llm(provider, call):
+    """
+    Make a model call with deadlines, retries and the circuit breaker
+
+    Args:
+        provider: LLMProvider being called (for its transient_errors)
+        call: Callable taking a timeout in seconds and making one attempt
+
+    Returns:
+        Whatever call returns
+
+    Raises:
+        CircuitOpen: The breaker is open
+        The provider's error, if the last attempt failed
+    """
+    if not breaker_allows():
+        raise CircuitOpen()
+    deadline = time.monotonic() + settings.CHATBOT_LLM_RETRY_BUDGET
+    attempt = 0
+    while True:
+        try:
+            result = call(attempt_timeout(deadline))
+        except provider.transient_errors as e:
+            delay = retry_delay(attempt, deadline, cache.get(OPEN_KEY))
+            if delay is None:
+                record_failure()
+                raise
+            logger.warning(f"Transient LLM error, retrying in {delay:.2f}s: {e}")
+            time.sleep(delay)
+            attempt += 1
+        else:
+            record_success()
+            return result
+
+
+async def acall_llm(provider, call):
+    """Async variant of call_llm; call returns an awaitable"""
+    if not await abreaker_allows():
+        raise CircuitOpen()
+    deadline = time.monotonic() + settings.CHATBOT_LLM_RETRY_BUDGET
+    attempt = 0
+    while True:
+        timeout = attempt_timeout(deadline)
+        try:
+            try:
+                # Enforce the deadline even if the provider ignores it
+                result = await asyncio.wait_for(call(timeout), timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f'LLM call timed out after {timeout:.1f}s')
+        except provider.transient_errors as e:
+            delay = retry_delay(attempt, deadline, await cache.aget(OPEN_KEY))
+            if delay is None:
+                await arecord_failure()
+                raise
+            logger.warning(f"Transient LLM error, retrying in {delay:.2f}s: {e}")
+            await asyncio.sleep(delay)
+            attempt += 1
+        else:
+            await arecord_success()
+            return result
+
+
+def stream_llm(provider, stream):
+    """
+    Generator variant of call_llm for streamed replies
+
+    Args:
+        provider: LLMProvider being called
+        stream: Callable taking a timeout and returning the provider's stream
+            generator
+
+    Yields the stream's chunks and returns its LLMReply. An attempt that fails
+    after chunks were sent isn't retried, since they can't be taken back.
+    """
+    if not breaker_allows():
+        raise CircuitOpen()
+    deadline = time.monotonic() + settings.CHATBOT_LLM_RETRY_BUDGET
+    attempt = 0
+    while True:
+        started = False
+        try:
+            chunks = stream(attempt_timeout(deadline))
+            while True:
+                try:
+                    chunk = next(chunks)
+                except StopIteration as done:
+                    record_success()
+                    return done.value
+                started = True
+                yield chunk
+        except provider.transient_errors as e:
+            delay = None if started else retry_delay(attempt, deadline, cache.get(OPEN_KEY))
+            if delay is None:
+                record_failure()
+                raise
+            logger.warning(f"Transient LLM error, retrying in {delay:.2f}s: {e}")
+            time.sleep(delay)
+            attempt += 1
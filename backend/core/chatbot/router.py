@@ -0,0 +1,271 @@
+"""
+Local intent router for plain navigation questions
+
+Questions like "where is settings?" or "how do I delete a goal?" are answered
+word for word by the app guide, so they are answered here from a rule table
+built from the guide sections, without a model call. Two intents are
+recognised:
+
+    navigate - "where is / how do I get to / open X": X is matched against
+               page names, a few aliases and the bold feature labels
+    how_to   - "how do I / how can I / can I <verb> X": X is matched against
+               guide lines that start with a verb of the same kind
+               ("Delete goals with confirmation dialog")
+
+Each decision has a confidence: the share of the question's terms the best
+rule's own text covers, halved when rules on several pages score the same. A
+page's name only breaks such ties; it never makes a rule match on its own, so
+"delete my account" doesn't match every delete on the Settings page. Anything
+below the threshold falls through to the model. Every decision is logged
+(without the message text unless CHATBOT_ROUTER_LOG_MESSAGES is on) so the
+rules and threshold can be tuned.
+"""
+import logging
+import re
+import time
+from django.conf import settings
+from .answer_cache import normalize
+from .guide import stem
+
+logger = logging.getLogger(__name__)
+
+# Longer messages are rarely plain navigation questions
+MAX_MESSAGE_LENGTH = 120
+
+NAVIGATE_PATTERN = re.compile(
+    r"(?:where(?:'s| is| are| can i find| do i find)|how (?:do|can) i (?:get|go) to|"
+    r"take me to|go to|open|navigate to|find)\s+(?P<target>.+?)(?:\s+(?:page|tab|section|screen))?"
+)
+HOW_TO_PATTERN = re.compile(
+    r"(?:how (?:do|can|should) i|how to|can i|where (?:do|can) i|is there a way to|i want to|help me)"
+    r"\s+(?P<verb>[a-z-]+)\s+(?P<target>.+)"
+)
+# "-", "**" and trailing punctuation
+MARKUP_PATTERN = re.compile(r'\*\*|^\s*[-*]\s*|:\s*$')
+LABEL_PATTERN = re.compile(r'^\s*-\s*\*\*(?P<label>[^*]+)\*\*')
+
+VERB_GROUPS = {
+    'delete': ('delete', 'remove', 'clear', 'erase'),
+    'create': ('create', 'add', 'make', 'set'),
+    'edit': ('edit', 'change', 'update', 'modify', 'rename', 'customize', 'choose'),
+    'export': ('export', 'download'),
+    'connect': ('connect', 'link'),
+    'disconnect': ('disconnect', 'unlink'),
+    'sync': ('sync', 'refresh'),
+    'complete': ('complete', 'mark', 'finish'),
+    'filter': ('filter', 'sort'),
+    'view': ('view', 'see', 'check'),
+    'reset': ('reset', 'restore'),
+    'select': ('select', 'pick'),
+}
+VERBS = {verb: group for group, verbs in VERB_GROUPS.items() for verb in verbs}
+
+# Words people use for pages that the guide doesn't
+PAGE_ALIASES = {
+    'home': 'dashboard',
+    'todo': 'tasks',
+    'to-do': 'tasks',
+    'stats': 'analytics',
+    'statistics': 'analytics',
+    'insights': 'analytics',
+    'journal': 'mood tracker',
+    'mood': 'mood tracker',
+    'meditation': 'mindfulness',
+    'breathing': 'mindfulness',
+    'chat': 'ai chatbot',
+    'chatbot': 'ai chatbot',
+    'preferences': 'settings',
+    'account': 'settings',
+}
+
+# Words that say nothing about the target ("a new task", "all my data")
+FILLER = frozenset(('new', 'all', 'one', 'some', 'any', 'page'))
+
+# Unlike retrieval, routing doesn't strip "er": "header" isn't "head"
+SUFFIXES = ('ing', 'ed', 'es', 's')
+
+
+def target_terms(text):
+    return {stem(word, SUFFIXES) for word in normalize(text) if word not in FILLER}
+
+
+class Page:
+    """A page of the app, from a guide section titled e.g. "MOOD TRACKER (/mood)" """
+
+    def __init__(self, section, nav_bar_names):
+        name, _, location = section.title.partition(' (')
+        location = location.rstrip(')')
+        self.name = next((nav for nav in nav_bar_names if nav.lower() == name.lower()), name.title())
+        self.in_nav_bar = self.name in nav_bar_names
+        # "CALENDAR INTEGRATION (Settings)" lives on another page rather than at its own route
+        self.route = location if location.startswith('/') else None
+        self.parent = None if self.route else location
+        aliases = [alias for alias, page in PAGE_ALIASES.items() if page == name.lower()]
+        self.search_text = ' '.join([name] + aliases)
+        self.terms = target_terms(self.search_text)
+
+    def directions(self):
+        """How to open the page, e.g. "click **Tasks** in the navigation bar ..." """
+        if self.in_nav_bar:
+            return f"click **{self.name}** in the navigation bar at the top (or go to `{self.route}`)."
+        return f"go to `{self.route}`."
+
+
+class Rule:
+    def __init__(self, page, text, target, verbs=()):
+        self.page = page
+        self.text = text
+        self.terms = target_terms(target)
+        self.verbs = set(verbs)
+
+
+class Route:
+    """
+    Outcome of routing a message
+
+    answer is None when the message should go to the model.
+    """
+
+    def __init__(self, intent=None, confidence=0.0, answer=None, rules=()):
+        self.intent = intent
+        self.confidence = confidence
+        self.answer = answer
+        self.rules = list(rules)
+
+
+def leading_verbs(text):
+    """Verb groups a guide line starts with: "Edit and delete tasks" -> {'edit', 'delete'}"""
+    groups = set()
+    for word in text.lower().split():
+        if word in VERBS:
+            groups.add(VERBS[word])
+        elif word not in ('and', 'or', '/'):
+            break
+    return groups
+
+
+def best_rules(rules, query_terms):
+    """
+    Rules whose own text covers the most query terms, with the confidence of the match
+
+    Returns:
+        (rules, confidence) - the best scoring rules on a single page
+    """
+    if not query_terms:
+        return [], 0.0
+    scored = []
+    for rule in rules:
+        score = len(query_terms & rule.terms)
+        if score:
+            scored.append((score, rule))
+    if not scored:
+        return [], 0.0
+    top = max(score for score, _ in scored)
+    matches = [rule for score, rule in scored if score == top]
+    confidence = top / len(query_terms)
+    if len({rule.page for rule in matches}) > 1:
+        # Same score on different pages: the question is ambiguous
+        page_matches = [rule for rule in matches if rule.page.terms & query_terms]
+        if len({rule.page for rule in page_matches}) == 1:
+            matches = page_matches
+        else:
+            confidence /= 2
+    return matches, confidence
+
+
+class IntentRouter:
+    """
+    Rule table built from the guide sections
+
+    Args:
+        sections: GuideSection list (see guide.split_guide)
+        nav_bar_names: Page names as they appear in the navigation bar
+    """
+
+    def __init__(self, sections, nav_bar_names):
+        self.pages = [Page(section, nav_bar_names) for section in sections]
+        self.navigate_rules = []
+        self.how_to_rules = []
+        for page, section in zip(self.pages, sections):
+            self.navigate_rules.append(Rule(page, page.name, page.search_text))
+            for line in section.body.splitlines():
+                label = LABEL_PATTERN.match(line)
+                if label:
+                    self.navigate_rules.append(Rule(page, label['label'], label['label']))
+                text = MARKUP_PATTERN.sub('', line).strip()
+                verbs = leading_verbs(text)
+                if verbs:
+                    self.how_to_rules.append(Rule(page, text, text, verbs))
+
+    def classify(self, message):
+        text = message.strip().lower().rstrip('?!. ')
+        if len(text) > MAX_MESSAGE_LENGTH:
+            return Route()
+
+        match = HOW_TO_PATTERN.fullmatch(text)
+        if match and match['verb'] in VERBS:
+            group = VERBS[match['verb']]
+            rules = [rule for rule in self.how_to_rules if group in rule.verbs]
+            matches, confidence = best_rules(rules, target_terms(match['target']))
+            if matches:
+                return Route('how_to', confidence, self.how_to_answer(matches), matches)
+            return Route('how_to')
+
+        match = NAVIGATE_PATTERN.fullmatch(text)
+        if match:
+            matches, confidence = best_rules(self.navigate_rules, target_terms(match['target']))
+            if matches:
+                return Route('navigate', confidence, self.navigate_answer(matches[0]), matches)
+            return Route('navigate')
+
+        return Route()
+
+    def route(self, message, min_confidence):
+        """
+        Answer the message locally if it is a navigation question we're sure about
+
+        Returns:
+            Route; its answer is None if the message should go to the model
+        """
+        start = time.perf_counter()
+        route = self.classify(message)
+        routed = route.answer is not None and route.confidence >= min_confidence
+        decision = (
+            f"Chat route intent={route.intent} confidence={route.confidence:.2f} routed={routed} "
+            f"page={route.rules[0].page.name if route.rules else None} "
+            f"elapsed_ms={(time.perf_counter() - start) * 1000:.2f}"
+        )
+        logger.info(decision)
+        # Chat messages are personal, so their text is only logged when asked for
+        if settings.CHATBOT_ROUTER_LOG_MESSAGES:
+            logger.debug(f"{decision} message={message[:MAX_MESSAGE_LENGTH]!r}")
+        if not routed:
+            route.answer = None
+        return route
+
+    def location(self, page):
+        """
+        Where a page is, and the page to open to get there
+
+        Returns:
+            (description, page with a route) - e.g. ("the **Settings** page", settings)
+            or ("**Calendar Integration** in **Settings**", settings)
+        """
+        if page.parent is not None:
+            parent = next((other for other in self.pages if other.name.lower() == page.parent.lower()), None)
+            if parent is not None and parent.route:
+                return f"**{page.name}** in **{parent.name}**", parent
+        return f"the **{page.name}** page", page
+
+    def navigate_answer(self, rule):
+        where, page = self.location(rule.page)
+        if rule.text == rule.page.name:
+            if page is rule.page:
+                return f"To open **{page.name}**, {page.directions()}"
+            return f"**{rule.text}** is part of **{page.name}**. To open **{page.name}**, {page.directions()}"
+        return f"**{rule.text}** is on {where}. To open **{page.name}**, {page.directions()}"
+
+    def how_to_answer(self, rules):
+        where, page = self.location(rules[0].page)
+        steps = '\n'.join(f"- {rule.text}" for rule in rules[:3])
+        return f"On {where}:\n{steps}\n\nTo open **{page.name}**, {page.directions()}"
@@ -0,0 +1,689 @@
+"""
+Service functions for the chat assistant
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings as django_settings
+from django.db import connections as db_connections
+from .answer_cache import AnswerCache, normalize
+from .guide import GuideIndex, split_guide, stem, terms
+from .models import ChatMessage, ChatSummary
+from .providers import create_provider
+from .resilience import acall_llm, call_llm, stream_llm
+from .router import IntentRouter
+from .usage import record_llm_call
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = 'gemini-3-flash-preview'
+
+# Most recent messages considered when filling the history token budget
+HISTORY_SCAN_LIMIT = 50
+
+# Rough length limit for the rolling conversation summary
+SUMMARY_MAX_OUTPUT_TOKENS = 400
+
+FALLBACK_MESSAGE = "I'm sorry, I'm having trouble connecting right now. Please try again later. "
+
+# System instruction for the assistant
+SYSTEM_INSTRUCTION = '''You are a helpful AI assistant for a productivity and wellness app called "Smart Desktop Buddies". Your role is to guide users through all features of the application and help them maximize their productivity and well-being.
+
+## APPLICATION OVERVIEW
+Smart Desktop Buddies is an AI-powered companion app designed to help users improve their mental health, productivity, and overall well-being. The app combines task management, mood tracking, focus tools, mindfulness practices, and AI assistance.
+
+## MAIN FEATURES AND PAGES
+
+### 1. DASHBOARD (/dashboard)
+The central hub where users can see:
+- **Welcome Message**: Greets user and includes a link to the AI Chatbot for guidance
+- **Desktop Buddy**: A customizable animated companion (robot, cat, dog, owl, or panda) that provides daily encouragement and reminders. Name and appearance can be customized in Settings.
+- **Focus Timer (Pomodoro)**: 
+  - Set focus duration (25-60 minutes) and break duration (5-10 minutes) using sliders
+  - Tracks focus sessions and automatically suggests breaks
+  - After 3 consecutive sessions, suggests a longer 25-minute rest
+  - Can complete sessions early or skip breaks/rests
+  - Tracks total focus time for analytics
+  - **Reset Button Behavior**: First click stops and resets the timer. If clicked again when the timer is already stopped and reset, it returns to the duration settings (where sliders are visible)
+- **Upcoming Calendar Events**: 
+  - Shows events from connected Google Calendar (up to 30 days ahead, excluding past events)
+  - Displays connected Google email address
+  - "(Up to 30 days)" note displayed in the title
+  - Refresh button syncs calendars and shows toast notification with sync results
+  - Pagination: 5 events per page with next/previous buttons
+  - Events ordered by closest date first
+  - Click "(Change)" link next to email to navigate to Settings calendar section
+- **Today's Tasks**: Quick view of tasks due today or overdue
+- **Daily Motivation**: Inspirational quotes that refresh daily
+
+### 2. MOOD TRACKER (/mood)
+Comprehensive mood logging and analysis:
+- **Mood Entry Form**:
+  - Select mood: very happy, happy, neutral, sad, very sad (with emoji indicators)
+  - Mood score (1-10 scale) with visual guide and color-coded number line
+  - Score buttons (1-10) for easy selection
+  - Optional notes/description (textarea)
+  - Custom date and time selection (calendar picker and time input)
+  - Submit and Cancel buttons
+  - Form validation with error messages
+- **Mood History**: 
+  - View all past mood entries in chronological order
+  - Each entry shows: date, mood emoji, score (if available), and notes
+  - Week view: Calendar picker to select any week (starting Monday)
+  - Shows mood entries for the selected 7-day period
+  - Delete individual entries with confirmation dialog
+  - Clear all entries option
+- **Mood Charts**: 
+  - Line chart showing mood score trends over the selected week
+  - Displays average mood score per day (1-10 scale)
+  - Helps identify patterns and triggers
+  - Dark mode support with proper contrast
+- **Wellness Tips**: Contextual advice based on mood patterns
+
+### 3. TASKS (/tasks)
+Full-featured task management:
+- **Task Features**:
+  - Create tasks with title, description, priority (high/medium/low)
+  - Priority colors: High (red), Medium (light yellow when selected), Low (gray)
+  - Set due dates with deadline tracking (calendar picker and time input)
+  - Mark tasks as completed (checkbox)
+  - Edit and delete tasks
+  - Filter by: All, Pending (active), Completed, Deadline (tasks with due dates)
+  - Tasks sorted by: overdue first, then priority
+- **Task Display**:
+  - Color-coded by priority
+  - Visual indicators for overdue tasks (red background)
+  - Tasks close to deadline (within 24 hours) highlighted
+  - Completed tasks shown with strikethrough
+  - Each task shows: title, priority badge, due date/time, completion status
+- **Filter Menu**: Dropdown menu with selected filter highlighted (blue background in dark mode)
+- **Productivity Tips**: Helpful advice for task management
+
+### 4. ANALYTICS (/analytics)
+Data-driven insights into user's productivity and wellness:
+- **Week Selection**:
+  - Calendar picker to select any week (starting Monday)
+  - Shows data for the selected 7-day period
+  - Displays the week range (start date to end date)
+- **Key Metrics** (for selected week):
+  - Average Focus Time (hours and minutes)
+  - Total Tasks Completed
+  - Average Mood Score (1-10 scale)
+- **Charts and Visualizations**:
+  - **Focus Time Trend**: Line chart showing daily focus time over the selected week
+  - **Task Completion**: Bar chart showing daily tasks completed over the week
+  - **Mood Trends**: Area chart showing mood patterns and average scores over the week
+- **Burnout Analysis**:
+  - Burnout score calculation based on multiple factors
+  - Risk level indicator (Low, Moderate, High, Critical)
+  - Breakdown of contributing factors:
+    * Average mood (inverted: lower mood increases burnout)
+    * Tasks done (reduces burnout)
+    * Tasks close to deadline (within 24 hours)
+    * Tasks exceeded deadline
+    * Upcoming calendar events
+  - Visual display with color-coded risk levels
+- **Detailed Insights**:
+  - **Productivity Analysis**:
+    * Focus time trends (increasing/decreasing/stable)
+    * Average focus hours per day
+    * Best and lowest focus days
+    * Task completion trends and consistency
+    * Mood trends with best and worst days
+  - **Burnout Analysis Metrics**:
+    * Current metrics breakdown
+    * Explanation of burnout score calculation
+    * Real-time calculation display
+- **Data Sources**: Analytics pulls data from focus sessions, completed tasks, mood entries, and calendar events
+
+### 5. MINDFULNESS (/mindfulness)
+Guided mindfulness and meditation practices:
+- **Layout Structure**:
+  - Left Column: Active Session / Choose Your Practice, Recent Sessions, Benefits, Daily Quote (bottom)
+  - Right Column: Today's Practice, Powerful Breathing Technique, Quick Tips
+- **Choose Your Practice**:
+  - Two options: Breathing Exercise and Meditation Session
+  - Select practice type to begin
+- **Breathing Exercise**:
+  - 4-4-8 breathing pattern (inhale 4s, hold 4s, exhale 8s)
+  - Visual breathing circle animation: expands on inhale, holds size during hold, shrinks on exhale
+  - Customizable duration (default 5 minutes)
+  - Tracks breathing cycles
+  - Timer with play/pause controls
+  - **Reset Button Behavior**: First click stops and resets the timer. If clicked again when the timer is already stopped and reset, it returns to the "Choose Your Practice" selection
+- **Meditation Session**:
+  - Timer-based meditation
+  - Customizable duration
+  - Timer with play/pause controls
+  - **Reset Button Behavior**: Same as breathing exercise - first click stops/resets, second click returns to practice selection
+- **Recent Sessions**: 
+  - Located below "Choose Your Practice" section
+  - View past mindfulness sessions with type, duration, and completion date
+  - Clear history option with confirmation dialog
+  - Empty state message when no sessions
+- **Daily Quote**: 
+  - Located at the very bottom of the left column (below Benefits)
+  - Rotating inspirational quotes for mindfulness
+- **Benefits Card**: 
+  - Information about mindfulness benefits
+  - Located below Recent Sessions in left column
+- **Quick Tips**: 
+  - Practical mindfulness advice
+  - Located in right column below "Powerful Breathing Technique"
+- **Today's Practice**: 
+  - Shows current practice status
+  - Located in right column
+
+### 6. GOALS (/goals)
+Goal setting and progress tracking:
+- **Goal Management**:
+  - Create goals with title, description, and target date (calendar picker)
+  - Add new goal button opens form
+  - Edit existing goals (click edit icon)
+  - Delete goals with confirmation dialog
+  - Track goal status: not_started, in_progress, completed
+  - Update goal status using status selector
+  - Visual status badges: Not Started (gray), In Progress (blue), Completed (green)
+- **Goal Display**:
+  - List of all goals with status badges
+  - Shows goal title, description, target date, and current status
+  - Goals sorted by status and date
+  - Empty state when no goals exist
+- **Features**:
+  - Form validation
+  - Loading states during save/delete operations
+  - Error handling with messages
+
+### 7. CALENDAR INTEGRATION (Settings)
+Google Calendar synchronization:
+- **Connection**:
+  - Connect Google Calendar account via OAuth (button in Settings)
+  - View connected email address (account_email field)
+  - Connection status indicators (active/inactive, needs refresh)
+  - Disconnect calendar with confirmation dialog
+- **Event Management**:
+  - Events synced up to 30 days ahead (from current date)
+  - Past events automatically excluded from sync and cleaned up
+  - Manual sync/refresh option per connection or "Sync All Calendars" button
+  - Sync shows toast notification with results (number of events synced, created, updated)
+  - "Needs refresh" indicator when token needs refreshing
+- **Display**:
+  - Upcoming events shown on dashboard (up to 30 days ahead)
+  - Pagination: 5 events per page with next/previous controls
+  - Events ordered by closest date first
+  - Event details: title, date, time, color-coded dots
+  - Refresh button on dashboard syncs and shows toast notification
+
+### 8. SETTINGS (/settings)
+User preferences and data management:
+- **Navigation Bar**: Standard navigation bar (not just "Back to Dashboard") with all page links. Settings icon glows when on settings page.
+- **Profile Settings**:
+  - Update username (with save button and loading state)
+  - Toast notification on successful update
+- **Appearance Settings**:
+  - Theme selection (Light/Dark mode) - dropdown selector
+  - Customize Desktop Buddy name (text input)
+  - Choose Buddy appearance (robot, cat, dog, owl, panda) - dropdown selector
+  - Changes tracked for unsaved changes prompt
+- **Calendar Integration**:
+  - Connect Google Calendar (OAuth button)
+  - View all connected calendars with email addresses
+  - Sync individual calendars or "Sync All Calendars" button
+  - Sync shows toast notification with results
+  - Disconnect calendar with confirmation dialog
+  - Connection status: active/inactive, needs refresh indicator
+- **Data Management**:
+  - Export all data as PDF (tasks, mood entries, chat messages, analytics) - button with loading state
+  - Clear all data (with detailed confirmation dialog listing what will be deleted)
+  - Reset settings to defaults (with confirmation dialog)
+  - Toast notifications for all actions
+- **Unsaved Changes Management**:
+  - "Unsaved Changes" card appears when preferences are modified
+  - Cancel button discards changes and restores original preferences
+  - Save Changes button saves to localStorage and updates original preferences
+  - **Navigation Guard**: Prevents losing unsaved changes when:
+    * Navigating to other pages (shows dialog: Save & Continue, Discard Changes, Stay on Page)
+    * Using browser back/forward buttons
+    * Refreshing or closing the page (browser warning)
+  - Toast notifications for save/cancel actions
+
+### 9. AI CHATBOT (/chat)
+The current feature - you are this chatbot:
+- **Features**:
+  - Conversational AI powered by Google Gemini (gemini-3-flash-preview model)
+  - Chat history saved in database (last 50 messages)
+  - Clear all chats button in header (with confirmation dialog)
+  - After clearing, returns to welcome message
+  - Welcome message on first use or after clearing chats
+  - Online status indicator (green dot) beside "AI Chatbot" title in header
+- **Interface**:
+  - Message input always visible at bottom (no scrolling needed)
+  - ScrollArea for message history
+  - Bot messages: white background (light mode) / gray-800 (dark mode)
+  - User messages: blue background
+  - Bold text in bot messages: bright blue for better readability
+  - Markdown formatting: Headings (###, ##, #), bullet points (*), numbered lists (1.), bold text (**)
+  - Loading indicator with animated dots
+  - Timestamps on messages
+- **Capabilities**: 
+  - Answer questions about the app
+  - Provide step-by-step guidance for all features
+  - Offer support and encouragement
+  - Explain how features work together
+  - Suggest best practices
+
+## HOW TO GUIDE USERS
+
+When users ask about features:
+1. **Explain the feature clearly** - What it does and why it's useful
+2. **Provide step-by-step instructions** - How to access and use the feature
+3. **Give practical examples** - Show how the feature helps in real scenarios
+4. **Suggest best practices** - Tips for getting the most out of each feature
+5. **Connect features** - Explain how features work together (e.g., mood tracking + analytics)
+
+## COMMUNICATION STYLE
+- Be friendly, encouraging, and supportive
+- Use emojis sparingly but appropriately (👋, 📊, 🎯, etc.)
+- Keep responses concise but comprehensive
+- Use clear, simple language
+- Be patient and helpful with technical questions
+- Celebrate user achievements and progress
+- Offer encouragement during difficult times
+
+## NAVIGATION HELP
+The app has a navigation bar at the top with these pages:
+- Dashboard (home)
+- Mood Tracker
+- Tasks
+- Analytics
+- Mindfulness
+- AI Chatbot (current page)
+- Settings
+
+Users can access any page by clicking the navigation buttons.
+
+## RESPONSE GUIDELINES
+- If asked "how do I...", provide clear step-by-step instructions
+- If asked "what is...", explain the feature and its benefits
+- If asked "where can I...", direct them to the specific page/feature
+- If asked about data or privacy, explain that data is stored securely and can be exported/deleted
+- Always be helpful and aim to make the user feel supported and empowered
+
+Remember: Your goal is to help users understand and effectively use all features of Smart Desktop Buddies to improve their productivity, mental health, and overall well-being.'''
+
+# Changes whenever the model or system instruction does; cached answers from another version are dropped
+PROMPT_VERSION = hashlib.sha256(f'{MODEL_NAME}\n{SYSTEM_INSTRUCTION}'.encode()).hexdigest()[:12]
+
+# With CHATBOT_GUIDE_RETRIEVAL the page sections of the instruction are sent per message (see guide.py)
+GUIDE_CORE, GUIDE_SECTIONS = split_guide(SYSTEM_INSTRUCTION)
+CORE_INSTRUCTION = GUIDE_CORE + (
+    "\n\n## APP GUIDE\n"
+    "The sections of the app guide relevant to the user's message are included with it. "
+    "Use them for details about pages and features."
+)
+guide_index = GuideIndex(GUIDE_SECTIONS)
+
+
+def nav_bar_names(instruction):
+    """Page names listed under NAVIGATION HELP, e.g. "Mood Tracker" """
+    start = instruction.index('## NAVIGATION HELP')
+    section = instruction[start:instruction.index('\n## ', start)]
+    return [line[2:].split(' (')[0].strip() for line in section.splitlines() if line.startswith('- ')]
+
+
+intent_router = IntentRouter(GUIDE_SECTIONS, nav_bar_names(SYSTEM_INSTRUCTION))
+
+answer_cache = AnswerCache()
+
+# Every term the instruction uses; only questions made up of these share a cached answer
+GUIDE_VOCABULARY = frozenset(terms(SYSTEM_INSTRUCTION))
+
+
+def cacheable(user_message):
+    """
+    Whether the answer to a message may be cached and shared between users
+
+    Only if every word (stop words aside) appears in the app guide and none is
+    a number: names, dates, places and the like that a user adds about
+    themselves aren't guide words, so personal questions are left uncached.
+    """
+    words = normalize(user_message)
+    return bool(words) and all(
+        not any(char.isdigit() for char in word) and stem(word) in GUIDE_VOCABULARY for word in words
+    )
+
+
+@lru_cache(maxsize=None)
+def provider_for(name, system_instruction):
+    return create_provider(name, MODEL_NAME, system_instruction)
+
+
+def get_provider():
+    """Return the shared LLM provider selected by CHATBOT_LLM_PROVIDER"""
+    system_instruction = CORE_INSTRUCTION if django_settings.CHATBOT_GUIDE_RETRIEVAL else SYSTEM_INSTRUCTION
+    return provider_for(django_settings.CHATBOT_LLM_PROVIDER, system_instruction)
+
+
+def with_guide(history, user_message):
+    """
+    The user message as sent to the model, with the relevant app guide sections
+
+    Returns the message unchanged when retrieval is off or nothing matches.
+    """
+    if not django_settings.CHATBOT_GUIDE_RETRIEVAL:
+        return user_message
+    top_k = django_settings.CHATBOT_GUIDE_TOP_K
+    sections = guide_index.search(user_message, top_k)
+    if len(history) >= 2 and history[-2]['role'] == 'user':
+        # Follow-ups ("how do I change it?") often only name the feature in the previous question
+        for section in guide_index.search(history[-2]['parts'][0], 1):
+            if section not in sections:
+                sections = sections[:top_k - 1] + [section]
+    if not sections:
+        return user_message
+    guide = '\n\n'.join(section.text for section in sections)
+    return f"App guide sections relevant to this message:\n\n{guide}\n\nUser message:\n{user_message}"
+
+
+def count_tokens(text):
+    return get_provider().count_tokens(text)
+
+
+def get_summary(user):
+    """
+    Return the user's rolling chat summary, or None
+
+    A summary whose messages have all been deleted (e.g. after clearing the chat)
+    is stale and is removed.
+    """
+    summary = ChatSummary.objects.filter(user=user).first()
+    if summary is None:
+        return None
+    if not ChatMessage.objects.filter(user=user, id__lte=summary.last_message_id).exists():
+        summary.delete()
+        return None
+    return summary
+
+
+def fit_history(summary, recent_messages, budget):
+    """
+    Build Gemini chat history within a token budget
+
+    Args:
+        summary: ChatSummary to prepend, or None
+        recent_messages: Messages not covered by the summary, newest first,
+            excluding the message being answered
+        budget: Maximum estimated tokens for summary plus messages
+
+    Returns:
+        Gemini history (oldest first)
+    """
+    prefix = []
+    if summary is not None:
+        # Keep user/model turns alternating
+        prefix = [
+            {'role': 'user', 'parts': [f"Summary of our earlier conversation:\n{summary.content}"]},
+            {'role': 'model', 'parts': ["Thanks, I'll keep that in mind."]},
+        ]
+        budget -= count_tokens(summary.content)
+
+    history = []
+    for msg in recent_messages:
+        budget -= count_tokens(msg.content)
+        if budget < 0:
+            break
+        role = 'model' if msg.role == 'assistant' else 'user'
+        history.append({'role': role, 'parts': [msg.content]})
+
+    history.reverse()
+    turns = []
+    for turn in history:
+        # A user message followed by another went unanswered (the model call failed)
+        if turns and turns[-1]['role'] == turn['role']:
+            turns.pop()
+        turns.append(turn)
+    # The message being answered follows, so a trailing user turn went unanswered too
+    if turns and turns[-1]['role'] == 'user':
+        turns.pop()
+    # Start on a user turn so roles keep alternating after the summary
+    while turns and turns[0]['role'] == 'model':
+        turns.pop(0)
+    return prefix + turns
+
+
+def build_history(user):
+    """Return the Gemini history for the user's latest message (already saved)"""
+    summary = get_summary(user)
+    messages = ChatMessage.objects.filter(user=user)
+    if summary is not None:
+        messages = messages.filter(id__gt=summary.last_message_id)
+    recent_messages = list(messages.order_by('-created_at', '-id')[:HISTORY_SCAN_LIMIT])
+    # The newest message is the one being answered
+    return fit_history(summary, recent_messages[1:], django_settings.CHATBOT_HISTORY_TOKEN_BUDGET)
+
+
+async def abuild_history(user):
+    return await sync_to_async(build_history)(user)
+
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000)
+
+
+def answer_cache_version():
+    guide = django_settings.CHATBOT_GUIDE_TOP_K if django_settings.CHATBOT_GUIDE_RETRIEVAL else 'full'
+    return f'{get_provider().name}:{PROMPT_VERSION}:{guide}'
+
+
+def cached_answer(user, history, user_message):
+    """Return a cached answer if the question has no history and was answered before"""
+    if history or not django_settings.CHATBOT_ANSWER_CACHE or not cacheable(user_message):
+        return None
+    answer = answer_cache.get(user_message, answer_cache_version())
+    if answer is not None:
+        logger.info(f"Chat answer cache hit user={user.pk}")
+    return answer
+
+
+def remember_answer(history, user_message, answer):
+    """Cache the answer to an app question asked without history"""
+    if not history and django_settings.CHATBOT_ANSWER_CACHE and cacheable(user_message):
+        answer_cache.set(user_message, answer, answer_cache_version())
+
+
+def routed_answer(user_message):
+    """Answer plain navigation questions locally (see router.py); None means ask the model"""
+    if not django_settings.CHATBOT_ROUTER:
+        return None
+    return intent_router.route(user_message, django_settings.CHATBOT_ROUTER_MIN_CONFIDENCE).answer
+
+
+def generate_reply(user, user_message):
+    """Return the complete assistant reply text"""
+    answer = routed_answer(user_message)
+    if answer is not None:
+        return answer
+
+    provider = get_provider()
+    start = time.perf_counter()
+    history = build_history(user)
+    answer = cached_answer(user, history, user_message)
+    if answer is not None:
+        record_llm_call(user, 'chat', provider.model_name, elapsed_ms(start), cache_hit=True)
+        return answer
+
+    try:
+        prompt = with_guide(history, user_message)
+        reply = call_llm(provider, lambda timeout: provider.generate(history, prompt, timeout=timeout))
+    except Exception:
+        record_llm_call(user, 'chat', provider.model_name, elapsed_ms(start), error=True)
+        raise
+    record_llm_call(user, 'chat', provider.model_name, elapsed_ms(start), reply=reply)
+    remember_answer(history, user_message, reply.text)
+    return reply.text
+
+
+async def agenerate_reply(user, user_message):
+    """Async variant of generate_reply"""
+    answer = routed_answer(user_message)
+    if answer is not None:
+        return answer
+
+    provider = get_provider()
+    record = sync_to_async(record_llm_call)
+    start = time.perf_counter()
+    history = await abuild_history(user)
+    answer = cached_answer(user, history, user_message)
+    if answer is not None:
+        await record(user, 'chat', provider.model_name, elapsed_ms(start), cache_hit=True)
+        return answer
+
+    try:
+        prompt = with_guide(history, user_message)
+        reply = await acall_llm(provider, lambda timeout: provider.agenerate(history, prompt, timeout=timeout))
+    except Exception:
+        await record(user, 'chat', provider.model_name, elapsed_ms(start), error=True)
+        raise
+    await record(user, 'chat', provider.model_name, elapsed_ms(start), reply=reply)
+    remember_answer(history, user_message, reply.text)
+    return reply.text
+
+
+def stream_reply(user, user_message):
+    """Yield the assistant reply as text chunks as the model produces them"""
+    answer = routed_answer(user_message)
+    if answer is not None:
+        yield answer
+        return
+
+    provider = get_provider()
+    start = time.perf_counter()
+    history = build_history(user)
+    answer = cached_answer(user, history, user_message)
+    if answer is not None:
+        record_llm_call(user, 'stream', provider.model_name, elapsed_ms(start), cache_hit=True)
+        yield answer
+        return
+
+    # Step through the provider's stream by hand to time the first chunk
+    prompt = with_guide(history, user_message)
+    chunks = stream_llm(provider, lambda timeout: provider.stream(history, prompt, timeout=timeout))
+    time_to_first_token_ms = None
+    try:
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration as done:
+                reply = done.value
+                break
+            if time_to_first_token_ms is None:
+                time_to_first_token_ms = elapsed_ms(start)
+            yield chunk
+    except Exception:
+        record_llm_call(
+            user, 'stream', provider.model_name, elapsed_ms(start),
+            time_to_first_token_ms=time_to_first_token_ms, error=True
+        )
+        raise
+    record_llm_call(
+        user, 'stream', provider.model_name, elapsed_ms(start),
+        reply=reply, time_to_first_token_ms=time_to_first_token_ms
+    )
+    remember_answer(history, user_message, reply.text)
+
+
+def summarize_messages(user, previous_summary, messages):
+    """Ask Gemini to fold messages (oldest first) into the previous summary"""
+    transcript = '\n'.join(
+        f"{'Assistant' if msg.role == 'assistant' else 'User'}: {msg.content}" for msg in messages
+    )
+    prompt = (
+        "You maintain a running summary of a conversation between a user and the "
+        "Smart Desktop Buddies assistant. Update the summary with the new messages. "
+        "Keep facts about the user, their goals and anything they asked to remember. "
+        "Reply with the summary only, in under 200 words.\n\n"
+        f"Current summary:\n{previous_summary or '(none)'}\n\n"
+        f"New messages:\n{transcript}"
+    )
+    provider = get_provider()
+    start = time.perf_counter()
+    try:
+        reply = call_llm(
+            provider,
+            lambda timeout: provider.complete(prompt, max_output_tokens=SUMMARY_MAX_OUTPUT_TOKENS, timeout=timeout)
+        )
+    except Exception:
+        record_llm_call(user, 'summary', provider.model_name, elapsed_ms(start), error=True)
+        raise
+    record_llm_call(user, 'summary', provider.model_name, elapsed_ms(start), reply=reply)
+    return reply.text.strip()
+
+
+def update_summary(user):
+    """
+    Fold older messages into the user's rolling summary once enough have built up
+
+    Runs after a reply is saved. Every CHATBOT_SUMMARY_INTERVAL turns, messages
+    not yet summarized are folded in, except the most recent interval's worth,
+    which stay in the history as raw messages. A longer backlog (e.g. a user
+    chatting since before summaries existed) is folded in HISTORY_SCAN_LIMIT
+    messages at a time, oldest first, saving the summary after each batch.
+
+    Returns:
+        The updated ChatSummary, or None if no update was due
+    """
+    keep = django_settings.CHATBOT_SUMMARY_INTERVAL * 2  # A turn is a user and an assistant message
+    summary = get_summary(user)
+    last_message_id = summary.last_message_id if summary is not None else 0
+    messages = ChatMessage.objects.filter(user=user, id__gt=last_message_id)
+    if messages.count() < keep * 2:
+        return None
+
+    recent_ids = messages.order_by('-created_at', '-id').values_list('id', flat=True)[:keep]
+    backlog = messages.filter(id__lt=min(recent_ids)).order_by('id')
+    content = summary.content if summary is not None else None
+    updated = None
+    while True:
+        batch = list(backlog.filter(id__gt=last_message_id)[:HISTORY_SCAN_LIMIT])
+        if not batch:
+            break
+        content = summarize_messages(user, content, batch)
+        if not content:
+            break
+        last_message_id = batch[-1].id
+        updated, _ = ChatSummary.objects.update_or_create(
+            user=user, defaults={'content': content, 'last_message_id': last_message_id}
+        )
+    return updated
+
+
+def refresh_summary(user):
+    """Update the rolling summary, logging rather than raising on failure"""
+    try:
+        update_summary(user)
+    except Exception as e:
+        logger.error(f"Chat summary update failed: {e}")
+
+
+def refresh_summary_in_background(user):
+    """
+    Run refresh_summary on its own thread, so the reply doesn't wait on the summary's LLM call
+
+    If the process exits first, the update is simply made after a later reply.
+    """
+    def run():
+        try:
+            refresh_summary(user)
+        finally:
+            db_connections.close_all()
+
+    threading.Thread(target=run, name='chat-summary', daemon=True).start()
+
+
+def format_sse(event, data):
+    """Format a Server-Sent Events frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
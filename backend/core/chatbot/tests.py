@@ -0,0 +1,288 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from . import resilience
+from .answer_cache import AnswerCache
+from .limits import ChatLimitExceeded, acquire_chat_slot
+from .models import ChatMessage, ChatSummary
+from .router import IntentRouter
+from .services import (
+    GUIDE_SECTIONS, SYSTEM_INSTRUCTION, cacheable, cached_answer, nav_bar_names, remember_answer, update_summary
+)
+
+MIN_CONFIDENCE = 0.8
+
+
+class IntentRouterTests(SimpleTestCase):
+    """Routing against the real app guide"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.router = IntentRouter(GUIDE_SECTIONS, nav_bar_names(SYSTEM_INSTRUCTION))
+
+    def route(self, message):
+        return self.router.route(message, MIN_CONFIDENCE)
+
+    def test_page_name_alone_does_not_match(self):
+        # "account" is an alias of Settings, but no Settings line is about accounts
+        for message in ('how do I delete my account', 'how do I reset my account'):
+            with self.subTest(message=message):
+                self.assertIsNone(self.route(message).answer)
+
+    def test_er_is_not_stemmed(self):
+        # "header" in "Clear all chats button in header" must not match "head"
+        self.assertIsNone(self.route('help me clear my head').answer)
+
+    def test_navigation_questions_are_answered(self):
+        cases = {
+            'where is settings': '/settings',
+            'open mood tracker': '/mood',
+            'take me to analytics': '/analytics',
+            'where is the focus timer': '/dashboard',
+        }
+        for message, route in cases.items():
+            with self.subTest(message=message):
+                answer = self.route(message).answer
+                self.assertIsNotNone(answer)
+                self.assertIn(route, answer)
+
+    def test_how_to_questions_are_answered(self):
+        cases = {
+            'how do I delete a goal': 'Delete goals',
+            'how do i clear all chats': 'Clear all chats',
+            'how can I connect google calendar': 'Connect Google Calendar',
+        }
+        for message, line in cases.items():
+            with self.subTest(message=message):
+                answer = self.route(message).answer
+                self.assertIsNotNone(answer)
+                self.assertIn(line, answer)
+
+    def test_other_messages_go_to_the_model(self):
+        for message in ('I feel anxious today', 'how do i change theme'):
+            with self.subTest(message=message):
+                self.assertIsNone(self.route(message).answer)
+
+    def test_message_text_is_not_logged(self):
+        message = 'where is settings, I had a rough day'
+        with self.assertLogs('chatbot.router', level='DEBUG') as logs:
+            self.route(message)
+        self.assertTrue(logs.output)
+        self.assertFalse(any('rough day' in line for line in logs.output))
+
+    @override_settings(CHATBOT_ROUTER_LOG_MESSAGES=True)
+    def test_message_text_is_logged_when_enabled(self):
+        with self.assertLogs('chatbot.router', level='DEBUG') as logs:
+            self.route('where is settings')
+        self.assertTrue(any("message='where is settings'" in line for line in logs.output))
+
+
+class AnswerCacheTests(SimpleTestCase):
+    def test_reworded_question_hits_for_any_user(self):
+        cache = AnswerCache()
+        cache.set('How do I export all my data as a PDF?', 'Open Settings...', 'v1')
+        self.assertEqual(cache.get('how to export all data as pdf', 'v1'), 'Open Settings...')
+        self.assertIsNone(cache.get('how to export all data as pdf', 'v2'))
+
+    def test_only_app_questions_are_cacheable(self):
+        for message in ('How do I connect my Google Calendar?', 'where can I see my mood history'):
+            with self.subTest(message=message):
+                self.assertTrue(cacheable(message))
+        for message in (
+            "I'm Sam and my exam is Friday, how do I add a task?",
+            'remind me my password is hunter2',
+            'what happened on 12 march',
+            '???',
+        ):
+            with self.subTest(message=message):
+                self.assertFalse(cacheable(message))
+
+    @override_settings(CHATBOT_ANSWER_CACHE=True)
+    def test_personal_questions_are_not_shared(self):
+        personal = "I'm Sam, how do I connect my google calendar?"
+        with mock.patch('chatbot.services.answer_cache', AnswerCache()):
+            remember_answer([], personal, 'Sam, open Settings...')
+            remember_answer([], 'how do I connect my google calendar?', 'Open Settings...')
+            user = SimpleNamespace(pk=2)
+            self.assertIsNone(cached_answer(user, [], personal))
+            self.assertEqual(cached_answer(user, [], 'how to connect google calendar'), 'Open Settings...')
+
+
+@override_settings(
+    CHATBOT_MAX_CONCURRENT_PER_USER=1,
+    CHATBOT_MAX_CONCURRENT_LLM_CALLS=2,
+    CHATBOT_QUEUE_SIZE=0,
+    CHATBOT_SLOT_TIMEOUT=1,
+)
+class ChatSlotTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_user_limit(self):
+        user = SimpleNamespace(pk=1)
+        with acquire_chat_slot(user):
+            with self.assertRaises(ChatLimitExceeded):
+                acquire_chat_slot(user)
+        acquire_chat_slot(user).release()
+
+    def test_leaked_slot_expires_despite_traffic(self):
+        acquire_chat_slot(SimpleNamespace(pk=1))  # Never released
+        deadline = time.monotonic() + 1.5
+        while time.monotonic() < deadline:
+            # Other users keep using the remaining slot
+            acquire_chat_slot(SimpleNamespace(pk=2)).release()
+            time.sleep(0.1)
+        # Both global slots are free again
+        first = acquire_chat_slot(SimpleNamespace(pk=3))
+        second = acquire_chat_slot(SimpleNamespace(pk=4))
+        first.release()
+        second.release()
+
+
+@override_settings(
+    CHATBOT_LLM_RETRIES=2,
+    CHATBOT_LLM_RETRY_BACKOFF=0,
+    CHATBOT_LLM_RETRY_BUDGET=10,
+    CHATBOT_BREAKER_THRESHOLD=2,
+    CHATBOT_BREAKER_COOLDOWN=60,
+)
+class CircuitBreakerTests(SimpleTestCase):
+    provider = SimpleNamespace(transient_errors=(TimeoutError,))
+
+    def setUp(self):
+        cache.clear()
+
+    def fail(self, timeout):
+        self.attempts += 1
+        raise TimeoutError('upstream timed out')
+
+    def test_retries_count_as_one_failure(self):
+        self.attempts = 0
+        with self.assertRaises(TimeoutError):
+            resilience.call_llm(self.provider, self.fail)
+        self.assertEqual(self.attempts, 3)
+        self.assertEqual(cache.get(resilience.FAILURES_KEY), 1)
+        self.assertTrue(resilience.breaker_allows())
+
+    def test_opens_after_threshold_calls(self):
+        self.attempts = 0
+        for _ in range(2):
+            with self.assertRaises(TimeoutError):
+                resilience.call_llm(self.provider, self.fail)
+        with self.assertRaises(resilience.CircuitOpen):
+            resilience.call_llm(self.provider, self.fail)
+        self.assertEqual(self.attempts, 6)
+
+    def test_stream_retries_count_as_one_failure(self):
+        self.attempts = 0
+
+        def stream(timeout):
+            self.fail(timeout)
+            yield 'never'
+
+        with self.assertRaises(TimeoutError):
+            list(resilience.stream_llm(self.provider, stream))
+        self.assertEqual(self.attempts, 3)
+        self.assertEqual(cache.get(resilience.FAILURES_KEY), 1)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], CHATBOT_MAX_CONCURRENT_PER_USER=1)
+class ChatSummaryTests(TestCase):
+    """The rolling summary is refreshed after the reply, with the chat slot already free"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username='summary', email='summary@example.com', password=None
+        )
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.slot_free = []
+
+    def refresh_summary_in_background(self, user):
+        # A new slot can only be had once the request has given its slot back
+        acquire_chat_slot(user).release()
+        self.slot_free.append(True)
+
+    def patch(self, name, **kwargs):
+        patcher = mock.patch(f'chatbot.views.{name}', **kwargs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sync_view(self):
+        self.patch('generate_reply', return_value='Hello!')
+        self.patch('refresh_summary_in_background', side_effect=self.refresh_summary_in_background)
+        response = self.client.post(
+            '/api/chatbot/chat/', {'message': 'hi'}, content_type='application/json', headers=self.headers
+        )
+        self.assertEqual(response.json()['message'], 'Hello!')
+        self.assertEqual(self.slot_free, [True])
+
+    def test_stream_view(self):
+        self.patch('stream_reply', return_value=iter(['Hel', 'lo!']))
+        self.patch('refresh_summary_in_background', side_effect=self.refresh_summary_in_background)
+        response = self.client.post(
+            '/api/chatbot/chat/stream/', {'message': 'hi'}, content_type='application/json', headers=self.headers
+        )
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('event: done', body)
+        self.assertEqual(self.slot_free, [True])
+
+    async def test_async_view(self):
+        self.patch('agenerate_reply', new=mock.AsyncMock(return_value='Hello!'))
+        self.patch('refresh_summary_in_background', side_effect=self.refresh_summary_in_background)
+        response = await self.async_client.post(
+            '/api/chatbot/chat/async/', {'message': 'hi'}, content_type='application/json', headers=self.headers
+        )
+        self.assertEqual(response.json()['message'], 'Hello!')
+        self.assertEqual(self.slot_free, [True])
+
+
+@override_settings(CHATBOT_SUMMARY_INTERVAL=5)
+class UpdateSummaryTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='backlog', email='backlog@example.com', password=None
+        )
+        self.batches = []
+
+    def summarize(self, user, previous_summary, messages):
+        self.batches.append([message.content for message in messages])
+        return f'summary {len(self.batches)}'
+
+    def add_messages(self, count):
+        start = ChatMessage.objects.filter(user=self.user).count()
+        return ChatMessage.objects.bulk_create(
+            ChatMessage(user=self.user, role='user' if i % 2 == 0 else 'assistant', content=str(i))
+            for i in range(start, start + count)
+        )
+
+    def test_long_backlog_is_folded_in_batches(self):
+        messages = self.add_messages(130)
+        with mock.patch('chatbot.services.summarize_messages', side_effect=self.summarize):
+            summary = update_summary(self.user)
+
+        # Everything but the latest 10 messages, oldest first, 50 at a time
+        self.assertEqual([len(batch) for batch in self.batches], [50, 50, 20])
+        self.assertEqual([m for batch in self.batches for m in batch], [str(i) for i in range(120)])
+        self.assertEqual(summary.content, 'summary 3')
+        self.assertEqual(summary.last_message_id, messages[119].id)
+
+    def test_not_due_until_enough_messages(self):
+        self.add_messages(19)
+        with mock.patch('chatbot.services.summarize_messages', side_effect=self.summarize):
+            self.assertIsNone(update_summary(self.user))
+        self.assertFalse(ChatSummary.objects.exists())
+
+    def test_continues_from_the_previous_summary(self):
+        self.add_messages(20)
+        with mock.patch('chatbot.services.summarize_messages', side_effect=self.summarize):
+            first = update_summary(self.user)
+            self.add_messages(20)
+            second = update_summary(self.user)
+        self.assertEqual(self.batches, [[str(i) for i in range(10)], [str(i) for i in range(10, 30)]])
+        self.assertEqual(second.last_message_id, first.last_message_id + 20)
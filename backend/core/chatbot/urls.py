@@ -1,8 +1,12 @@
 from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
 from . import views
 
 urlpatterns = [
     path('messages/', views.ChatMessageListView.as_view(), name='chat-messages'),
     path('messages/<int:pk>/', views.ChatMessageDetailView.as_view(), name='chat-message-detail'),
     path('chat/', views.ChatView.as_view(), name='chat'),
+    path('chat/stream/', views.ChatStreamView.as_view(), name='chat-stream'),
+    path('chat/async/', csrf_exempt(views.AsyncChatView.as_view()), name='chat-async'),
+    path('usage/', views.LLMUsageReportView.as_view(), name='chat-usage'),
 ]
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Accounting of chat model calls: token usage, latency and answer cache hits
+
+CHATBOT_LLM_LOG controls what is stored:
+    'calls'    - an LLMCallLog row per call plus the LLMUsageDaily counters
+    'counters' - only the LLMUsageDaily counters (no percentiles in reports)
+    'off'      - nothing (calls are still logged to the application log)
+"""
+import logging
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import LLMCallLog, LLMUsageDaily
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+
+def record_llm_call(user, kind, model_name, latency_ms, reply=None,
+                    time_to_first_token_ms=None, cache_hit=False, error=False):
+    """
+    Record one model call (or answer cache hit)
+
+    Args:
+        user: User the call was made for
+        kind: 'chat', 'stream' or 'summary'
+        model_name: Model (or provider) that served the call
+        latency_ms: Total time for the call
+        reply: LLMReply with token usage, if the call completed
+        time_to_first_token_ms: For streamed calls, time until the first chunk
+        cache_hit: Answered from the answer cache without a model call
+        error: The call failed
+    """
+    prompt_tokens = reply.prompt_tokens if reply else 0
+    completion_tokens = reply.output_tokens if reply else 0
+    cached_tokens = reply.cached_tokens if reply else 0
+    logger.info(
+        f"LLM call kind={kind} model={model_name} user={user.pk} latency_ms={latency_ms} "
+        f"ttft_ms={time_to_first_token_ms} prompt_tokens={prompt_tokens} cached_tokens={cached_tokens} "
+        f"completion_tokens={completion_tokens} cache_hit={cache_hit} error={error}"
+    )
+
+    mode = settings.CHATBOT_LLM_LOG
+    if mode == 'off':
+        return
+
+    # Accounting must never break a chat reply
+    try:
+        LLMUsageDaily.objects.get_or_create(date=timezone.localdate(), model_name=model_name, kind=kind)
+        LLMUsageDaily.objects.filter(date=timezone.localdate(), model_name=model_name, kind=kind).update(
+            calls=F('calls') + 1,
+            cache_hits=F('cache_hits') + int(cache_hit),
+            errors=F('errors') + int(error),
+            prompt_tokens=F('prompt_tokens') + prompt_tokens,
+            completion_tokens=F('completion_tokens') + completion_tokens,
+            cached_tokens=F('cached_tokens') + cached_tokens,
+            latency_ms_total=F('latency_ms_total') + latency_ms,
+        )
+        if mode == 'calls':
+            LLMCallLog.objects.create(
+                user=user,
+                kind=kind,
+                model_name=model_name,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cached_tokens=cached_tokens,
+                time_to_first_token_ms=time_to_first_token_ms,
+                latency_ms=latency_ms,
+                cache_hit=cache_hit,
+                error=error,
+            )
+    except Exception as e:
+        logger.error(f"Failed to record LLM call: {e}")
+
+
+def percentiles(queryset, field):
+    """
+    p50/p95/p99 of field over queryset, each read with one ordered, offset query
+    rather than loading every value
+
+    Returns:
+        {"p50": ..., "p95": ..., "p99": ...} (values None when there are no rows)
+    """
+    queryset = queryset.exclude(**{f'{field}__isnull': True})
+    count = queryset.count()
+    result = {}
+    for pct in PERCENTILES:
+        if not count:
+            result[f'p{pct}'] = None
+            continue
+        # Nearest-rank percentile
+        index = max(0, -(-pct * count // 100) - 1)
+        result[f'p{pct}'] = queryset.order_by(field).values_list(field, flat=True)[index]
+    return result
+
+
+def usage_report(days=7):
+    """
+    Usage over the last `days` days (including today)
+
+    Returns:
+        {
+            "start": date, "end": date,
+            "models": [{model_name, calls, cache_hits, errors, prompt_tokens, completion_tokens,
+                        avg_latency_ms, latency_ms: {p50, p95, p99},
+                        time_to_first_token_ms: {p50, p95, p99}}],
+            "daily": [{date, model_name, kind, calls, cache_hits, errors, prompt_tokens,
+                       completion_tokens, cached_tokens, avg_latency_ms}]
+        }
+        Percentiles come from LLMCallLog and are None when calls aren't logged.
+    """
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+
+    daily = []
+    for row in LLMUsageDaily.objects.filter(date__gte=start).order_by('-date', 'model_name', 'kind'):
+        daily.append({
+            'date': row.date,
+            'model_name': row.model_name,
+            'kind': row.kind,
+            'calls': row.calls,
+            'cache_hits': row.cache_hits,
+            'errors': row.errors,
+            'prompt_tokens': row.prompt_tokens,
+            'completion_tokens': row.completion_tokens,
+            'cached_tokens': row.cached_tokens,
+            'avg_latency_ms': round(row.latency_ms_total / row.calls) if row.calls else None,
+        })
+
+    totals = LLMUsageDaily.objects.filter(date__gte=start).values('model_name').annotate(
+        calls=Sum('calls'),
+        cache_hits=Sum('cache_hits'),
+        errors=Sum('errors'),
+        prompt_tokens=Sum('prompt_tokens'),
+        completion_tokens=Sum('completion_tokens'),
+        latency_ms_total=Sum('latency_ms_total'),
+    ).order_by('model_name')
+
+    start_time = timezone.make_aware(datetime.combine(start, time.min))
+    models = []
+    for row in totals:
+        # Model calls only: cache hits and errors would skew the latency distribution
+        calls = LLMCallLog.objects.filter(
+            created_at__gte=start_time, model_name=row['model_name'], cache_hit=False, error=False
+        )
+        latency_ms_total = row.pop('latency_ms_total')
+        models.append({
+            **row,
+            'avg_latency_ms': round(latency_ms_total / row['calls']) if row['calls'] else None,
+            'latency_ms': percentiles(calls, 'latency_ms'),
+            'time_to_first_token_ms': percentiles(calls, 'time_to_first_token_ms'),
+        })
+
+    return {'start': start, 'end': end, 'models': models, 'daily': daily}
@@ -1,25 +1,85 @@
-from multiprocessing import process
 from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.conf import settings
-import google.generativeai as genai
-import os
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from activity.wipe import wipe_user_data
+from .limits import ChatLimitExceeded, acquire_chat_slot, aacquire_chat_slot
 from .models import ChatMessage
 from .serializers import ChatMessageSerializer
-from django.conf import settings as django_settings
+from .usage import usage_report
+from .services import (
+    FALLBACK_MESSAGE, generate_reply, agenerate_reply, stream_reply,
+    refresh_summary_in_background, format_sse
+)
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+CHAT_PAGE_SIZE = 50
+MAX_CHAT_PAGE_SIZE = 200
 
 
 class ChatMessageListView(generics.ListCreateAPIView):
+    """
+    List (keyset-paginated) and create chat messages
+    GET /api/chatbot/messages/?limit=50              (latest page)
+    GET /api/chatbot/messages/?before=<id>&limit=50  (page of older messages)
+    Returns {"messages": [...oldest first...], "has_more": bool, "before": <id to load older, or null>}
+
+    DELETE /api/chatbot/messages/   (delete the whole conversation)
+    Returns {"deleted": {model: count}, "total": count}
+    """
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = ChatMessageSerializer
 
     def get_queryset(self):
-        return ChatMessage.objects.filter(user=self.request.user).order_by('-created_at')[:50]
+        return ChatMessage.objects.filter(user=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        try:
+            limit = min(int(request.query_params.get('limit', CHAT_PAGE_SIZE)), MAX_CHAT_PAGE_SIZE)
+            before = request.query_params.get('before')
+            before = int(before) if before else None
+        except ValueError:
+            return Response(
+                {'error': 'limit and before must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if limit < 1:
+            return Response({'error': 'limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset()
+        if before is not None:
+            anchor = queryset.filter(id=before).values_list('created_at', flat=True).first()
+            if anchor is None:
+                return Response({'error': 'Unknown message id'}, status=status.HTTP_400_BAD_REQUEST)
+            # Seek on (created_at, id) so the page is read straight off the (user, created_at, id) index
+            queryset = queryset.filter(Q(created_at__lt=anchor) | Q(created_at=anchor, id__lt=before))
+
+        messages = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        messages.reverse()
+
+        return Response({
+            'messages': ChatMessageSerializer(messages, many=True).data,
+            'has_more': has_more,
+            'before': messages[0].id if has_more else None,
+        })
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def delete(self, request):
+        return Response(wipe_user_data(request.user, ['chat']))
+
 class ChatMessageDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = ChatMessageSerializer
@@ -39,6 +99,25 @@ class ChatView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        with acquire_chat_slot(request.user):
+            assistant_message = self.reply(request, user_message)
+
+        if assistant_message is None:
+            # Fallback response, not saved so it doesn't end up in the history
+            return Response({
+                'message': FALLBACK_MESSAGE,
+                'role': 'assistant'
+            }, status=status.HTTP_200_OK)
+
+        # With the slot released, so the summary's LLM call holds neither it nor the response
+        refresh_summary_in_background(request.user)
+        return Response({
+            'message': assistant_message,
+            'role': 'assistant'
+        })
+
+    def reply(self, request, user_message):
+        """Save the message and the assistant's reply; returns the reply, or None if the model failed"""
         # Save user message
         ChatMessage.objects.create(
             user=request.user,
@@ -47,338 +126,7 @@ class ChatView(APIView):
         )
 
         try:
-            # Get recent conversation history (last 10 messages)
-            recent_messages = ChatMessage.objects.filter(
-                user=request.user
-            ).order_by('-created_at')[:10]
-
-            # Configure Gemini API
-            genai.configure(api_key=django_settings.GEMINI_API_KEY)
-            
-            # System instruction for the assistant
-            system_instruction = '''You are a helpful AI assistant for a productivity and wellness app called "Smart Desktop Buddies". Your role is to guide users through all features of the application and help them maximize their productivity and well-being.
-
-## APPLICATION OVERVIEW
-Smart Desktop Buddies is an AI-powered companion app designed to help users improve their mental health, productivity, and overall well-being. The app combines task management, mood tracking, focus tools, mindfulness practices, and AI assistance.
-
-## MAIN FEATURES AND PAGES
-
-### 1. DASHBOARD (/dashboard)
-The central hub where users can see:
-- **Welcome Message**: Greets user and includes a link to the AI Chatbot for guidance
-- **Desktop Buddy**: A customizable animated companion (robot, cat, dog, owl, or panda) that provides daily encouragement and reminders. Name and appearance can be customized in Settings.
-- **Focus Timer (Pomodoro)**: 
-  - Set focus duration (25-60 minutes) and break duration (5-10 minutes) using sliders
-  - Tracks focus sessions and automatically suggests breaks
-  - After 3 consecutive sessions, suggests a longer 25-minute rest
-  - Can complete sessions early or skip breaks/rests
-  - Tracks total focus time for analytics
-  - **Reset Button Behavior**: First click stops and resets the timer. If clicked again when the timer is already stopped and reset, it returns to the duration settings (where sliders are visible)
-- **Upcoming Calendar Events**: 
-  - Shows events from connected Google Calendar (up to 30 days ahead, excluding past events)
-  - Displays connected Google email address
-  - "(Up to 30 days)" note displayed in the title
-  - Refresh button syncs calendars and shows toast notification with sync results
-  - Pagination: 5 events per page with next/previous buttons
-  - Events ordered by closest date first
-  - Click "(Change)" link next to email to navigate to Settings calendar section
-- **Today's Tasks**: Quick view of tasks due today or overdue
-- **Daily Motivation**: Inspirational quotes that refresh daily
-
-### 2. MOOD TRACKER (/mood)
-Comprehensive mood logging and analysis:
-- **Mood Entry Form**:
-  - Select mood: very happy, happy, neutral, sad, very sad (with emoji indicators)
-  - Mood score (1-10 scale) with visual guide and color-coded number line
-  - Score buttons (1-10) for easy selection
-  - Optional notes/description (textarea)
-  - Custom date and time selection (calendar picker and time input)
-  - Submit and Cancel buttons
-  - Form validation with error messages
-- **Mood History**: 
-  - View all past mood entries in chronological order
-  - Each entry shows: date, mood emoji, score (if available), and notes
-  - Week view: Calendar picker to select any week (starting Monday)
-  - Shows mood entries for the selected 7-day period
-  - Delete individual entries with confirmation dialog
-  - Clear all entries option
-- **Mood Charts**: 
-  - Line chart showing mood score trends over the selected week
-  - Displays average mood score per day (1-10 scale)
-  - Helps identify patterns and triggers
-  - Dark mode support with proper contrast
-- **Wellness Tips**: Contextual advice based on mood patterns
-
-### 3. TASKS (/tasks)
-Full-featured task management:
-- **Task Features**:
-  - Create tasks with title, description, priority (high/medium/low)
-  - Priority colors: High (red), Medium (light yellow when selected), Low (gray)
-  - Set due dates with deadline tracking (calendar picker and time input)
-  - Mark tasks as completed (checkbox)
-  - Edit and delete tasks
-  - Filter by: All, Pending (active), Completed, Deadline (tasks with due dates)
-  - Tasks sorted by: overdue first, then priority
-- **Task Display**:
-  - Color-coded by priority
-  - Visual indicators for overdue tasks (red background)
-  - Tasks close to deadline (within 24 hours) highlighted
-  - Completed tasks shown with strikethrough
-  - Each task shows: title, priority badge, due date/time, completion status
-- **Filter Menu**: Dropdown menu with selected filter highlighted (blue background in dark mode)
-- **Productivity Tips**: Helpful advice for task management
-
-### 4. ANALYTICS (/analytics)
-Data-driven insights into user's productivity and wellness:
-- **Week Selection**:
-  - Calendar picker to select any week (starting Monday)
-  - Shows data for the selected 7-day period
-  - Displays the week range (start date to end date)
-- **Key Metrics** (for selected week):
-  - Average Focus Time (hours and minutes)
-  - Total Tasks Completed
-  - Average Mood Score (1-10 scale)
-- **Charts and Visualizations**:
-  - **Focus Time Trend**: Line chart showing daily focus time over the selected week
-  - **Task Completion**: Bar chart showing daily tasks completed over the week
-  - **Mood Trends**: Area chart showing mood patterns and average scores over the week
-- **Burnout Analysis**:
-  - Burnout score calculation based on multiple factors
-  - Risk level indicator (Low, Moderate, High, Critical)
-  - Breakdown of contributing factors:
-    * Average mood (inverted: lower mood increases burnout)
-    * Tasks done (reduces burnout)
-    * Tasks close to deadline (within 24 hours)
-    * Tasks exceeded deadline
-    * Upcoming calendar events
-  - Visual display with color-coded risk levels
-- **Detailed Insights**:
-  - **Productivity Analysis**:
-    * Focus time trends (increasing/decreasing/stable)
-    * Average focus hours per day
-    * Best and lowest focus days
-    * Task completion trends and consistency
-    * Mood trends with best and worst days
-  - **Burnout Analysis Metrics**:
-    * Current metrics breakdown
-    * Explanation of burnout score calculation
-    * Real-time calculation display
-- **Data Sources**: Analytics pulls data from focus sessions, completed tasks, mood entries, and calendar events
-
-### 5. MINDFULNESS (/mindfulness)
-Guided mindfulness and meditation practices:
-- **Layout Structure**:
-  - Left Column: Active Session / Choose Your Practice, Recent Sessions, Benefits, Daily Quote (bottom)
-  - Right Column: Today's Practice, Powerful Breathing Technique, Quick Tips
-- **Choose Your Practice**:
-  - Two options: Breathing Exercise and Meditation Session
-  - Select practice type to begin
-- **Breathing Exercise**:
-  - 4-4-8 breathing pattern (inhale 4s, hold 4s, exhale 8s)
-  - Visual breathing circle animation: expands on inhale, holds size during hold, shrinks on exhale
-  - Customizable duration (default 5 minutes)
-  - Tracks breathing cycles
-  - Timer with play/pause controls
-  - **Reset Button Behavior**: First click stops and resets the timer. If clicked again when the timer is already stopped and reset, it returns to the "Choose Your Practice" selection
-- **Meditation Session**:
-  - Timer-based meditation
-  - Customizable duration
-  - Timer with play/pause controls
-  - **Reset Button Behavior**: Same as breathing exercise - first click stops/resets, second click returns to practice selection
-- **Recent Sessions**: 
-  - Located below "Choose Your Practice" section
-  - View past mindfulness sessions with type, duration, and completion date
-  - Clear history option with confirmation dialog
-  - Empty state message when no sessions
-- **Daily Quote**: 
-  - Located at the very bottom of the left column (below Benefits)
-  - Rotating inspirational quotes for mindfulness
-- **Benefits Card**: 
-  - Information about mindfulness benefits
-  - Located below Recent Sessions in left column
-- **Quick Tips**: 
-  - Practical mindfulness advice
-  - Located in right column below "Powerful Breathing Technique"
-- **Today's Practice**: 
-  - Shows current practice status
-  - Located in right column
-
-### 6. GOALS (/goals)
-Goal setting and progress tracking:
-- **Goal Management**:
-  - Create goals with title, description, and target date (calendar picker)
-  - Add new goal button opens form
-  - Edit existing goals (click edit icon)
-  - Delete goals with confirmation dialog
-  - Track goal status: not_started, in_progress, completed
-  - Update goal status using status selector
-  - Visual status badges: Not Started (gray), In Progress (blue), Completed (green)
-- **Goal Display**:
-  - List of all goals with status badges
-  - Shows goal title, description, target date, and current status
-  - Goals sorted by status and date
-  - Empty state when no goals exist
-- **Features**:
-  - Form validation
-  - Loading states during save/delete operations
-  - Error handling with messages
-
-### 7. CALENDAR INTEGRATION (Settings)
-Google Calendar synchronization:
-- **Connection**:
-  - Connect Google Calendar account via OAuth (button in Settings)
-  - View connected email address (account_email field)
-  - Connection status indicators (active/inactive, needs refresh)
-  - Disconnect calendar with confirmation dialog
-- **Event Management**:
-  - Events synced up to 30 days ahead (from current date)
-  - Past events automatically excluded from sync and cleaned up
-  - Manual sync/refresh option per connection or "Sync All Calendars" button
-  - Sync shows toast notification with results (number of events synced, created, updated)
-  - "Needs refresh" indicator when token needs refreshing
-- **Display**:
-  - Upcoming events shown on dashboard (up to 30 days ahead)
-  - Pagination: 5 events per page with next/previous controls
-  - Events ordered by closest date first
-  - Event details: title, date, time, color-coded dots
-  - Refresh button on dashboard syncs and shows toast notification
-
-### 8. SETTINGS (/settings)
-User preferences and data management:
-- **Navigation Bar**: Standard navigation bar (not just "Back to Dashboard") with all page links. Settings icon glows when on settings page.
-- **Profile Settings**:
-  - Update username (with save button and loading state)
-  - Toast notification on successful update
-- **Appearance Settings**:
-  - Theme selection (Light/Dark mode) - dropdown selector
-  - Customize Desktop Buddy name (text input)
-  - Choose Buddy appearance (robot, cat, dog, owl, panda) - dropdown selector
-  - Changes tracked for unsaved changes prompt
-- **Calendar Integration**:
-  - Connect Google Calendar (OAuth button)
-  - View all connected calendars with email addresses
-  - Sync individual calendars or "Sync All Calendars" button
-  - Sync shows toast notification with results
-  - Disconnect calendar with confirmation dialog
-  - Connection status: active/inactive, needs refresh indicator
-- **Data Management**:
-  - Export all data as PDF (tasks, mood entries, chat messages, analytics) - button with loading state
-  - Clear all data (with detailed confirmation dialog listing what will be deleted)
-  - Reset settings to defaults (with confirmation dialog)
-  - Toast notifications for all actions
-- **Unsaved Changes Management**:
-  - "Unsaved Changes" card appears when preferences are modified
-  - Cancel button discards changes and restores original preferences
-  - Save Changes button saves to localStorage and updates original preferences
-  - **Navigation Guard**: Prevents losing unsaved changes when:
-    * Navigating to other pages (shows dialog: Save & Continue, Discard Changes, Stay on Page)
-    * Using browser back/forward buttons
-    * Refreshing or closing the page (browser warning)
-  - Toast notifications for save/cancel actions
-
-### 9. AI CHATBOT (/chat)
-The current feature - you are this chatbot:
-- **Features**:
-  - Conversational AI powered by Google Gemini (gemini-3-flash-preview model)
-  - Chat history saved in database (last 50 messages)
-  - Clear all chats button in header (with confirmation dialog)
-  - After clearing, returns to welcome message
-  - Welcome message on first use or after clearing chats
-  - Online status indicator (green dot) beside "AI Chatbot" title in header
-- **Interface**:
-  - Message input always visible at bottom (no scrolling needed)
-  - ScrollArea for message history
-  - Bot messages: white background (light mode) / gray-800 (dark mode)
-  - User messages: blue background
-  - Bold text in bot messages: bright blue for better readability
-  - Markdown formatting: Headings (###, ##, #), bullet points (*), numbered lists (1.), bold text (**)
-  - Loading indicator with animated dots
-  - Timestamps on messages
-- **Capabilities**: 
-  - Answer questions about the app
-  - Provide step-by-step guidance for all features
-  - Offer support and encouragement
-  - Explain how features work together
-  - Suggest best practices
-
-## HOW TO GUIDE USERS
-
-When users ask about features:
-1. **Explain the feature clearly** - What it does and why it's useful
-2. **Provide step-by-step instructions** - How to access and use the feature
-3. **Give practical examples** - Show how the feature helps in real scenarios
-4. **Suggest best practices** - Tips for getting the most out of each feature
-5. **Connect features** - Explain how features work together (e.g., mood tracking + analytics)
-
-## COMMUNICATION STYLE
-- Be friendly, encouraging, and supportive
-- Use emojis sparingly but appropriately (👋, 📊, 🎯, etc.)
-- Keep responses concise but comprehensive
-- Use clear, simple language
-- Be patient and helpful with technical questions
-- Celebrate user achievements and progress
-- Offer encouragement during difficult times
-
-## NAVIGATION HELP
-The app has a navigation bar at the top with these pages:
-- Dashboard (home)
-- Mood Tracker
-- Tasks
-- Analytics
-- Mindfulness
-- AI Chatbot (current page)
-- Settings
-
-Users can access any page by clicking the navigation buttons.
-
-## RESPONSE GUIDELINES
-- If asked "how do I...", provide clear step-by-step instructions
-- If asked "what is...", explain the feature and its benefits
-- If asked "where can I...", direct them to the specific page/feature
-- If asked about data or privacy, explain that data is stored securely and can be exported/deleted
-- Always be helpful and aim to make the user feel supported and empowered
-
-Remember: Your goal is to help users understand and effectively use all features of Smart Desktop Buddies to improve their productivity, mental health, and overall well-being.'''
-            
-            # Get recent messages in chronological order (excluding the current message we just saved)
-            # The most recent message is the one we just saved, so we skip it
-            recent_messages_list = list(reversed(recent_messages[1:])) if len(recent_messages) > 1 else []
-            
-            # Build conversation history for Gemini
-            # Gemini expects alternating user/assistant messages
-            conversation_history = []
-            
-            # Check if this is the first conversation (no previous messages except the one we just saved)
-            is_first_conversation = len(recent_messages_list) == 0
-            
-            # Build conversation history
-            if not is_first_conversation:
-                for msg in recent_messages_list:
-                    if msg.role == 'user':
-                        conversation_history.append({'role': 'user', 'parts': [msg.content]})
-                    elif msg.role == 'assistant':
-                        conversation_history.append({'role': 'model', 'parts': [msg.content]})
-            
-            # Initialize the model - using gemini-1.5-flash (faster and cost-effective)
-            # Alternative: 'gemini-1.5-pro' for better quality
-            model = genai.GenerativeModel(model_name='gemini-3-flash-preview')
-            
-            if is_first_conversation:
-                # First message - include system instruction in the prompt
-                full_prompt = f"{system_instruction}\n\nUser: {user_message}\nAssistant:"
-                response = model.generate_content(full_prompt)
-                assistant_message = response.text
-            else:
-                # Start a chat session with history
-                # Prepend system instruction to the first user message in history
-                if conversation_history and conversation_history[0]['role'] == 'user':
-                    conversation_history[0]['parts'][0] = f"{system_instruction}\n\n{conversation_history[0]['parts'][0]}"
-                
-                chat = model.start_chat(history=conversation_history)
-                
-                # Send the current user message to Gemini
-                response = chat.send_message(user_message)
-                assistant_message = response.text
+            assistant_message = generate_reply(request.user, user_message)
 
             # Save assistant response
             ChatMessage.objects.create(
@@ -386,24 +134,166 @@ Remember: Your goal is to help users understand and effectively use all features
                 role='assistant',
                 content=assistant_message
             )
-
-            return Response({
-                'message': assistant_message,
-                'role': 'assistant'
-            })
+            return assistant_message
 
         except Exception as e:
-            print(f"Gemini API error: {e}")
-            # Fallback response
-            fallback_message = "I'm sorry, I'm having trouble connecting right now. Please try again later. " 
+            logger.error(f"Gemini API error: {e}")
+            return None
+
+class ChatStreamView(APIView):
+    """
+    Stream the assistant reply as Server-Sent Events
+    POST /api/chatbot/chat/stream/
+    Body: {"message": "..."}
+
+    Emits `chunk` events ({"text": ...}) as Gemini produces them, then a single
+    `done` event with the assembled message once it has been saved.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
 
-            ChatMessage.objects.create(
-                user=request.user,
-                role='assistant',
-                content=fallback_message
+    def post(self, request):
+        user_message = request.data.get('message', '').strip()
+
+        if not user_message:
+            return Response(
+                {'error': 'Message is required'},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            return Response({
-                'message': fallback_message,
-                'role': 'assistant'
-            }, status=status.HTTP_200_OK)
\ No newline at end of file
+        user = request.user
+        # Held until the stream finishes; if the stream is never read, the slot
+        # expires on its own after CHATBOT_SLOT_TIMEOUT
+        slot = acquire_chat_slot(user)
+        try:
+            ChatMessage.objects.create(user=user, role='user', content=user_message)
+        except Exception:
+            slot.release()
+            raise
+
+        def event_stream():
+            parts = []
+            message = None
+            fallback = False
+            try:
+                try:
+                    for text in stream_reply(user, user_message):
+                        parts.append(text)
+                        yield format_sse('chunk', {'text': text})
+                except Exception as e:
+                    logger.error(f"Gemini streaming error: {e}")
+                    if not parts:
+                        fallback = True
+                        yield format_sse('chunk', {'text': FALLBACK_MESSAGE})
+                finally:
+                    # Persist whatever was produced, even if the client went away mid-stream
+                    if parts:
+                        message = ChatMessage.objects.create(user=user, role='assistant', content=''.join(parts))
+                yield format_sse('done', {
+                    'id': message.id if message else None,
+                    'message': FALLBACK_MESSAGE if fallback else (message.content if message else ''),
+                    'role': 'assistant',
+                })
+            finally:
+                slot.release()
+                # Once the slot is free, and without holding the response open for it
+                if message is not None:
+                    refresh_summary_in_background(user)
+
+        response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Don't let proxies buffer the stream
+        return response
+
+
+def authenticate_jwt(request):
+    """Authenticate a plain Django request with the same JWT scheme DRF uses"""
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+class AsyncChatView(View):
+    """
+    Async variant of ChatView for ASGI deployments
+    POST /api/chatbot/chat/async/
+    Body: {"message": "..."}
+
+    The Gemini call is awaited instead of blocking a worker thread, so a single
+    ASGI worker (e.g. `uvicorn core.asgi:application`) can hold many chats in flight.
+    Responses match ChatView.
+    """
+
+    async def post(self, request):
+        user = await sync_to_async(authenticate_jwt)(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            data = {}
+        user_message = str(data.get('message', '')).strip()
+
+        if not user_message:
+            return JsonResponse(
+                {'error': 'Message is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            slot = await aacquire_chat_slot(user)
+        except ChatLimitExceeded as e:
+            response = JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+            response['Retry-After'] = str(e.wait)
+            return response
+
+        replied = False
+        try:
+            await ChatMessage.objects.acreate(user=user, role='user', content=user_message)
+
+            try:
+                assistant_message = await agenerate_reply(user, user_message)
+            except Exception as e:
+                logger.error(f"Gemini API error: {e}")
+                assistant_message = FALLBACK_MESSAGE
+            else:
+                await ChatMessage.objects.acreate(user=user, role='assistant', content=assistant_message)
+                replied = True
+        finally:
+            await slot.arelease()
+
+        if replied:
+            refresh_summary_in_background(user)
+
+        return JsonResponse({
+            'message': assistant_message,
+            'role': 'assistant'
+        })
+
+
+class LLMUsageReportView(APIView):
+    """
+    LLM token usage and latency per model (staff only)
+    GET /api/chatbot/usage/?days=7
+    """
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response(
+                {'error': 'days must be a number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= days <= 90:
+            return Response(
+                {'error': 'days must be between 1 and 90'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(usage_report(days))
@@ -81,9 +81,22 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than the shared in-memory database, whose table locks fail
+        # at once instead of waiting, so tests of concurrent calendar syncs behave
+        # as they do in production
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Cache - set REDIS_URL to share caches (e.g. chat concurrency limits) between worker processes
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -168,10 +181,62 @@ AUTH_USER_MODEL = 'users.CustomUser'
 GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID', '')
 GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET', '')
 GOOGLE_REDIRECT_URI = os.environ.get('GOOGLE_REDIRECT_URI', 'http://localhost:8000/api/calendar/google/callback/')
+# Events per page when listing Google Calendar events (Google allows up to 2500)
+CALENDAR_SYNC_PAGE_SIZE = int(os.environ.get('CALENDAR_SYNC_PAGE_SIZE', '250'))
+# "Sync all": connections synced in parallel, at most this many per provider at once,
+# and seconds each connection's sync may take
+CALENDAR_SYNC_WORKERS = int(os.environ.get('CALENDAR_SYNC_WORKERS', '8'))
+CALENDAR_SYNC_PROVIDER_CONCURRENCY = int(os.environ.get('CALENDAR_SYNC_PROVIDER_CONCURRENCY', '4'))
+CALENDAR_SYNC_TIMEOUT = int(os.environ.get('CALENDAR_SYNC_TIMEOUT', '120'))
+# Seconds a Google Calendar API request may wait on the network before failing; the sync
+# timeout is only checked between pages, so this is what bounds a hung request
+CALENDAR_API_TIMEOUT = int(os.environ.get('CALENDAR_API_TIMEOUT', '30'))
+# run_calendar_worker: minutes between scheduled syncs of a connection, and seconds
+# between polls of the job queue when it is empty
+CALENDAR_SYNC_INTERVAL = int(os.environ.get('CALENDAR_SYNC_INTERVAL', '15'))
+CALENDAR_WORKER_POLL_INTERVAL = float(os.environ.get('CALENDAR_WORKER_POLL_INTERVAL', '5'))
 ENCRYPTION_KEY = os.environ.get('ENCRYPTION_KEY', '')
 
 # Gemini API Configuration
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
+# Cache the chatbot system instruction server-side (Gemini context caching)
+GEMINI_CONTEXT_CACHE = os.environ.get('GEMINI_CONTEXT_CACHE', 'False').lower() == 'true'
+GEMINI_CONTEXT_CACHE_TTL = int(os.environ.get('GEMINI_CONTEXT_CACHE_TTL', '3600'))  # seconds
+# Chat model provider: 'gemini', or 'fake' for local load testing without API calls
+CHATBOT_LLM_PROVIDER = os.environ.get('CHATBOT_LLM_PROVIDER', 'gemini')
+CHATBOT_FAKE_LATENCY = float(os.environ.get('CHATBOT_FAKE_LATENCY', '0.5'))  # seconds before the first token
+CHATBOT_FAKE_TOKENS_PER_SECOND = float(os.environ.get('CHATBOT_FAKE_TOKENS_PER_SECOND', '50'))
+# Chat model calls: deadline per attempt, retries for transient errors within a total time budget,
+# and the circuit breaker that fails fast after consecutive failures
+CHATBOT_LLM_TIMEOUT = float(os.environ.get('CHATBOT_LLM_TIMEOUT', '20'))  # seconds
+CHATBOT_LLM_RETRIES = int(os.environ.get('CHATBOT_LLM_RETRIES', '2'))
+CHATBOT_LLM_RETRY_BACKOFF = float(os.environ.get('CHATBOT_LLM_RETRY_BACKOFF', '0.5'))  # seconds, doubled per retry
+CHATBOT_LLM_RETRY_BUDGET = float(os.environ.get('CHATBOT_LLM_RETRY_BUDGET', '30'))  # seconds
+CHATBOT_BREAKER_THRESHOLD = int(os.environ.get('CHATBOT_BREAKER_THRESHOLD', '5'))
+CHATBOT_BREAKER_COOLDOWN = int(os.environ.get('CHATBOT_BREAKER_COOLDOWN', '30'))  # seconds
+# Chat requests calling the LLM: in-flight limits per user and overall, and the queue for the overall cap
+CHATBOT_MAX_CONCURRENT_PER_USER = int(os.environ.get('CHATBOT_MAX_CONCURRENT_PER_USER', '1'))
+CHATBOT_MAX_CONCURRENT_LLM_CALLS = int(os.environ.get('CHATBOT_MAX_CONCURRENT_LLM_CALLS', '10'))
+CHATBOT_QUEUE_SIZE = int(os.environ.get('CHATBOT_QUEUE_SIZE', '20'))
+CHATBOT_QUEUE_TIMEOUT = float(os.environ.get('CHATBOT_QUEUE_TIMEOUT', '10'))  # seconds
+CHATBOT_RETRY_AFTER = int(os.environ.get('CHATBOT_RETRY_AFTER', '5'))  # seconds, sent with 429 responses
+CHATBOT_SLOT_TIMEOUT = int(os.environ.get('CHATBOT_SLOT_TIMEOUT', '120'))  # seconds
+# Chat history sent with each message is capped at this many (estimated) tokens
+CHATBOT_HISTORY_TOKEN_BUDGET = int(os.environ.get('CHATBOT_HISTORY_TOKEN_BUDGET', '2000'))
+# Older messages are folded into the rolling chat summary every this many turns
+CHATBOT_SUMMARY_INTERVAL = int(os.environ.get('CHATBOT_SUMMARY_INTERVAL', '5'))
+# Reuse answers to repeated app questions asked without chat history
+CHATBOT_ANSWER_CACHE = os.environ.get('CHATBOT_ANSWER_CACHE', 'True').lower() == 'true'
+# Send only the app guide sections relevant to each message instead of the whole guide
+CHATBOT_GUIDE_RETRIEVAL = os.environ.get('CHATBOT_GUIDE_RETRIEVAL', 'True').lower() == 'true'
+CHATBOT_GUIDE_TOP_K = int(os.environ.get('CHATBOT_GUIDE_TOP_K', '3'))
+# Answer plain navigation questions from the app guide without calling the LLM
+CHATBOT_ROUTER = os.environ.get('CHATBOT_ROUTER', 'True').lower() == 'true'
+CHATBOT_ROUTER_MIN_CONFIDENCE = float(os.environ.get('CHATBOT_ROUTER_MIN_CONFIDENCE', '0.8'))
+# Also log routed messages' text (at DEBUG), for tuning the rules; off by default as messages are personal
+CHATBOT_ROUTER_LOG_MESSAGES = os.environ.get('CHATBOT_ROUTER_LOG_MESSAGES', 'False').lower() == 'true'
+# LLM call accounting: 'calls' (per-call rows + daily counters), 'counters' (daily counters only) or 'off'
+CHATBOT_LLM_LOG = os.environ.get('CHATBOT_LLM_LOG', 'calls')
 
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -0,0 +1,80 @@
+"""
+Measure MoodStatsView latency for a user with a large mood history.
+
+Everything is created inside a transaction that is rolled back at the end,
+so the command leaves the database untouched.
+"""
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from activity.rollups import rebuild_daily_stats
+from mood_tracker.models import MoodEntry
+from mood_tracker.views import MoodStatsView
+
+
+class Command(BaseCommand):
+    help = 'Benchmark /api/mood-log/stats/ against a synthetic user with many mood entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=10000, help='Mood entries for the synthetic user')
+        parser.add_argument('--days', type=int, default=365, help='Spread entries over this many past days')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests to issue')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self._create_user_with_entries(options['entries'], options['days'])
+            self._benchmark(user, options['iterations'], options['entries'])
+            transaction.set_rollback(True)
+
+    def _create_user_with_entries(self, count, days):
+        User = get_user_model()
+        user = User.objects.create_user(
+            username='mood-benchmark', email='mood-benchmark@example.com', password=None
+        )
+
+        moods = [choice for choice, _ in MoodEntry.MOOD_CHOICES]
+        entries = MoodEntry.objects.bulk_create(
+            [MoodEntry(user=user, mood=random.choice(moods)) for _ in range(count)],
+            batch_size=1000,
+        )
+        # bulk_create applies auto_now_add, so spread the timestamps afterwards
+        now = timezone.now()
+        for entry in entries:
+            entry.created_at = now - timedelta(seconds=random.randint(0, days * 86400))
+        MoodEntry.objects.bulk_update(entries, ['created_at'], batch_size=1000)
+        rebuild_daily_stats(user=user)
+        return user
+
+    def _benchmark(self, user, iterations, entries):
+        factory = APIRequestFactory()
+        view = MoodStatsView.as_view()
+
+        def request_stats():
+            request = factory.get('/api/mood-log/stats/')
+            force_authenticate(request, user=user)
+            response = view(request)
+            response.render()
+            return response
+
+        with CaptureQueriesContext(connection) as queries:
+            request_stats()  # Warm-up, also used for the query count
+
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            request_stats()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        self.stdout.write(f'Entries:     {entries}')
+        self.stdout.write(f'Queries:     {len(queries)}')
+        self.stdout.write(f'Mean:        {statistics.mean(timings):.1f} ms')
+        self.stdout.write(f'Median:      {statistics.median(timings):.1f} ms')
+        self.stdout.write(f'Max:         {timings[-1]:.1f} ms')
@@ -3,6 +3,20 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Numeric scales used by the stats views: 1-5 per mood, and 1-3 per band
+# (positive / neutral / negative) for the analytics page
+MOOD_VALUES = {'very_happy': 5, 'happy': 4, 'neutral': 3, 'sad': 2, 'very_sad': 1}
+MOOD_BANDS = {'very_happy': 3, 'happy': 3, 'neutral': 2, 'sad': 1, 'very_sad': 1}
+
+
+def mood_value_expression(value_map, default):
+    """Case/When expression that maps the ``mood`` column to a numeric score"""
+    return models.Case(
+        *[models.When(mood=mood, then=models.Value(value)) for mood, value in value_map.items()],
+        default=models.Value(default),
+        output_field=models.IntegerField(),
+    )
+
 class MoodEntry(models.Model):
     MOOD_CHOICES = [
         ('very_happy', 'Very Happy'),
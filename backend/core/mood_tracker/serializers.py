@@ -55,9 +55,11 @@ class MoodEntrySerializer(serializers.ModelSerializer):
         instance.save()
         
         # Now update created_at if we have a custom value
-        # This bypasses auto_now_add by using update()
+        # auto_now_add only applies on insert, so a second save keeps it and
+        # still fires the signals that maintain the daily stats rollup
         if parsed_created_at:
-            MoodEntry.objects.filter(pk=instance.pk).update(created_at=parsed_created_at)
+            instance.created_at = parsed_created_at
+            instance.save(update_fields=['created_at'])
             instance.refresh_from_db()
         
         return instance 
\ No newline at end of file
@@ -1,10 +1,12 @@
 from rest_framework import generics, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Avg, Q, Sum
 from django.utils import timezone
 from datetime import timedelta
-from .models import MoodEntry
+from activity.models import DailyUserStats
+from activity.wipe import wipe_user_data
+from .models import MoodEntry, MOOD_VALUES, mood_value_expression
 from .serializers import MoodEntrySerializer
 
 class MoodEntryListCreateView(generics.ListCreateAPIView):
@@ -17,6 +19,13 @@ class MoodEntryListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def delete(self, request):
+        """
+        Delete all of the user's mood entries
+        DELETE /api/mood-log/
+        """
+        return Response(wipe_user_data(request.user, ['mood']))
+
 class MoodEntryDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = MoodEntrySerializer
@@ -34,104 +43,75 @@ class MoodStatsView(APIView):
         # Mood counts by type
         mood_counts = MoodEntry.objects.filter(user=user).values('mood').annotate(count=Count('mood'))
         
-        # Weekly trend (last 7 days)
+        # Weekly (7 days) and monthly (30 days) averages, plus the last 4 rolling
+        # weeks, in a single conditional aggregate over the last 30 days
         week_ago = now - timedelta(days=7)
-        weekly_entries = MoodEntry.objects.filter(
-            user=user,
-            created_at__gte=week_ago
-        ).order_by('created_at')
-        
-        # Monthly trend (last 30 days)
         month_ago = now - timedelta(days=30)
-        monthly_entries = MoodEntry.objects.filter(
-            user=user,
-            created_at__gte=month_ago
-        ).order_by('created_at')
+        week_bounds = [(now - timedelta(weeks=i+1), now - timedelta(weeks=i)) for i in range(4)]
         
-        # Calculate average mood values
-        mood_value_map = {
-            'very_happy': 5,
-            'happy': 4,
-            'neutral': 3,
-            'sad': 2,
-            'very_sad': 1,
+        mood_value = mood_value_expression(MOOD_VALUES, 3)
+        windows = {
+            'weekly': Q(created_at__gte=week_ago),
+            'monthly': Q(created_at__gte=month_ago),
         }
+        for i, (week_start, week_end) in enumerate(week_bounds):
+            windows[f'week_{i}'] = Q(created_at__gte=week_start, created_at__lt=week_end)
         
-        # Weekly average
-        weekly_avg = 0
-        if weekly_entries.exists():
-            total = sum(mood_value_map.get(entry.mood, 3) for entry in weekly_entries)
-            weekly_avg = round(total / weekly_entries.count(), 2)
+        aggregates = {}
+        for name, window in windows.items():
+            aggregates[f'{name}_sum'] = Sum(mood_value, filter=window)
+            aggregates[f'{name}_count'] = Count('id', filter=window)
+        totals = MoodEntry.objects.filter(user=user, created_at__gte=month_ago).aggregate(**aggregates)
         
-        # Monthly average
-        monthly_avg = 0
-        if monthly_entries.exists():
-            total = sum(mood_value_map.get(entry.mood, 3) for entry in monthly_entries)
-            monthly_avg = round(total / monthly_entries.count(), 2)
+        def window_average(name):
+            count = totals[f'{name}_count']
+            return round(totals[f'{name}_sum'] / count, 2) if count else None
         
-        # Overall average
-        all_entries = MoodEntry.objects.filter(user=user)
-        overall_avg = 0
-        if all_entries.exists():
-            total = sum(mood_value_map.get(entry.mood, 3) for entry in all_entries)
-            overall_avg = round(total / all_entries.count(), 2)
+        weekly_avg = window_average('weekly') or 0
+        monthly_avg = window_average('monthly') or 0
+        
+        # Overall average and daily breakdown come from the per-day rollups
+        overall = DailyUserStats.objects.filter(user=user).aggregate(
+            mood_sum=Sum('mood_sum'), mood_count=Sum('mood_count')
+        )
+        total_entries = overall['mood_count'] or 0
+        overall_avg = round(overall['mood_sum'] / total_entries, 2) if total_entries else 0
         
         # Daily breakdown for last 7 days
-        daily_breakdown = []
-        for i in range(7):
-            day = now - timedelta(days=i)
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
-            day_entries = MoodEntry.objects.filter(
-                user=user,
-                created_at__gte=day_start,
-                created_at__lte=day_end
+        today = timezone.localdate()
+        stats_by_day = {
+            stats.date: stats
+            for stats in DailyUserStats.objects.filter(
+                user=user, date__gte=today - timedelta(days=6), date__lte=today
             )
+        }
+        daily_breakdown = []
+        for i in range(6, -1, -1):  # Oldest to newest
+            day = today - timedelta(days=i)
+            stats = stats_by_day.get(day)
             
-            if day_entries.exists():
-                day_avg = sum(mood_value_map.get(entry.mood, 3) for entry in day_entries) / day_entries.count()
+            if stats and stats.mood_count:
                 daily_breakdown.append({
-                    'date': day_start.date().isoformat(),
-                    'average': round(day_avg, 2),
-                    'count': day_entries.count()
+                    'date': day.isoformat(),
+                    'average': round(stats.mood_sum / stats.mood_count, 2),
+                    'count': stats.mood_count
                 })
             else:
                 daily_breakdown.append({
-                    'date': day_start.date().isoformat(),
+                    'date': day.isoformat(),
                     'average': None,
                     'count': 0
                 })
         
-        daily_breakdown.reverse()  # Oldest to newest
-        
         # Weekly breakdown (last 4 weeks)
         weekly_breakdown = []
-        for i in range(4):
-            week_start = now - timedelta(weeks=i+1)
-            week_end = now - timedelta(weeks=i)
-            
-            week_entries = MoodEntry.objects.filter(
-                user=user,
-                created_at__gte=week_start,
-                created_at__lt=week_end
-            )
-            
-            if week_entries.exists():
-                week_avg = sum(mood_value_map.get(entry.mood, 3) for entry in week_entries) / week_entries.count()
-                weekly_breakdown.append({
-                    'week_start': week_start.date().isoformat(),
-                    'week_end': week_end.date().isoformat(),
-                    'average': round(week_avg, 2),
-                    'count': week_entries.count()
-                })
-            else:
-                weekly_breakdown.append({
-                    'week_start': week_start.date().isoformat(),
-                    'week_end': week_end.date().isoformat(),
-                    'average': None,
-                    'count': 0
-                })
+        for i, (week_start, week_end) in enumerate(week_bounds):
+            weekly_breakdown.append({
+                'week_start': week_start.date().isoformat(),
+                'week_end': week_end.date().isoformat(),
+                'average': window_average(f'week_{i}'),
+                'count': totals[f'week_{i}_count']
+            })
         
         weekly_breakdown.reverse()
         
@@ -175,5 +155,5 @@ class MoodStatsView(APIView):
             'daily_breakdown': daily_breakdown,
             'weekly_breakdown': weekly_breakdown,
             'patterns': patterns,
-            'total_entries': all_entries.count()
+            'total_entries': total_entries
         }) 
\ No newline at end of file
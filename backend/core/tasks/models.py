@@ -25,6 +25,28 @@ class Task(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status', 'due_date']),
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['user', 'updated_at']),
+        ]
     
     def __str__(self):
-        return f"{self.title} - {self.status}" 
\ No newline at end of file
+        return f"{self.title} - {self.status}"
+
+class TaskTombstone(models.Model):
+    """
+    Records a deleted task id so delta sync clients can drop it locally
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='task_tombstones')
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['deleted_at']
+        indexes = [
+            models.Index(fields=['user', 'deleted_at']),
+        ]
+    
+    def __str__(self):
+        return f"Deleted task {self.task_id} ({self.deleted_at})" 
@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TaskCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (user, -created_at), so every page costs the same
+    no matter how deep the client scrolls
+    """
+    ordering = '-created_at'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        # ?ordering=due_date: soonest deadline first (the view leaves out tasks without one)
+        if request.query_params.get('ordering') == 'due_date':
+            return ('due_date', 'id')
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,126 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import Task, TaskTombstone
+from .views import TOMBSTONE_RETENTION
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class TaskAPITestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='tasks', email='tasks@example.com', password=None)
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+        self.now = timezone.now()
+
+    def get(self, url, **params):
+        response = self.client.get(url, params, headers=self.headers)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def create_task(self, title, status='todo', due_in=None, **fields):
+        due_date = self.now + due_in if due_in is not None else None
+        return Task.objects.create(user=self.user, title=title, status=status, due_date=due_date, **fields)
+
+
+class TaskListTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_task('done', status='completed', due_in=-timedelta(days=1))
+        self.create_task('late', due_in=-timedelta(days=1))
+        self.create_task('soon', status='in_progress', due_in=timedelta(hours=2))
+        self.create_task('later', due_in=timedelta(days=3))
+        self.create_task('someday')
+        other = get_user_model().objects.create_user(username='other', email='other@example.com', password=None)
+        Task.objects.create(user=other, title='not mine')
+
+    def titles(self, **params):
+        return [task['title'] for task in self.get('/api/tasks/', **params)['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.titles(status='todo,in_progress'), ['someday', 'later', 'soon', 'late'])
+        self.assertEqual(self.titles(status='completed'), ['done'])
+        self.assertEqual(self.titles(overdue='true'), ['late'])
+        self.assertEqual(self.titles(due_after=(self.now + timedelta(days=1)).isoformat()), ['later'])
+        self.assertEqual(self.titles(due_before=self.now.isoformat()), ['late', 'done'])
+
+    def test_malformed_date_is_rejected(self):
+        response = self.client.get('/api/tasks/', {'due_before': 'tomorrow'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pages_by_due_date(self):
+        page = self.get('/api/tasks/', ordering='due_date', page_size=2)
+        titles = [task['title'] for task in page['results']]
+        while page['next']:
+            page = self.client.get(page['next'], headers=self.headers).json()
+            titles += [task['title'] for task in page['results']]
+        # Soonest first; tasks without a due date are left out
+        self.assertEqual(sorted(titles[:2]), ['done', 'late'])
+        self.assertEqual(titles[2:], ['soon', 'later'])
+
+    def test_counts(self):
+        self.assertEqual(
+            self.get('/api/tasks/counts/'),
+            {'total': 5, 'completed': 1, 'pending': 4, 'overdue': 1},
+        )
+
+
+class TaskDeltaSyncTests(TaskAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.kept = self.create_task('kept')
+        self.edited = self.create_task('edited')
+        self.removed = self.create_task('removed')
+
+    def sync(self, since=''):
+        return self.get('/api/tasks/', since=since)
+
+    def test_empty_cursor_sends_a_snapshot(self):
+        changes = self.sync()
+        self.assertTrue(changes['reset'])
+        self.assertEqual(changes['deleted'], [])
+        self.assertEqual({task['title'] for task in changes['tasks']}, {'kept', 'edited', 'removed'})
+
+    def test_changes_and_deletions_since_cursor(self):
+        cursor = self.sync()['cursor']
+        self.edited.title = 'edited again'
+        self.edited.save()
+        response = self.client.delete(f'/api/tasks/{self.removed.id}/', headers=self.headers)
+        self.assertEqual(response.status_code, 204)
+
+        changes = self.sync(cursor)
+        self.assertFalse(changes['reset'])
+        self.assertEqual([task['title'] for task in changes['tasks']], ['edited again'])
+        self.assertEqual(changes['deleted'], [self.removed.id])
+
+        # Nothing new after the latest cursor
+        changes = self.sync(changes['cursor'])
+        self.assertEqual((changes['tasks'], changes['deleted']), ([], []))
+
+    def test_other_users_tombstones_are_hidden(self):
+        cursor = self.sync()['cursor']
+        other = get_user_model().objects.create_user(username='other', email='other@example.com', password=None)
+        TaskTombstone.objects.create(user=other, task_id=12345)
+        self.assertEqual(self.sync(cursor)['deleted'], [])
+
+    def test_naive_cursor_is_local_time(self):
+        since = timezone.localtime(self.now - timedelta(hours=1)).replace(tzinfo=None)
+        changes = self.sync(since.isoformat())
+        self.assertFalse(changes['reset'])
+        self.assertEqual(len(changes['tasks']), 3)
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get('/api/tasks/', {'since': 'yesterday'}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_expired_cursor_resets(self):
+        old = TaskTombstone.objects.create(user=self.user, task_id=999)
+        TaskTombstone.objects.filter(pk=old.pk).update(deleted_at=self.now - TOMBSTONE_RETENTION - timedelta(days=1))
+
+        changes = self.sync((self.now - TOMBSTONE_RETENTION - timedelta(days=2)).isoformat())
+        self.assertTrue(changes['reset'])
+        self.assertEqual(changes['deleted'], [])
+        self.assertEqual(len(changes['tasks']), 3)
+        # Tombstones past the retention window are pruned
+        self.assertFalse(TaskTombstone.objects.filter(pk=old.pk).exists())
@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path('', views.TaskListCreateView.as_view(), name='task-list-create'),
+    path('counts/', views.TaskCountsView.as_view(), name='task-counts'),
     path('<int:pk>/', views.TaskDetailView.as_view(), name='task-detail'),
     path('complete/<int:pk>/', views.TaskCompleteView.as_view(), name='task-complete'),
 ] 
\ No newline at end of file
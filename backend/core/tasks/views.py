@@ -1,17 +1,147 @@
 from rest_framework import generics, permissions
-from .models import Task
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
+from activity.wipe import wipe_user_data
+from .models import Task, TaskTombstone
+from .pagination import TaskCursorPagination
 from .serializers import TaskSerializer
 
+TRUE_VALUES = ('1', 'true', 'yes')
+
+# Tombstones older than this are pruned; clients syncing from an older
+# cursor are told to reset and refetch the full list
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+
+def parse_datetime_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        # Well formed but out of range, e.g. month 13
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Enter a valid ISO 8601 date/time.'})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
 class TaskListCreateView(generics.ListCreateAPIView):
+    """
+    List (cursor-paginated) and create tasks
+    GET /api/tasks/?status=todo,in_progress&priority=high&due_before=...&due_after=...
+                   &overdue=true&due_today=true&ordering=due_date&page_size=50&cursor=...
+
+    Newest first by default; ordering=due_date lists tasks with a due date,
+    soonest first.
+
+    Delta sync (filters and pagination are ignored):
+    GET /api/tasks/?since=<cursor>   (empty cursor = everything)
+    Returns {"tasks": [...changed...], "deleted": [ids], "cursor": ..., "reset": bool}
+
+    DELETE /api/tasks/   (delete all of the user's tasks)
+    Returns {"deleted": {model: count}, "total": count}
+    """
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = TaskSerializer
+    pagination_class = TaskCursorPagination
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user)
+        queryset = Task.objects.filter(user=self.request.user)
+        params = self.request.query_params
+
+        status_param = params.get('status')
+        if status_param:
+            queryset = queryset.filter(status__in=status_param.split(','))
+
+        priority = params.get('priority')
+        if priority:
+            queryset = queryset.filter(priority__in=priority.split(','))
+
+        due_before = parse_datetime_param(params, 'due_before')
+        if due_before:
+            queryset = queryset.filter(due_date__lt=due_before)
+
+        due_after = parse_datetime_param(params, 'due_after')
+        if due_after:
+            queryset = queryset.filter(due_date__gte=due_after)
+
+        if params.get('overdue', '').lower() in TRUE_VALUES:
+            queryset = queryset.filter(due_date__lt=timezone.now()).exclude(status='completed')
+
+        if params.get('due_today', '').lower() in TRUE_VALUES:
+            queryset = queryset.filter(due_date__date=timezone.localdate())
+
+        if params.get('ordering') == 'due_date':
+            # The cursor is a due date, so tasks without one can't be paged through
+            queryset = queryset.filter(due_date__isnull=False)
+
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if 'since' in request.query_params:
+            return self.list_changes(request)
+        return super().list(request, *args, **kwargs)
+
+    def list_changes(self, request):
+        # Take the new cursor before reading so concurrent writes land in the next poll
+        cursor = timezone.now()
+        # Cursors we hand out carry an offset; a hand-written one without is taken as local time
+        since_time = parse_datetime_param(request.query_params, 'since')
+
+        tombstones = TaskTombstone.objects.filter(user=request.user)
+        tombstones.filter(deleted_at__lt=cursor - TOMBSTONE_RETENTION).delete()
+
+        if since_time is not None and since_time < cursor - TOMBSTONE_RETENTION:
+            since_time = None  # Too old to replay deletions; send a full snapshot
+
+        tasks = Task.objects.filter(user=request.user)
+        deleted = []
+        if since_time is not None:
+            tasks = tasks.filter(updated_at__gt=since_time)
+            deleted = list(
+                tombstones.filter(deleted_at__gt=since_time).values_list('task_id', flat=True)
+            )
+
+        return Response({
+            'tasks': TaskSerializer(tasks, many=True).data,
+            'deleted': deleted,
+            'cursor': cursor.isoformat(),
+            'reset': since_time is None,
+        })
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def delete(self, request):
+        return Response(wipe_user_data(request.user, ['tasks']))
+
+class TaskCountsView(APIView):
+    """
+    Task counts for the overview, without listing the tasks
+    GET /api/tasks/counts/
+    Returns {"total": n, "completed": n, "pending": n, "overdue": n}
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        counts = Task.objects.filter(user=request.user).aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            overdue=Count('id', filter=Q(due_date__lt=timezone.now()) & ~Q(status='completed')),
+        )
+        counts['pending'] = counts['total'] - counts['completed']
+        return Response(counts)
+
 class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = TaskSerializer
@@ -19,6 +149,11 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return Task.objects.filter(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            TaskTombstone.objects.create(user=instance.user, task_id=instance.id)
+            instance.delete()
+
 class TaskCompleteView(generics.UpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = TaskSerializer
@@ -1,12 +1,13 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import RegisterView, LoginView, UserProfileView, ChangePasswordView, VerifyEmailView, ForgotPasswordView, ResetPasswordView
+from .views import RegisterView, LoginView, UserProfileView, ClearDataView, ChangePasswordView, VerifyEmailView, ForgotPasswordView, ResetPasswordView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('profile/', UserProfileView.as_view(), name='profile'),
+    path('data/', ClearDataView.as_view(), name='clear_data'),
     path('change-password/', ChangePasswordView.as_view(), name='change_password'),
     path('verify-email/', VerifyEmailView.as_view(), name='verify_email'),
     path('forgot-password/', ForgotPasswordView.as_view(), name='forgot_password'),
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model, authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
+from activity.wipe import wipe_user_data
 from .serializers import UserSerializer
 from .utils import generate_verification_token, send_verification_email, generate_password_reset_token, send_password_reset_email
 from django.utils import timezone
@@ -106,6 +107,20 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
+class ClearDataView(APIView):
+    """
+    Delete all of the user's tasks, mood entries, focus sessions and chat history in one request
+    DELETE /api/auth/data/
+    Returns {"deleted": {model: count}, "total": count}
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def delete(self, request):
+        result = wipe_user_data(request.user)
+        logger.info(f"Cleared data for user {request.user.id}: {result['total']} rows")
+        return Response(result)
+
+
 class ChangePasswordView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
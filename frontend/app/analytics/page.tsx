@@ -5,7 +5,7 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/com
 import { Button } from "@/components/ui/button"
 import { Badge } from "@/components/ui/badge"
 import { BarChart3, Clock, Target, TrendingUp, AlertTriangle, Activity, Loader2, Calendar as CalendarIcon, ChevronDown } from "lucide-react"
-import { api, Task as ApiTask, CalendarEvent } from "@/lib/api"
+import { api, BurnoutSnapshot } from "@/lib/api"
 import { useAuth } from "@/lib/auth"
 import { NavigationBar } from "@/components/navigation-bar"
 import { Calendar } from "@/components/ui/calendar"
@@ -66,8 +66,7 @@ export default function Analytics() {
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [moodEntries, setMoodEntries] = useState<MoodEntryDisplay[]>([])
-  const [tasks, setTasks] = useState<ApiTask[]>([])
-  const [upcomingEvents, setUpcomingEvents] = useState<CalendarEvent[]>([])
+  const [burnout, setBurnout] = useState<BurnoutSnapshot | null>(null)
   const { user } = useAuth()
 
   // Load mood entries
@@ -104,33 +103,15 @@ export default function Analytics() {
     }
   }
 
-  // Load tasks
-  const loadTasks = async () => {
+  // Load burnout score (computed server-side from mood, tasks and calendar events)
+  const loadBurnout = async () => {
     if (!user) return
     try {
-      const apiTasks = await api.getTasks()
-      setTasks(apiTasks)
+      const result = await api.getBurnout()
+      setBurnout(result)
     } catch (err) {
-      console.error('Failed to load tasks:', err)
-    }
-  }
-
-  // Load upcoming events
-  const loadUpcomingEvents = async () => {
-    if (!user) return
-    try {
-      // Get events for next 30 days, page 1, with pageSize 10
-      const result = await api.getUpcomingEvents(30, 1, 10)
-      console.log('Analytics: Loaded upcoming events:', result)
-      if (result && result.events) {
-        setUpcomingEvents(result.events)
-      } else {
-        console.warn('Analytics: No events in result:', result)
-        setUpcomingEvents([])
-      }
-    } catch (err) {
-      console.error('Failed to load upcoming events:', err)
-      setUpcomingEvents([])
+      console.error('Failed to load burnout score:', err)
+      setBurnout(null)
     }
   }
 
@@ -167,8 +148,7 @@ export default function Analytics() {
 
     loadAnalytics()
     loadMoodEntries()
-    loadTasks()
-    loadUpcomingEvents()
+    loadBurnout()
   }, [user])
 
   // Filter analytics data for the selected week
@@ -228,74 +208,12 @@ export default function Analytics() {
       ? (analyticsData.reduce((sum, day) => sum + day.mood, 0) / analyticsData.length).toFixed(1)
       : "0"
 
-  // Helper function to check if deadline is exceeded
-  const isDeadlineExceeded = (dueDate: string | null | undefined): boolean => {
-    if (!dueDate) return false
-    const deadline = new Date(dueDate)
-    const now = new Date()
-    return deadline < now && !isNaN(deadline.getTime())
-  }
-
-  // Helper function to check if deadline is within 24 hours
-  const isDeadlineClose = (dueDate: string | null | undefined): boolean => {
-    if (!dueDate) return false
-    const deadline = new Date(dueDate)
-    const now = new Date()
-    const hoursUntilDeadline = (deadline.getTime() - now.getTime()) / (1000 * 60 * 60)
-    return hoursUntilDeadline > 0 && hoursUntilDeadline <= 24 && !isNaN(deadline.getTime())
-  }
-
-  // Calculate current date average mood
-  const getCurrentDateAverageMood = (): number => {
-    const today = new Date()
-    today.setHours(0, 0, 0, 0)
-    const todayEnd = new Date(today)
-    todayEnd.setHours(23, 59, 59, 999)
-    
-    const todayEntries = moodEntries.filter(entry => {
-      const entryDate = new Date(entry.timestamp)
-      return entryDate >= today && entryDate <= todayEnd
-    })
-    
-    if (todayEntries.length === 0) return 0
-    
-    const scores = todayEntries
-      .map(entry => entry.score)
-      .filter((score): score is number => score !== undefined && score !== null)
-    
-    if (scores.length === 0) return 0
-    
-    return scores.reduce((sum, score) => sum + score, 0) / scores.length
-  }
-
-  // Calculate task metrics
-  const tasksDone = tasks.filter(task => task.status === 'completed').length
-  const tasksCloseToDeadline = tasks.filter(task => 
-    !task.completed && task.due_date && isDeadlineClose(task.due_date)
-  ).length
-  const tasksExceededDeadline = tasks.filter(task => 
-    !task.completed && task.due_date && isDeadlineExceeded(task.due_date)
-  ).length
-
-  // Calculate burnout score (accepts average mood as parameter)
-  const calculateBurnoutScore = (averageMood: number): number => {
-    // Average mood is inverted: (10 - averageMood)
-    const moodContribution = averageMood > 0 ? (10 - averageMood) : 0
-    
-    // Tasks done * -1 (completed tasks reduce burnout)
-    const tasksDoneContribution = tasksDone * -1
-    
-    // Tasks close to deadline * 1
-    const tasksCloseContribution = tasksCloseToDeadline * 1
-    
-    // Tasks exceeded deadline * 2
-    const tasksExceededContribution = tasksExceededDeadline * 2
-    
-    // Upcoming events * 1
-    const upcomingEventsContribution = upcomingEvents.length * 1
-    
-    return moodContribution + tasksDoneContribution + tasksCloseContribution + tasksExceededContribution + upcomingEventsContribution
-  }
+  // Burnout components come from the server
+  const currentDateAverageMood = burnout?.avg_mood ?? 0
+  const tasksDone = burnout?.tasks_done ?? 0
+  const tasksCloseToDeadline = burnout?.tasks_near_deadline ?? 0
+  const tasksExceededDeadline = burnout?.tasks_overdue ?? 0
+  const upcomingEventsCount = burnout?.upcoming_events ?? 0
 
   // Get burnout category based on score
   const getBurnoutCategory = (score: number): { label: string; textColor: string; bgColor: string; borderColor: string } => {
@@ -391,10 +309,9 @@ export default function Analytics() {
   }
 
   const weekChartData = generateWeekData()
-  const currentDateAverageMood = getCurrentDateAverageMood()
   
-  // Calculate burnout score and category
-  const burnoutScore = calculateBurnoutScore(currentDateAverageMood)
+  // Burnout score and category
+  const burnoutScore = burnout?.score ?? 0
   const burnoutCategory = getBurnoutCategory(burnoutScore)
 
   // Analysis functions for Detailed Insights
@@ -787,7 +704,7 @@ export default function Analytics() {
                     <div className="flex justify-between items-center">
                       <span className="text-sm font-medium">Upcoming Events</span>
                       <Badge className="bg-blue-100 text-blue-800">
-                        {upcomingEvents.length}
+                        {upcomingEventsCount}
                       </Badge>
                     </div>
                   </div>
@@ -969,7 +886,7 @@ export default function Analytics() {
                           <li>• Tasks Done: {tasksDone}</li>
                           <li>• Tasks Close to Deadline (within 24h): {tasksCloseToDeadline}</li>
                           <li>• Tasks Exceeded Deadline: {tasksExceededDeadline}</li>
-                          <li>• Upcoming Events: {upcomingEvents.length}</li>
+                          <li>• Upcoming Events: {upcomingEventsCount}</li>
                         </ul>
                       </div>
                       <div className="pt-2 border-t">
@@ -985,7 +902,7 @@ export default function Analytics() {
                           <li>• Upcoming events: count × 1</li>
                         </ul>
                         <p className="text-xs text-gray-600 dark:text-gray-400 mt-2">
-                          <strong>Current calculation:</strong> (10 - {currentDateAverageMood > 0 ? currentDateAverageMood.toFixed(1) : "0"}) - {tasksDone} + {tasksCloseToDeadline} + ({tasksExceededDeadline} × 2) + ({upcomingEvents.length} × 1) = <strong>{burnoutScore.toFixed(1)}</strong>
+                          <strong>Current calculation:</strong> (10 - {currentDateAverageMood > 0 ? currentDateAverageMood.toFixed(1) : "0"}) - {tasksDone} + {tasksCloseToDeadline} + ({tasksExceededDeadline} × 2) + ({upcomingEventsCount} × 1) = <strong>{burnoutScore.toFixed(1)}</strong>
                         </p>
                       </div>
                         </div>
@@ -39,13 +39,17 @@ export default function ChatPage() {
   const [messages, setMessages] = useState<Message[]>([])
   const [input, setInput] = useState("")
   const [isLoading, setIsLoading] = useState(false)
+  const [streamingMessageId, setStreamingMessageId] = useState<string | null>(null)
   const [isLoadingMessages, setIsLoadingMessages] = useState(true)
+  const [olderCursor, setOlderCursor] = useState<number | null>(null)
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false)
   const [showClearDialog, setShowClearDialog] = useState(false)
   const [isClearing, setIsClearing] = useState(false)
   const [buddyName, setBuddyName] = useState("AI Chatbot")
   const [buddyAppearance, setBuddyAppearance] = useState("owl")
   const scrollAreaRef = useRef<HTMLDivElement>(null)
   const messagesEndRef = useRef<HTMLDivElement>(null)
+  const skipScrollRef = useRef(false)
   const router = useRouter()
   const { user } = useAuth()
   const { toast } = useToast()
@@ -158,7 +162,11 @@ export default function ChatPage() {
   }, [user, router, buddyName, buddyAppearance])
 
   useEffect(() => {
-    // Scroll to bottom when new messages are added
+    // Scroll to bottom when new messages are added (but not when older ones are prepended)
+    if (skipScrollRef.current) {
+      skipScrollRef.current = false
+      return
+    }
     scrollToBottom()
   }, [messages])
 
@@ -179,15 +187,18 @@ export default function ChatPage() {
     }, 150)
   }
 
+  const toMessage = (msg: ChatMessage): Message => ({
+    id: msg.id.toString(),
+    content: msg.content,
+    isBot: msg.role === 'assistant',
+    timestamp: new Date(msg.created_at)
+  })
+
   const loadChatMessages = async () => {
     try {
-      const chatMessages = await api.getChatMessages()
-      const formattedMessages: Message[] = chatMessages.map((msg: ChatMessage) => ({
-        id: msg.id.toString(),
-        content: msg.content,
-        isBot: msg.role === 'assistant',
-        timestamp: new Date(msg.created_at)
-      })).reverse() // Reverse to show oldest first
+      const page = await api.getChatMessagesPage()
+      const formattedMessages = page.messages.map(toMessage)
+      setOlderCursor(page.has_more ? page.before : null)
 
       // If no messages exist, show welcome message for first-time users
       if (formattedMessages.length === 0) {
@@ -204,6 +215,22 @@ export default function ChatPage() {
     }
   }
 
+  const loadOlderMessages = async () => {
+    if (!olderCursor || isLoadingOlder) return
+
+    setIsLoadingOlder(true)
+    try {
+      const page = await api.getChatMessagesPage(olderCursor)
+      skipScrollRef.current = true
+      setMessages(prev => [...page.messages.map(toMessage), ...prev])
+      setOlderCursor(page.has_more ? page.before : null)
+    } catch (error) {
+      console.error('Failed to load older chat messages:', error)
+    } finally {
+      setIsLoadingOlder(false)
+    }
+  }
+
   const handleSendMessage = async () => {
     if (!input.trim() || isLoading) return
 
@@ -221,16 +248,24 @@ export default function ChatPage() {
     scrollToBottom()
 
     try {
-      const response = await api.sendChatMessage(userMessage.content)
-      
-      const botMessage: Message = {
-        id: (Date.now() + 1).toString(),
-        content: response.message,
-        isBot: true,
-        timestamp: new Date()
+      const botMessageId = (Date.now() + 1).toString()
+      let receivedFirstChunk = false
+
+      const response = await api.streamChatMessage(userMessage.content, (text) => {
+        if (!receivedFirstChunk) {
+          // Replace the typing indicator with the reply as soon as it starts
+          receivedFirstChunk = true
+          setStreamingMessageId(botMessageId)
+          setMessages(prev => [...prev, { id: botMessageId, content: text, isBot: true, timestamp: new Date() }])
+        } else {
+          setMessages(prev => prev.map(msg => msg.id === botMessageId ? { ...msg, content: msg.content + text } : msg))
+        }
+        scrollToBottom()
+      })
+
+      if (!receivedFirstChunk) {
+        setMessages(prev => [...prev, { id: botMessageId, content: response.message, isBot: true, timestamp: new Date() }])
       }
-      
-      setMessages(prev => [...prev, botMessage])
       // Scroll to show bot's response
       scrollToBottom()
     } catch (error) {
@@ -244,6 +279,7 @@ export default function ChatPage() {
       setMessages(prev => [...prev, errorMessage])
     } finally {
       setIsLoading(false)
+      setStreamingMessageId(null)
     }
   }
 
@@ -288,15 +324,13 @@ What would you like to talk about today? 😊`,
     
     setIsClearing(true)
     try {
-      // Get all chat messages
-      const chatMessages = await api.getChatMessages()
-      
       // Delete all messages
-      await Promise.all(chatMessages.map((msg: ChatMessage) => api.deleteChatMessage(msg.id)))
+      await api.clearChatMessages()
       
       // Clear messages and show welcome message
       const welcomeMessage = getWelcomeMessage()
       setMessages([welcomeMessage])
+      setOlderCursor(null)
       
       toast({
         title: "Chat Cleared",
@@ -513,6 +547,19 @@ What would you like to talk about today? 😊`,
                 </div>
               ) : (
                 <div className="space-y-4 pb-6">
+                  {olderCursor && (
+                    <div className="flex justify-center">
+                      <Button
+                        variant="ghost"
+                        size="sm"
+                        onClick={loadOlderMessages}
+                        disabled={isLoadingOlder}
+                        className="text-gray-500 dark:text-gray-400"
+                      >
+                        {isLoadingOlder ? 'Loading...' : 'Load older messages'}
+                      </Button>
+                    </div>
+                  )}
                   {messages.map((message) => {
                     const isWelcomeMessage = message.id.startsWith('welcome')
                     return (
@@ -552,7 +599,7 @@ What would you like to talk about today? 😊`,
                       </div>
                     )
                   })}
-                  {isLoading && (
+                  {isLoading && !streamingMessageId && (
                     <div className="flex justify-start">
                       <div className="bg-gray-100 dark:bg-gray-800 text-gray-800 dark:text-gray-200 rounded-lg p-3 max-w-[70%]">
                         <div className="flex items-center space-x-2">
@@ -33,7 +33,7 @@ import {
 import { useRouter } from "next/navigation"
 import Link from "next/link"
 import { useAuth } from "@/lib/auth"
-import { api, Quote, CalendarEvent } from "@/lib/api"
+import { api, Quote, CalendarEvent, Task as ApiTask } from "@/lib/api"
 import { NotificationService } from "@/lib/notifications"
 import { NavigationBar } from "@/components/navigation-bar"
 import { useToast } from "@/hooks/use-toast"
@@ -80,6 +80,9 @@ export default function Dashboard() {
   const router = useRouter()
   const { user } = useAuth()
   const quoteFetchedForUserIdRef = useRef<number | null>(null)
+  // Delta sync state for tasks: last server cursor and the synced rows by id
+  const taskSyncCursorRef = useRef<string | undefined>(undefined)
+  const syncedTasksRef = useRef<Map<number, ApiTask>>(new Map())
 
   // Get buddy emoji based on appearance
   const getBuddyEmoji = (appearance: string) => {
@@ -228,12 +231,23 @@ export default function Dashboard() {
     }
   }
 
-  // Fetch tasks from API
+  // Fetch tasks from API (only rows changed since the last poll)
   const fetchTasks = async () => {
     if (!user) return
     try {
-      setTasksLoading(true)
-      const apiTasks = await api.getTasks()
+      const isInitialLoad = taskSyncCursorRef.current === undefined
+      if (isInitialLoad) setTasksLoading(true)
+      const changes = await api.getTaskChanges(taskSyncCursorRef.current)
+      taskSyncCursorRef.current = changes.cursor
+      
+      const syncedTasks = syncedTasksRef.current
+      if (changes.reset) syncedTasks.clear()
+      // Nothing changed since the last poll - keep the current list
+      if (!changes.reset && changes.tasks.length === 0 && changes.deleted.length === 0) return
+      changes.tasks.forEach(task => syncedTasks.set(task.id, task))
+      changes.deleted.forEach(id => syncedTasks.delete(id))
+      const apiTasks = Array.from(syncedTasks.values())
+      
       // Convert to display format
       const displayTasks = apiTasks.map(task => {
         const { difficulty } = extractDifficultyFromDescription(task.description || '')
@@ -332,7 +346,9 @@ export default function Dashboard() {
       }
     }
 
-    // Fetch tasks from API
+    // Fetch tasks from API (full snapshot for a new user session, then deltas)
+    taskSyncCursorRef.current = undefined
+    syncedTasksRef.current = new Map()
     fetchTasks()
 
     // Fetch calendar connections and upcoming events (start at page 1)
@@ -928,39 +928,14 @@ export default function SettingsPage() {
     setClearingData(true)
     try {
       // Clear all backend data
-      // 1. Delete all tasks
+      // 1. Delete tasks, mood entries, chat messages and focus sessions in one request
       try {
-        const tasks = await api.getTasks()
-        await Promise.all(tasks.map(task => api.deleteTask(task.id)))
+        await api.clearAllData()
       } catch (error) {
-        console.error('Error deleting tasks:', error)
+        console.error('Error deleting data:', error)
       }
 
-      // 2. Delete all mood entries
-      try {
-        const moodEntries = await api.getMoodEntries()
-        await Promise.all(moodEntries.map(entry => api.deleteMoodEntry(entry.id)))
-      } catch (error) {
-        console.error('Error deleting mood entries:', error)
-      }
-
-      // 2.5. Delete all chat messages
-      try {
-        const chatMessages = await api.getChatMessages()
-        await Promise.all(chatMessages.map((msg: any) => api.deleteChatMessage(msg.id)))
-      } catch (error) {
-        console.error('Error deleting chat messages:', error)
-      }
-
-      // 3. Delete all focus sessions
-      try {
-        const focusSessions = await api.getFocusSessions()
-        await Promise.all(focusSessions.map((session: any) => api.deleteFocusSession(session.id)))
-      } catch (error) {
-        console.error('Error deleting focus sessions:', error)
-      }
-
-      // 4. Disconnect all calendar connections
+      // 2. Disconnect all calendar connections
       try {
         const connections = await api.getCalendarConnections()
         for (const conn of connections) {
@@ -974,7 +949,7 @@ export default function SettingsPage() {
         console.error('Error getting calendar connections:', error)
       }
 
-      // 5. Clear localStorage
+      // 3. Clear localStorage
       localStorage.removeItem("smartBuddyTasks")
       localStorage.removeItem("smartBuddyMoodHistory")
       localStorage.removeItem("smartBuddyMindfulnessSessions")
@@ -984,7 +959,7 @@ export default function SettingsPage() {
       const mindfulnessKey = `mindfulnessSessions_${user.id}`
       localStorage.removeItem(mindfulnessKey)
 
-      // 6. Reset settings to defaults
+      // 4. Reset settings to defaults
       if (!user) return
       const defaultPreferences = {
         theme: "light",
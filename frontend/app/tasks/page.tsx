@@ -25,7 +25,7 @@ import {
   AlertDialogTitle,
 } from "@/components/ui/alert-dialog"
 import { Plus, CheckSquare, Clock, Trash2, Edit, Loader2, Info, AlertCircle, Calendar as CalendarIcon } from "lucide-react"
-import { api, Task as ApiTask } from "@/lib/api"
+import { api, Task as ApiTask, TaskCounts, TaskFilters } from "@/lib/api"
 import { useAuth } from "@/lib/auth"
 import { NavigationBar } from "@/components/navigation-bar"
 import { useToast } from "@/hooks/use-toast"
@@ -41,6 +41,16 @@ interface TaskDisplay {
   dueDate?: string | null
 }
 
+type TaskFilter = "all" | "pending" | "completed" | "deadline"
+
+// Server-side filter and ordering behind each filter button
+const FILTER_PARAMS: Record<TaskFilter, TaskFilters> = {
+  all: {},
+  pending: { status: "todo,in_progress" },
+  completed: { status: "completed" },
+  deadline: { ordering: "due_date" },
+}
+
 export default function TaskManager() {
   const [tasks, setTasks] = useState<TaskDisplay[]>([])
   const [newTask, setNewTask] = useState("")
@@ -48,7 +58,10 @@ export default function TaskManager() {
   const [newTaskDifficulty, setNewTaskDifficulty] = useState<number>(3)
   const [newTaskDeadlineDate, setNewTaskDeadlineDate] = useState<Date | undefined>(undefined)
   const [newTaskDeadlineTime, setNewTaskDeadlineTime] = useState<string>("")
-  const [filter, setFilter] = useState<"all" | "pending" | "completed" | "deadline">("all")
+  const [filter, setFilter] = useState<TaskFilter>("all")
+  const [nextPage, setNextPage] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [counts, setCounts] = useState<TaskCounts>({ total: 0, completed: 0, pending: 0, overdue: 0 })
   const [editingTask, setEditingTask] = useState<string | null>(null)
   const [editTitle, setEditTitle] = useState("")
   const [editPriority, setEditPriority] = useState<"low" | "medium" | "high">("medium")
@@ -95,27 +108,67 @@ export default function TaskManager() {
     }
   }
 
-  // Load tasks from API
+  // Overview and filter counts come from the server, so they cover tasks not loaded yet
+  const loadCounts = async () => {
+    try {
+      setCounts(await api.getTaskCounts())
+    } catch (err) {
+      console.error('Failed to load task counts:', err)
+    }
+  }
+
   useEffect(() => {
     if (!user) return
+    loadCounts()
+  }, [user])
+
+  // Load the first page of tasks for the selected filter; more pages load on demand
+  useEffect(() => {
+    if (!user) return
+    let cancelled = false
 
     const loadTasks = async () => {
       try {
         setLoading(true)
         setError(null)
-        const apiTasks = await api.getTasks()
-        const displayTasks = apiTasks.map(convertToDisplay)
-        setTasks(sortTasks(displayTasks))
+        const page = await api.getTasksPage(FILTER_PARAMS[filter])
+        if (cancelled) return
+        setTasks(sortTasks(page.results.map(convertToDisplay)))
+        setNextPage(page.next)
       } catch (err) {
+        if (cancelled) return
         console.error('Failed to load tasks:', err)
         setError(err instanceof Error ? err.message : 'Failed to load tasks')
       } finally {
-        setLoading(false)
+        if (!cancelled) setLoading(false)
       }
     }
 
     loadTasks()
-  }, [user])
+    return () => {
+      cancelled = true
+    }
+  }, [user, filter])
+
+  const loadMoreTasks = async () => {
+    if (!nextPage || loadingMore) return
+
+    try {
+      setLoadingMore(true)
+      setError(null)
+      const page = await api.getTasksPage({}, nextPage)
+      // Skip tasks already added locally since the first page loaded
+      const loadedIds = new Set(tasks.map(task => task.id))
+      const newTasks = page.results.map(convertToDisplay).filter(task => !loadedIds.has(task.id))
+      setTasks(sortTasks([...tasks, ...newTasks]))
+      setNextPage(page.next)
+    } catch (err) {
+      console.error('Failed to load more tasks:', err)
+      setError(err instanceof Error ? err.message : 'Failed to load more tasks')
+    } finally {
+      setLoadingMore(false)
+    }
+  }
 
   const addTask = async () => {
     if (!newTask.trim() || !user) return
@@ -196,6 +249,8 @@ export default function TaskManager() {
       const apiTask = await api.createTask(newTask.trim(), description, newTaskPriority, dueDate || undefined)
       const displayTask = convertToDisplay(apiTask)
       
+      loadCounts()
+
       // Add new task and sort
       const updatedTasks = [...tasks, displayTask]
       setTasks(sortTasks(updatedTasks))
@@ -274,6 +329,7 @@ export default function TaskManager() {
       
       const updatedTasks = tasks.map(task => task.id === id ? displayTask : task)
       setTasks(sortTasks(updatedTasks))
+      loadCounts()
     } catch (err) {
       console.error('Failed to update task:', err)
       setError(err instanceof Error ? err.message : 'Failed to update task')
@@ -294,6 +350,7 @@ export default function TaskManager() {
       const taskTitle = tasks.find(t => t.id === id)?.title || "Task"
       await api.deleteTask(taskId)
       setTasks(tasks.filter(task => task.id !== id))
+      loadCounts()
       setShowDeleteDialog(false)
       setTaskToDelete(null)
       toast({
@@ -399,6 +456,7 @@ export default function TaskManager() {
       
       const updatedTasks = tasks.map(task => task.id === id ? displayTask : task)
       setTasks(sortTasks(updatedTasks))
+      loadCounts()
       setEditingTask(null)
       setEditTitle("")
       setEditPriority("medium")
@@ -433,6 +491,8 @@ export default function TaskManager() {
     setEditDeadlineTime("")
   }
 
+  // The server filters each page; this keeps the list right after local edits,
+  // e.g. a task completed while viewing Pending
   const filteredTasks = sortTasks(tasks.filter((task) => {
     if (filter === "pending") return !task.completed
     if (filter === "completed") return task.completed
@@ -440,9 +500,9 @@ export default function TaskManager() {
     return true
   }))
 
-  const completedCount = tasks.filter((task) => task.completed).length
-  const pendingCount = tasks.filter((task) => !task.completed).length
-  const exceededDeadlineCount = tasks.filter((task) => !task.completed && isDeadlineExceeded(task.dueDate)).length
+  const completedCount = counts.completed
+  const pendingCount = counts.pending
+  const exceededDeadlineCount = counts.overdue
 
   const getPriorityColor = (priority: string) => {
     switch (priority) {
@@ -475,7 +535,7 @@ export default function TaskManager() {
               </CardHeader>
               <CardContent className="space-y-4">
                 <div className="text-center">
-                  <div className="text-3xl font-bold text-blue-600">{tasks.length}</div>
+                  <div className="text-3xl font-bold text-blue-600">{counts.total}</div>
                   <p className="text-sm text-gray-600">Total Tasks</p>
                 </div>
                 <div className="text-center">
@@ -486,10 +546,10 @@ export default function TaskManager() {
                   <div className="text-3xl font-bold text-orange-600">{pendingCount}</div>
                   <p className="text-sm text-gray-600">Pending</p>
                 </div>
-                {tasks.length > 0 && (
+                {counts.total > 0 && (
                   <div className="text-center">
                     <div className="text-2xl font-bold text-purple-600">
-                      {Math.round((completedCount / tasks.length) * 100)}%
+                      {Math.round((completedCount / counts.total) * 100)}%
                     </div>
                     <p className="text-sm text-gray-600">Completion Rate</p>
                   </div>
@@ -554,7 +614,7 @@ export default function TaskManager() {
                       : "dark:bg-gray-800 dark:border-gray-700 dark:text-gray-200 dark:hover:bg-gray-700"
                   }`}
                 >
-                  All Tasks ({tasks.length})
+                  All Tasks ({counts.total})
                 </Button>
                 <Button
                   variant={filter === "pending" ? "default" : "outline"}
@@ -809,7 +869,7 @@ export default function TaskManager() {
                     </TooltipProvider>
                   </CardTitle>
                   <Badge variant="outline">
-                    {filteredTasks.length} {filter === "all" ? "total" : filter}
+                    {filteredTasks.length}{nextPage ? "+" : ""} {filter === "all" ? "total" : filter}
                   </Badge>
                 </div>
               </CardHeader>
@@ -1080,13 +1140,30 @@ export default function TaskManager() {
                       )
                     })
                     )}
+                    {nextPage && (
+                      <Button
+                        variant="outline"
+                        onClick={loadMoreTasks}
+                        disabled={loadingMore}
+                        className="w-full dark:bg-gray-800 dark:border-gray-700 dark:text-gray-200 dark:hover:bg-gray-700"
+                      >
+                        {loadingMore ? (
+                          <>
+                            <Loader2 className="h-4 w-4 mr-2 animate-spin" />
+                            Loading...
+                          </>
+                        ) : (
+                          "Load More Tasks"
+                        )}
+                      </Button>
+                    )}
                   </div>
                 )}
               </CardContent>
             </Card>
 
             {/* Quick Actions */}
-            {tasks.length > 0 && (
+            {counts.total > 0 && (
               <Card>
                 <CardHeader>
                   <CardTitle>Quick Actions</CardTitle>
@@ -1099,10 +1176,12 @@ export default function TaskManager() {
                       onClick={async () => {
                         if (!user) return
                         try {
-                          const pendingTasks = tasks.filter(t => !t.completed)
-                          await Promise.all(pendingTasks.map(t => api.updateTask(parseInt(t.id), undefined, undefined, undefined, 'completed')))
+                          // Includes pending tasks on pages not loaded yet
+                          const pendingTasks = await api.getTasks(FILTER_PARAMS.pending)
+                          await Promise.all(pendingTasks.map(t => api.updateTask(t.id, undefined, undefined, undefined, 'completed')))
                           const updatedTasks = tasks.map(t => ({ ...t, completed: true }))
                           setTasks(sortTasks(updatedTasks))
+                          loadCounts()
                         } catch (err) {
                           console.error('Failed to mark all complete:', err)
                           setError(err instanceof Error ? err.message : 'Failed to mark all complete')
@@ -1117,10 +1196,11 @@ export default function TaskManager() {
                       onClick={async () => {
                         if (!user) return
                         try {
-                          const completedTasks = tasks.filter(t => t.completed)
-                          await Promise.all(completedTasks.map(t => api.updateTask(parseInt(t.id), undefined, undefined, undefined, 'todo')))
+                          const completedTasks = await api.getTasks(FILTER_PARAMS.completed)
+                          await Promise.all(completedTasks.map(t => api.updateTask(t.id, undefined, undefined, undefined, 'todo')))
                           const updatedTasks = tasks.map(t => ({ ...t, completed: false }))
                           setTasks(sortTasks(updatedTasks))
+                          loadCounts()
                         } catch (err) {
                           console.error('Failed to mark all pending:', err)
                           setError(err instanceof Error ? err.message : 'Failed to mark all pending')
@@ -1198,7 +1278,7 @@ export default function TaskManager() {
           <AlertDialogHeader>
             <AlertDialogTitle>Clear Completed Tasks?</AlertDialogTitle>
             <AlertDialogDescription>
-              Are you sure you want to delete all completed tasks? This action cannot be undone. All {tasks.filter(t => t.completed).length} completed task{tasks.filter(t => t.completed).length !== 1 ? 's' : ''} will be permanently removed.
+              Are you sure you want to delete all completed tasks? This action cannot be undone. All {counts.completed} completed task{counts.completed !== 1 ? 's' : ''} will be permanently removed.
             </AlertDialogDescription>
           </AlertDialogHeader>
           <AlertDialogFooter>
@@ -1209,10 +1289,11 @@ export default function TaskManager() {
               onClick={async () => {
                 if (!user) return
                 try {
-                  const completedTasks = tasks.filter(t => t.completed)
+                  const completedTasks = await api.getTasks(FILTER_PARAMS.completed)
                   const completedCount = completedTasks.length
-                  await Promise.all(completedTasks.map(t => api.deleteTask(parseInt(t.id))))
+                  await Promise.all(completedTasks.map(t => api.deleteTask(t.id)))
                   setTasks(sortTasks(tasks.filter(t => !t.completed)))
+                  loadCounts()
                   setShowClearCompletedDialog(false)
                   toast({
                     title: "Completed tasks cleared",
@@ -1244,7 +1325,7 @@ export default function TaskManager() {
           <AlertDialogHeader>
             <AlertDialogTitle>Clear All Tasks?</AlertDialogTitle>
             <AlertDialogDescription>
-              Are you sure you want to delete all tasks? This action cannot be undone. All {tasks.length} task{tasks.length !== 1 ? 's' : ''} will be permanently removed.
+              Are you sure you want to delete all tasks? This action cannot be undone. All {counts.total} task{counts.total !== 1 ? 's' : ''} will be permanently removed.
             </AlertDialogDescription>
           </AlertDialogHeader>
           <AlertDialogFooter>
@@ -1253,12 +1334,15 @@ export default function TaskManager() {
               onClick={async () => {
                 if (!user) return
                 try {
-                  await Promise.all(tasks.map(t => api.deleteTask(parseInt(t.id))))
+                  const deletedCount = counts.total
+                  await api.clearTasks()
                   setTasks([])
+                  setNextPage(null)
+                  loadCounts()
                   setShowClearAllDialog(false)
                   toast({
                     title: "All tasks deleted",
-                    description: `All ${tasks.length} task${tasks.length !== 1 ? 's' : ''} have been deleted successfully.`,
+                    description: `All ${deletedCount} task${deletedCount !== 1 ? 's' : ''} have been deleted successfully.`,
                   })
                 } catch (err) {
                   console.error('Failed to clear all tasks:', err)
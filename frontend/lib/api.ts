@@ -12,6 +12,10 @@ const getApiUrl = (): string => {
 // Get API URL dynamically each time (not evaluated at module load)
 const API_URL = () => getApiUrl();
 
+// Calendar syncs run in a background worker; syncCalendar polls the job this often, for this long
+const SYNC_JOB_POLL_MS = 1000;
+const SYNC_JOB_TIMEOUT_MS = 3 * 60 * 1000;
+
 export interface LoginResponse {
   access: string;
   refresh: string;
@@ -71,6 +75,20 @@ export interface CalendarSyncResult {
   errors: string[];
 }
 
+export interface CalendarSyncJob extends CalendarSyncResult {
+  id: number;
+  connection: number | null;
+  connection_name: string | null;
+  trigger: 'manual' | 'connect' | 'scheduled';
+  status: 'pending' | 'running' | 'succeeded' | 'failed';
+  is_finished: boolean;
+  connections_total: number;
+  connections_done: number;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
 export interface ChatMessage {
   id: number;
   role: 'user' | 'assistant';
@@ -78,6 +96,19 @@ export interface ChatMessage {
   created_at: string;
 }
 
+// One page of chat history, oldest first; pass `before` back to load the page before it
+export interface ChatMessagePage {
+  messages: ChatMessage[];
+  has_more: boolean;
+  before: number | null;
+}
+
+// Rows removed by a bulk delete, per model (e.g. "tasks.Task")
+export interface BulkDeleteResult {
+  deleted: Record<string, number>;
+  total: number;
+}
+
 export interface ChatResponse {
   message: string;
   role: 'assistant';
@@ -126,6 +157,50 @@ export interface Task {
   updated_at: string;
 }
 
+export interface BurnoutSnapshot {
+  date: string;
+  score: number;
+  category: 'Low' | 'Moderate' | 'High' | 'Critical';
+  avg_mood: number;
+  tasks_done: number;
+  tasks_near_deadline: number;
+  tasks_overdue: number;
+  upcoming_events: number;
+  computed_at: string;
+}
+
+export interface TaskFilters {
+  status?: string;
+  priority?: string;
+  due_before?: string;
+  due_after?: string;
+  overdue?: boolean;
+  due_today?: boolean;
+  // Soonest deadline first; tasks without a due date are left out
+  ordering?: 'due_date';
+  page_size?: number;
+}
+
+export interface TaskCounts {
+  total: number;
+  completed: number;
+  pending: number;
+  overdue: number;
+}
+
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+export interface TaskChanges {
+  tasks: Task[];
+  deleted: number[];
+  cursor: string;
+  reset: boolean;
+}
+
 export interface Goal {
   id: number;
   title: string;
@@ -604,31 +679,50 @@ export const api = {
     }
 
     const result = await response.json();
-    console.log('Sync calendar successful:', result);
+    console.log('Sync calendar queued:', result);
+
+    // The sync runs in the background worker; wait for the job to finish
+    const deadline = Date.now() + SYNC_JOB_TIMEOUT_MS;
+    let job: CalendarSyncJob = result.job;
+    while (!job.is_finished) {
+      if (Date.now() > deadline) {
+        throw new Error('Calendar sync is taking longer than expected. Your events will update shortly.');
+      }
+      await new Promise((resolve) => setTimeout(resolve, SYNC_JOB_POLL_MS));
+      job = await this.getSyncJob(result.job_id);
+    }
+    console.log('Sync calendar finished:', job);
     console.log('=== End API Sync Calendar Request ===');
-    
-    // If syncing specific connection, return the result directly
-    // If syncing all, return aggregated results
-    if (connectionId) {
-      return {
-        synced: result.synced || 0,
-        created: result.created || 0,
-        updated: result.updated || 0,
-        deleted: result.deleted || 0,
-        errors: result.errors || []
-      };
-    } else {
-      // For all connections sync, aggregate the results
-      const aggregated = result.results?.reduce((acc: any, r: any) => ({
-        synced: acc.synced + (r.synced || 0),
-        created: acc.created + (r.created || 0),
-        updated: acc.updated + (r.updated || 0),
-        deleted: acc.deleted + (r.deleted || 0),
-        errors: [...acc.errors, ...(r.errors || [])]
-      }), { synced: 0, created: 0, updated: 0, deleted: 0, errors: [] }) || { synced: 0, created: 0, updated: 0, deleted: 0, errors: [] };
-      
-      return aggregated;
+
+    if (job.status === 'failed') {
+      throw new Error(job.errors[0] || 'Failed to sync calendar');
     }
+    return {
+      synced: job.synced,
+      created: job.created,
+      updated: job.updated,
+      deleted: job.deleted,
+      errors: job.errors
+    };
+  },
+
+  async getSyncJob(jobId: number): Promise<CalendarSyncJob> {
+    const headers = {
+      'Content-Type': 'application/json',
+      ...getAuthHeader(),
+    };
+
+    const response = await fetch(`${API_URL()}/calendar/sync/jobs/${jobId}/`, {
+      headers,
+      credentials: 'include',
+    });
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Failed to fetch sync status' }));
+      throw new Error(error.error || error.detail || 'Failed to fetch sync status');
+    }
+
+    return response.json();
   },
 
   async getUpcomingEvents(days: number = 30, page: number = 1, pageSize: number = 5): Promise<{
@@ -672,7 +766,7 @@ export const api = {
     return result;
   },
 
-  async getChatMessages(): Promise<ChatMessage[]> {
+  async getChatMessagesPage(before?: number | null, limit = 50): Promise<ChatMessagePage> {
     console.log('=== API Get Chat Messages Request ===');
 
     const headers = {
@@ -680,7 +774,12 @@ export const api = {
       ...getAuthHeader(),
     };
 
-    const response = await fetch(`${API_URL()}/chatbot/messages/`, {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (before) {
+      params.append('before', String(before));
+    }
+
+    const response = await fetch(`${API_URL()}/chatbot/messages/?${params.toString()}`, {
       headers,
       credentials: 'include',
     });
@@ -699,6 +798,17 @@ export const api = {
     return result;
   },
 
+  // Whole chat history, oldest first
+  async getChatMessages(): Promise<ChatMessage[]> {
+    let page = await this.getChatMessagesPage(null, 200);
+    const messages = [...page.messages];
+    while (page.has_more) {
+      page = await this.getChatMessagesPage(page.before, 200);
+      messages.unshift(...page.messages);
+    }
+    return messages;
+  },
+
   async sendChatMessage(message: string): Promise<ChatResponse> {
     console.log('=== API Send Chat Message Request ===');
     console.log('Message:', message);
@@ -729,6 +839,68 @@ export const api = {
     return result;
   },
 
+  // Streams the reply over Server-Sent Events, calling onChunk as text arrives.
+  // Resolves with the complete (saved) assistant message.
+  async streamChatMessage(message: string, onChunk: (text: string) => void): Promise<ChatResponse> {
+    console.log('=== API Stream Chat Message Request ===');
+    console.log('Message:', message);
+
+    const headers = {
+      'Content-Type': 'application/json',
+      ...getAuthHeader(),
+    };
+
+    const response = await fetch(`${API_URL()}/chatbot/chat/stream/`, {
+      method: 'POST',
+      headers,
+      credentials: 'include',
+      body: JSON.stringify({ message }),
+    });
+
+    console.log('Response status:', response.status);
+
+    if (!response.ok || !response.body) {
+      const error = await response.json().catch(() => ({ error: 'Failed to send chat message' }));
+      console.error('Stream chat message request failed:', error);
+      throw new Error(error.error || 'Failed to send chat message');
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let assembled = '';
+    let result: ChatResponse | null = null;
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // SSE frames are separated by a blank line
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        const event = frame.match(/^event: (.*)$/m)?.[1];
+        const data = frame.match(/^data: (.*)$/m)?.[1];
+        if (!event || !data) continue;
+
+        const payload = JSON.parse(data);
+        if (event === 'chunk') {
+          assembled += payload.text;
+          onChunk(payload.text);
+        } else if (event === 'done') {
+          result = { message: payload.message, role: 'assistant' };
+        }
+      }
+    }
+
+    console.log('=== End API Stream Chat Message Request ===');
+    return result || { message: assembled, role: 'assistant' };
+  },
+
   async deleteChatMessage(id: number): Promise<void> {
     console.log('=== API Delete Chat Message Request ===');
     console.log('ID:', id);
@@ -756,6 +928,64 @@ export const api = {
     console.log('=== End API Delete Chat Message Request ===');
   },
 
+  // Delete the whole conversation in one request
+  async clearChatMessages(): Promise<BulkDeleteResult> {
+    console.log('=== API Clear Chat Messages Request ===');
+
+    const headers = {
+      'Content-Type': 'application/json',
+      ...getAuthHeader(),
+    };
+
+    const response = await fetch(`${API_URL()}/chatbot/messages/`, {
+      method: 'DELETE',
+      headers,
+      credentials: 'include',
+    });
+
+    console.log('Response status:', response.status);
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Failed to clear chat messages' }));
+      console.error('Clear chat messages request failed:', error);
+      throw new Error(error.error || 'Failed to clear chat messages');
+    }
+
+    const result = await response.json();
+    console.log('Clear chat messages request successful:', result);
+    console.log('=== End API Clear Chat Messages Request ===');
+    return result;
+  },
+
+  // Delete all tasks, mood entries, focus sessions and chat history in one request
+  async clearAllData(): Promise<BulkDeleteResult> {
+    console.log('=== API Clear All Data Request ===');
+
+    const headers = {
+      'Content-Type': 'application/json',
+      ...getAuthHeader(),
+    };
+
+    const response = await fetch(`${API_URL()}/auth/data/`, {
+      method: 'DELETE',
+      headers,
+      credentials: 'include',
+    });
+
+    console.log('Response status:', response.status);
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Failed to clear data' }));
+      console.error('Clear all data request failed:', error);
+      throw new Error(error.error || 'Failed to clear data');
+    }
+
+    const result = await response.json();
+    console.log('Clear all data request successful:', result);
+    console.log('=== End API Clear All Data Request ===');
+    return result;
+  },
+
   async getMoodEntries(): Promise<MoodEntry[]> {
     console.log('=== API Get Mood Entries Request ===');
 
@@ -933,15 +1163,24 @@ export const api = {
     return result;
   },
 
-  async getTasks(): Promise<Task[]> {
-    console.log('=== API Get Tasks Request ===');
+  async getTasksPage(filters: TaskFilters = {}, cursorUrl?: string): Promise<CursorPage<Task>> {
+    console.log('=== API Get Tasks Page Request ===');
 
     const headers = {
       'Content-Type': 'application/json',
       ...getAuthHeader(),
     };
 
-    const response = await fetch(`${API_URL()}/tasks/`, {
+    const params = new URLSearchParams();
+    Object.entries(filters).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') {
+        params.append(key, String(value));
+      }
+    });
+    const query = params.toString();
+    const url = cursorUrl || `${API_URL()}/tasks/${query ? `?${query}` : ''}`;
+
+    const response = await fetch(url, {
       headers,
       credentials: 'include',
     });
@@ -955,8 +1194,105 @@ export const api = {
     }
 
     const result = await response.json();
-    console.log('Tasks request successful:', result);
-    console.log('=== End API Get Tasks Request ===');
+    console.log('Tasks page request successful:', result);
+    console.log('=== End API Get Tasks Page Request ===');
+    return result;
+  },
+
+  async getTaskCounts(): Promise<TaskCounts> {
+    console.log('=== API Get Task Counts Request ===');
+
+    const headers = {
+      'Content-Type': 'application/json',
+      ...getAuthHeader(),
+    };
+
+    const response = await fetch(`${API_URL()}/tasks/counts/`, {
+      headers,
+      credentials: 'include',
+    });
+
+    console.log('Response status:', response.status);
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Failed to fetch task counts' }));
+      console.error('Task counts request failed:', error);
+      throw new Error(error.error || 'Failed to fetch task counts');
+    }
+
+    const result = await response.json();
+    console.log('Task counts request successful:', result);
+    console.log('=== End API Get Task Counts Request ===');
+    return result;
+  },
+
+  // Fetches every page of matching tasks by following the cursor links; for
+  // lists shown to the user, page with getTasksPage instead
+  async getTasks(filters: TaskFilters = {}): Promise<Task[]> {
+    const tasks: Task[] = [];
+    let page = await this.getTasksPage({ page_size: 200, ...filters });
+    tasks.push(...page.results);
+    while (page.next) {
+      page = await this.getTasksPage({}, page.next);
+      tasks.push(...page.results);
+    }
+    return tasks;
+  },
+
+  // Delete all of the user's tasks in one request
+  async clearTasks(): Promise<BulkDeleteResult> {
+    console.log('=== API Clear Tasks Request ===');
+
+    const headers = {
+      'Content-Type': 'application/json',
+      ...getAuthHeader(),
+    };
+
+    const response = await fetch(`${API_URL()}/tasks/`, {
+      method: 'DELETE',
+      headers,
+      credentials: 'include',
+    });
+
+    console.log('Response status:', response.status);
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Failed to clear tasks' }));
+      console.error('Clear tasks request failed:', error);
+      throw new Error(error.error || 'Failed to clear tasks');
+    }
+
+    const result = await response.json();
+    console.log('Clear tasks request successful:', result);
+    console.log('=== End API Clear Tasks Request ===');
+    return result;
+  },
+
+  // Delta sync: tasks changed and ids deleted since the cursor (omit it for a full snapshot)
+  async getTaskChanges(since?: string): Promise<TaskChanges> {
+    console.log('=== API Get Task Changes Request ===');
+
+    const headers = {
+      'Content-Type': 'application/json',
+      ...getAuthHeader(),
+    };
+
+    const response = await fetch(`${API_URL()}/tasks/?since=${encodeURIComponent(since || '')}`, {
+      headers,
+      credentials: 'include',
+    });
+
+    console.log('Response status:', response.status);
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Failed to fetch task changes' }));
+      console.error('Task changes request failed:', error);
+      throw new Error(error.error || 'Failed to fetch task changes');
+    }
+
+    const result = await response.json();
+    console.log('Task changes request successful:', result);
+    console.log('=== End API Get Task Changes Request ===');
     return result;
   },
 
@@ -1242,6 +1578,33 @@ export const api = {
     return result;
   },
 
+  async getBurnout(refresh: boolean = false): Promise<BurnoutSnapshot> {
+    console.log('=== API Get Burnout Request ===');
+
+    const headers = {
+      'Content-Type': 'application/json',
+      ...getAuthHeader(),
+    };
+
+    const response = await fetch(`${API_URL()}/screen-activity/burnout/${refresh ? '?refresh=true' : ''}`, {
+      headers,
+      credentials: 'include',
+    });
+
+    console.log('Response status:', response.status);
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Failed to fetch burnout score' }));
+      console.error('Burnout request failed:', error);
+      throw new Error(error.error || 'Failed to fetch burnout score');
+    }
+
+    const result = await response.json();
+    console.log('Burnout request successful:', result);
+    console.log('=== End API Get Burnout Request ===');
+    return result;
+  },
+
   async createFocusSession(start_time: string, focus_mode: string = 'medium'): Promise<any> {
     console.log('=== API Create Focus Session Request ===');
     console.log('Start time:', start_time, 'Mode:', focus_mode);